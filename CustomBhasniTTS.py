@@ -1,22 +1,42 @@
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, AsyncIterator, Dict, Iterable, List, Optional
+import asyncio
 import io
+import time
 import aiohttp
 from loguru import logger
 from pydub import AudioSegment
 from pydantic import BaseModel, Field
 
 from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
     ErrorFrame,
     Frame,
+    LLMFullResponseEndFrame,
     StartFrame,
+    StartInterruptionFrame,
     TTSAudioRawFrame,
     TTSStartedFrame,
     TTSStoppedFrame,
+    TTSTextFrame,
 )
+from pipecat.processors.frame_processor import FrameDirection
 from pipecat.services.tts_service import TTSService
 from pipecat.transcriptions.language import Language
 from pipecat.utils.tracing.service_decorators import traced_tts
 
+from utils.mp3_stream import StreamingMP3Decoder, is_audible
+from utils.resampler import resample_pcm
+from utils.transcode_pool import TranscodePool, transcode_pool
+from utils.tts_cache import TTSPhraseCache, normalize_text
+from utils.tts_failover import TTSFailover, TTSUnavailableError
+
+# How long the end of the pipeline waits for queued sentences to play out.
+PLAYOUT_DRAIN_TIMEOUT_S = 30.0
+
+# Sentences synthesized ahead of time that are kept until they are spoken.
+MAX_PREFETCHED_SENTENCES = 4
+
 
 def language_to_bhasni_language(language: Language) -> Optional[str]:
     """Convert Pipecat Language enum to Bhasni language codes."""
@@ -49,6 +69,142 @@ def language_to_bhasni_language(language: Language) -> Optional[str]:
     return LANGUAGE_MAP.get(language)
 
 
+class BhasniAPIError(Exception):
+    """Raised when the Bhasni API returns a non-200 response."""
+
+
+class _SentenceJob:
+    """A sentence whose audio is synthesized ahead of its playback."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.frames: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        # Set once the whole sentence was synthesized into some audio.
+        self.completed = False
+
+
+def mp3_to_pcm(mp3_data: bytes, sample_rate: int) -> bytes:
+    """Convert MP3 data to 16-bit mono PCM at the given sample rate."""
+    audio_segment = AudioSegment.from_mp3(io.BytesIO(mp3_data))
+    audio_segment = audio_segment.set_channels(1)  # Mono
+    audio_segment = audio_segment.set_sample_width(2)  # 16-bit
+    # Band-limited, unlike pydub's set_frame_rate, which aliases when
+    # downsampling to the phone line's 8 kHz.
+    return resample_pcm(audio_segment.raw_data, audio_segment.frame_rate, sample_rate)
+
+
+def mp3_to_pcm_chunks(mp3_data: bytes, sample_rate: int, chunk_duration_ms: int) -> List[bytes]:
+    """Convert MP3 data to PCM split into chunks of ``chunk_duration_ms``."""
+    pcm_data = mp3_to_pcm(mp3_data, sample_rate)
+    chunk_bytes = int(sample_rate * chunk_duration_ms / 1000) * 2
+    return [pcm_data[i : i + chunk_bytes] for i in range(0, len(pcm_data), chunk_bytes)]
+
+
+def _synthesize_request(text: str, language: str, voice_id: str, api_key: Optional[str]):
+    payload = {
+        "text": text,
+        "language": language,
+        "voiceName": voice_id,
+    }
+
+    headers = {
+        "Content-Type": "application/json",
+    }
+
+    if api_key:
+        headers["x-api-key"] = api_key
+
+    return payload, headers
+
+
+async def bhasni_synthesize(
+    session: aiohttp.ClientSession,
+    text: str,
+    *,
+    language: str,
+    voice_id: str,
+    base_url: str = "https://tts.bhashini.ai/v1",
+    api_key: Optional[str] = None,
+) -> bytes:
+    """Call the Bhasni ``/synthesize`` endpoint and return the MP3 response."""
+    payload, headers = _synthesize_request(text, language, voice_id, api_key)
+
+    async with session.post(f"{base_url}/synthesize", json=payload, headers=headers) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            raise BhasniAPIError(f"Bhasni API error: {error_text}")
+        return await response.read()
+
+
+async def bhasni_synthesize_stream(
+    session: aiohttp.ClientSession,
+    text: str,
+    *,
+    language: str,
+    voice_id: str,
+    base_url: str = "https://tts.bhashini.ai/v1",
+    api_key: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """Like ``bhasni_synthesize`` but yields the MP3 body as it is received."""
+    payload, headers = _synthesize_request(text, language, voice_id, api_key)
+
+    async with session.post(f"{base_url}/synthesize", json=payload, headers=headers) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            raise BhasniAPIError(f"Bhasni API error: {error_text}")
+        async for chunk in response.content.iter_any():
+            yield chunk
+
+
+async def prerender_phrases(
+    cache: TTSPhraseCache,
+    session: aiohttp.ClientSession,
+    phrases: Iterable[str],
+    *,
+    voice_id: str = "Female1",
+    language: Language = Language.KN,
+    sample_rate: int = 16000,
+    base_url: str = "https://tts.bhashini.ai/v1",
+    api_key: Optional[str] = None,
+    max_concurrency: int = 4,
+) -> int:
+    """Synthesize phrases into the cache ahead of time.
+
+    Phrases already present (e.g. in the on-disk tier) are skipped.
+
+    Returns:
+        The number of phrases that were synthesized.
+    """
+    language_name = language_to_bhasni_language(language) or "English"
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def render(text: str) -> bool:
+        if await cache.contains(text, language_name, voice_id, sample_rate):
+            return False
+        async with semaphore:
+            try:
+                mp3_data = await bhasni_synthesize(
+                    session,
+                    text,
+                    language=language_name,
+                    voice_id=voice_id,
+                    base_url=base_url,
+                    api_key=api_key,
+                )
+                pcm_data = await transcode_pool.run(mp3_to_pcm, mp3_data, sample_rate)
+            except Exception as e:
+                logger.warning(f"Failed to pre-render phrase [{text}]: {e}")
+                return False
+        await cache.put(text, language_name, voice_id, sample_rate, pcm_data)
+        return True
+
+    results = await asyncio.gather(*(render(text) for text in phrases))
+    rendered = sum(results)
+    logger.info(f"Pre-rendered {rendered} TTS phrases ({len(results) - rendered} cached or failed)")
+    return rendered
+
+
 class BhasniTTSService(TTSService):
     """Text-to-Speech service using Bhasni AI's API.
 
@@ -64,6 +220,23 @@ class BhasniTTSService(TTSService):
         base_url: Bhasni AI API base URL.
         sample_rate: Audio sample rate in Hz (8000, 16000, 22050, 24000).
         params: Additional voice and preprocessing parameters.
+        phrase_cache: Optional cache of decoded PCM. Cached phrases are played
+            without calling the API.
+        streaming: Decode the MP3 response while it downloads and push audio in
+            ``frame_duration_ms`` frames, instead of one frame per sentence.
+        frame_duration_ms: Duration of each audio frame in streaming mode.
+        transcoder: Pool that MP3 decoding runs in, off the event loop.
+            Defaults to the process-wide pool. Jobs are cancelled when the
+            bot is interrupted.
+        pipeline_depth: Number of sentences synthesized concurrently. With a
+            value above 1 the next sentences of a reply are requested while
+            the current one plays; audio is still played in order and every
+            in-flight request is cancelled on interruption.
+        failover: Hedges slow Bhasni requests, skips Bhasni while its circuit
+            breaker is open and speaks the sentence with a fallback voice
+            when Bhasni fails. Shared by all calls, since the endpoint's
+            health is. The provider and latency of every sentence are
+            recorded in it.
 
     Example:
         ```python
@@ -92,8 +265,19 @@ class BhasniTTSService(TTSService):
         params: Optional[InputParams] = None,
         model: Optional[str] = "bhasni",
         sample_rate: Optional[int] = 16000,  # Default to 16kHz
+        phrase_cache: Optional[TTSPhraseCache] = None,
+        streaming: bool = False,
+        frame_duration_ms: int = 40,
+        transcoder: Optional[TranscodePool] = None,
+        pipeline_depth: int = 1,
+        failover: Optional[TTSFailover] = None,
         **kwargs,
     ):
+        pipelined = pipeline_depth > 1
+        if pipelined:
+            # The playout task pushes each sentence's text after its audio.
+            kwargs["push_text_frames"] = False
+
         super().__init__(sample_rate=sample_rate, **kwargs)
 
         params = params or BhasniTTSService.InputParams()
@@ -101,6 +285,21 @@ class BhasniTTSService(TTSService):
         self._api_key = api_key
         self._base_url = base_url
         self._session = aiohttp_session
+        self._phrase_cache = phrase_cache
+        self._streaming = streaming
+        self._frame_duration_ms = frame_duration_ms
+        self._transcoder = transcoder or transcode_pool
+        self._failover = failover
+
+        self._pipelined = pipelined
+        self._synthesis_slots = asyncio.Semaphore(max(1, pipeline_depth))
+        self._playout_queue: asyncio.Queue = asyncio.Queue()
+        self._playout_task: Optional[asyncio.Task] = None
+        self._jobs: List[_SentenceJob] = []
+        self._job_count = 0
+
+        self._prefetched: Dict[str, asyncio.Task] = {}
+        self._prefetch_count = 0
 
         self._settings = {
             "language": self.language_to_service_language(params.language)
@@ -120,75 +319,325 @@ class BhasniTTSService(TTSService):
     async def start(self, frame: StartFrame):
         await super().start(frame)
         self._settings["sample_rate"] = self.sample_rate
+        if self._pipelined:
+            self._create_playout_task()
+
+    async def stop(self, frame: EndFrame):
+        await super().stop(frame)
+        await self._cancel_prefetched()
+
+    async def cancel(self, frame: CancelFrame):
+        await super().cancel(frame)
+        await self._stop_playout()
+        await self._cancel_prefetched()
+
+    async def prefetch(self, text: str):
+        """Start synthesizing ``text`` before it is spoken.
+
+        Used for the first sentence of a speculative LLM reply. If the
+        sentence is spoken later, its audio is already there; otherwise it is
+        dropped on the next interruption or once newer sentences replace it.
+        """
+        key = normalize_text(text)
+        if not key or key in self._prefetched:
+            return
+        if len(self._prefetched) >= MAX_PREFETCHED_SENTENCES:
+            oldest = next(iter(self._prefetched))
+            await self.cancel_task(self._prefetched.pop(oldest))
+
+        self._prefetch_count += 1
+        self._prefetched[key] = self.create_task(
+            self._prefetch_audio(text), f"prefetch_{self._prefetch_count}"
+        )
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        # Without text frames the base class drops the end of the response.
+        # Queue it behind the reply's sentences so the assistant context is
+        # only updated once their audio has been pushed.
+        if self._pipelined and isinstance(frame, LLMFullResponseEndFrame):
+            if self._playout_task:
+                await self._playout_queue.put(frame)
+            else:
+                await self.push_frame(frame, direction)
+
+    async def push_frame(self, frame: Frame, direction: FrameDirection = FrameDirection.DOWNSTREAM):
+        if isinstance(frame, EndFrame) and self._playout_task:
+            await self._drain_playout()
+        await super().push_frame(frame, direction)
+
+    async def _handle_interruption(self, frame: StartInterruptionFrame, direction: FrameDirection):
+        await super()._handle_interruption(frame, direction)
+        await self._cancel_prefetched()
+        if self._pipelined:
+            await self._stop_playout()
+            self._create_playout_task()
+
+    def _create_playout_task(self):
+        if not self._playout_task:
+            self._playout_queue = asyncio.Queue()
+            self._playout_task = self.create_task(self._playout_task_handler())
+
+    async def _stop_playout(self):
+        if self._playout_task:
+            await self.cancel_task(self._playout_task)
+            self._playout_task = None
+        if self._jobs:
+            logger.debug(f"{self}: Cancelling {len(self._jobs)} pending TTS sentences")
+        for job in self._jobs:
+            await self.cancel_task(job.task)
+        self._jobs = []
+
+    async def _drain_playout(self):
+        # Let the queued sentences play out before the pipeline ends.
+        await self._playout_queue.put(None)
+        await self.wait_for_task(self._playout_task, PLAYOUT_DRAIN_TIMEOUT_S)
+        self._playout_task = None
+        await self._stop_playout()
+
+    async def _schedule_sentence(self, text: str):
+        if not self._jobs:
+            await self.start_ttfb_metrics()
 
-    def _convert_mp3_to_pcm(self, mp3_data: bytes) -> bytes:
-        """Convert MP3 data to raw PCM data."""
+        self._job_count += 1
+        job = _SentenceJob(text)
+        job.task = self.create_task(self._synthesize_job(job), f"sentence_{self._job_count}")
+        self._jobs.append(job)
+        await self._playout_queue.put(job)
+
+    async def _synthesize_job(self, job: _SentenceJob):
         try:
-            # Load MP3 from bytes
-            audio_segment = AudioSegment.from_mp3(io.BytesIO(mp3_data))
-            
-            # Convert to target format
-            # Ensure we match the expected sample rate and format
-            audio_segment = audio_segment.set_frame_rate(self.sample_rate)
-            audio_segment = audio_segment.set_channels(1)  # Mono
-            audio_segment = audio_segment.set_sample_width(2)  # 16-bit
-            
-            # Get raw PCM data
-            pcm_data = audio_segment.raw_data
-            
-            return pcm_data
-            
+            async with self._synthesis_slots:
+                produced_audio = False
+                async for frame in self._synthesize(job.text):
+                    produced_audio = True
+                    await job.frames.put(frame)
+            job.completed = produced_audio
+        except BhasniAPIError as e:
+            logger.error(f"{e}")
+            await self.push_error(ErrorFrame(f"{e}"))
+        except Exception as e:
+            logger.error(f"{self} exception: {e}")
+            await self.push_error(ErrorFrame(f"Error generating TTS: {e}"))
+        finally:
+            await job.frames.put(None)
+
+    async def _playout_task_handler(self):
+        """Push scheduled sentences downstream in the order they were received."""
+        while True:
+            item = await self._playout_queue.get()
+            if item is None:
+                break
+            if isinstance(item, _SentenceJob):
+                await self._play_sentence(item)
+            else:
+                await self.push_frame(item)
+
+    async def _play_sentence(self, job: _SentenceJob):
+        await self.push_frame(TTSStartedFrame())
+
+        heard = False
+        while True:
+            frame = await job.frames.get()
+            if frame is None:
+                break
+            if not heard and is_audible(frame.audio):
+                await self.stop_ttfb_metrics()
+                heard = True
+            await self.push_frame(frame)
+
+        await self.wait_for_task(job.task)
+        self._jobs.remove(job)
+
+        await self.stop_ttfb_metrics()
+        await self.push_frame(TTSStoppedFrame())
+        # Like the base class, send the text after the audio so an interrupted
+        # sentence is not added to the assistant context; neither is one the
+        # caller never heard because synthesis failed.
+        if job.completed:
+            await self.push_frame(TTSTextFrame(job.text))
+
+    async def _convert_mp3_to_pcm(self, mp3_data: bytes) -> bytes:
+        """Convert MP3 data to raw PCM data in the transcoding pool."""
+        try:
+            return await self._transcoder.run(mp3_to_pcm, mp3_data, self.sample_rate)
         except Exception as e:
             logger.error(f"Error converting MP3 to PCM: {e}")
             raise
 
-    @traced_tts
-    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
-        logger.debug(f"{self}: Generating TTS [{text}]")
-
-        try:
-            await self.start_ttfb_metrics()
-
-            payload = {
-                "text": text,
-                "language": self._settings["language"],
-                "voiceName": self._voice_id
-            }
+    async def _cache_lookup(self, text: str) -> Optional[bytes]:
+        if not self._phrase_cache:
+            return None
+        return await self._phrase_cache.get(
+            text, self._settings["language"], self._voice_id, self.sample_rate
+        )
 
-            headers = {
-                "Content-Type": "application/json",
-            }
+    async def _cache_store(self, text: str, pcm_data: bytes):
+        if self._phrase_cache:
+            await self._phrase_cache.put(
+                text, self._settings["language"], self._voice_id, self.sample_rate, pcm_data
+            )
 
-            if self._api_key:
-                headers["x-api-key"] = self._api_key
+    async def _prefetch_audio(self, text: str) -> bytes:
+        pcm_data = await self._cache_lookup(text)
+        if pcm_data is not None:
+            return pcm_data
+        mp3_data = await self._download(text, {})
+        return await self._convert_mp3_to_pcm(mp3_data)
 
-            url = f"{self._base_url}/synthesize"
+    async def _take_prefetched(self, text: str) -> Optional[bytes]:
+        task = self._prefetched.pop(normalize_text(text), None)
+        if not task or task.cancelled():
+            return None
+        try:
+            return await task
+        except Exception as e:
+            logger.warning(f"{self}: Prefetching TTS [{text}] failed: {e}")
+            return None
+
+    async def _cancel_prefetched(self):
+        for task in self._prefetched.values():
+            await self.cancel_task(task)
+        self._prefetched = {}
+
+    def _request(self, text: str) -> AsyncGenerator[bytes, None]:
+        return bhasni_synthesize_stream(
+            self._session,
+            text,
+            language=self._settings["language"],
+            voice_id=self._voice_id,
+            base_url=self._base_url,
+            api_key=self._api_key,
+        )
 
-            yield TTSStartedFrame()
+    def _request_chunks(self, text: str, info: Dict) -> AsyncGenerator[bytes, None]:
+        """The MP3 body for ``text``, hedged when there is a failover."""
+        if self._failover:
+            if not self._failover.primary_available():
+                raise TTSUnavailableError(f"{self._failover.name} circuit breaker is open")
+            return self._failover.stream(lambda: self._request(text), info)
+        return self._request(text)
+
+    async def _download(self, text: str, info: Dict) -> bytes:
+        mp3_data = bytearray()
+        async for chunk in self._request_chunks(text, info):
+            mp3_data += chunk
+        return bytes(mp3_data)
+
+    async def _stream_synthesis(
+        self, text: str, info: Dict
+    ) -> AsyncGenerator[TTSAudioRawFrame, None]:
+        """Yield audio frames while the MP3 response is still downloading."""
+        decoder = StreamingMP3Decoder(
+            sample_rate=self.sample_rate, frame_duration_ms=self._frame_duration_ms
+        )
+        chunks = self._request_chunks(text, info)
+
+        pcm_data = bytearray()
+        async for pcm_chunk in decoder.decode(chunks):
+            if not pcm_data:
+                await self.start_tts_usage_metrics(text)
+            pcm_data += pcm_chunk
+            yield TTSAudioRawFrame(
+                audio=pcm_chunk,
+                sample_rate=self.sample_rate,
+                num_channels=1,
+            )
 
-            async with self._session.post(url, json=payload, headers=headers) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Bhasni API error: {error_text}")
-                    await self.push_error(ErrorFrame(f"Bhasni API error: {error_text}"))
-                    return
+        await self._cache_store(text, bytes(pcm_data))
 
-                # Read the MP3 response
-                mp3_data = await response.read()
+    async def _synthesize(self, text: str) -> AsyncGenerator[TTSAudioRawFrame, None]:
+        """Yield the audio for ``text``, from the fallback voice if Bhasni fails."""
+        start = time.perf_counter()
+        info = {}
+        reported = False
+        try:
+            async for frame in self._synthesize_primary(text, info):
+                if not reported:
+                    self._report_provider(text, info, start)
+                    reported = True
+                yield frame
+        except Exception as e:
+            # Once audio was played, switching voices mid-sentence is worse
+            # than stopping.
+            if reported or not self._failover or not self._failover.has_fallback:
+                raise
+            logger.warning(f"{self}: {e}; speaking [{text}] with {self._failover.fallback_name}")
+            pcm_data = await self._failover.fallback(text, self.sample_rate)
+            info["provider"] = self._failover.fallback_name
+            self._report_provider(text, info, start)
+            yield TTSAudioRawFrame(audio=pcm_data, sample_rate=self.sample_rate, num_channels=1)
+
+    def _report_provider(self, text: str, info: Dict, start: float):
+        provider = info.get("provider", self._failover.name if self._failover else "bhasni")
+        if info.get("winner") == 1:
+            provider += "_hedge"
+        latency_ms = 1000 * (time.perf_counter() - start)
+        logger.debug(f"{self}: [{text}] served by {provider} in {latency_ms:.0f}ms")
+        if self._failover:
+            self._failover.record_utterance(provider, latency_ms)
+
+    async def _synthesize_primary(
+        self, text: str, info: Dict
+    ) -> AsyncGenerator[TTSAudioRawFrame, None]:
+        """Yield the audio for ``text`` from the cache or the Bhasni API."""
+        prefetched = await self._take_prefetched(text)
+        pcm_data = prefetched if prefetched is not None else await self._cache_lookup(text)
+        if prefetched is not None:
+            logger.debug(f"{self}: Playing prefetched TTS [{text}]")
+            info["provider"] = "prefetch"
+        elif pcm_data is not None:
+            logger.debug(f"{self}: Playing cached TTS [{text}]")
+            info["provider"] = "cache"
+        elif self._streaming:
+            async for frame in self._stream_synthesis(text, info):
+                yield frame
+            return
+        else:
+            mp3_data = await self._download(text, info)
 
             await self.start_tts_usage_metrics(text)
 
             # Convert MP3 to raw PCM data
-            pcm_data = self._convert_mp3_to_pcm(mp3_data)
-            # Create audio frame with raw PCM data
-            frame = TTSAudioRawFrame(
-                audio=pcm_data,
-                sample_rate=self.sample_rate,
-                num_channels=1,
-            )
+            pcm_data = await self._convert_mp3_to_pcm(mp3_data)
+            await self._cache_store(text, pcm_data)
+
+        # Create audio frame with raw PCM data
+        yield TTSAudioRawFrame(
+            audio=pcm_data,
+            sample_rate=self.sample_rate,
+            num_channels=1,
+        )
 
-            yield frame
+    @traced_tts
+    async def run_tts(self, text: str) -> AsyncGenerator[Frame, None]:
+        logger.debug(f"{self}: Generating TTS [{text}]")
 
+        if self._pipelined:
+            # Synthesis runs in the background and the playout task pushes
+            # the audio, so the next sentence can be requested right away.
+            await self._schedule_sentence(text)
+            yield None
+            return
+
+        try:
+            await self.start_ttfb_metrics()
+
+            yield TTSStartedFrame()
+
+            heard = False
+            async for frame in self._synthesize(text):
+                # TTFB is what the caller perceives: the first frame that isn't
+                # leading silence.
+                if not heard and is_audible(frame.audio):
+                    await self.stop_ttfb_metrics()
+                    heard = True
+                yield frame
+
+        except BhasniAPIError as e:
+            logger.error(f"{e}")
+            await self.push_error(ErrorFrame(f"{e}"))
         except Exception as e:
             logger.error(f"{self} exception: {e}")
             await self.push_error(ErrorFrame(f"Error generating TTS: {e}"))
@@ -233,31 +682,24 @@ class BhasniTTSService(TTSService):
 
             await self.start_tts_usage_metrics(text)
 
-            # Convert MP3 to PCM and chunk it
+            # Convert MP3 to PCM and chunk it, off the event loop
             try:
-                audio_segment = AudioSegment.from_mp3(io.BytesIO(mp3_data))
-                audio_segment = audio_segment.set_frame_rate(self.sample_rate)
-                audio_segment = audio_segment.set_channels(1)
-                audio_segment = audio_segment.set_sample_width(2)
-
-                # Split into chunks
-                for i in range(0, len(audio_segment), chunk_duration_ms):
-                    chunk = audio_segment[i:i + chunk_duration_ms]
-                    chunk_pcm = chunk.raw_data
-                    
-                    if len(chunk_pcm) > 0:  # Only yield non-empty chunks
-                        frame = TTSAudioRawFrame(
-                            audio=chunk_pcm,
-                            sample_rate=self.sample_rate,
-                            num_channels=1,
-                        )
-                        yield frame
-
+                chunks = await self._transcoder.run(
+                    mp3_to_pcm_chunks, mp3_data, self.sample_rate, chunk_duration_ms
+                )
             except Exception as e:
                 logger.error(f"Error processing MP3 audio: {e}")
                 await self.push_error(ErrorFrame(f"Error processing audio: {e}"))
                 return
 
+            for chunk_pcm in chunks:
+                frame = TTSAudioRawFrame(
+                    audio=chunk_pcm,
+                    sample_rate=self.sample_rate,
+                    num_channels=1,
+                )
+                yield frame
+
         except Exception as e:
             logger.error(f"{self} exception: {e}")
             await self.push_error(ErrorFrame(f"Error generating TTS: {e}"))
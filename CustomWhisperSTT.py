@@ -0,0 +1,355 @@
+import asyncio
+import io
+import wave
+from typing import AsyncGenerator, Optional
+
+import numpy as np
+from loguru import logger
+
+from pipecat.frames.frames import (
+    AudioRawFrame,
+    ErrorFrame,
+    Frame,
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.services.whisper.stt import WhisperSTTService
+from pipecat.transcriptions.language import Language
+from pipecat.utils.time import time_now_iso8601
+
+from utils.inference_server import InferenceClient
+from utils.resampler import resample
+from utils.speculation import SpeechResumedFrame, TentativeTranscriptionFrame
+from utils.streaming_stt import LocalAgreement, transcribe_words
+from utils.stt_scheduler import (
+    SAMPLE_RATE as WHISPER_SAMPLE_RATE,
+    WhisperBatchScheduler,
+    stt_scheduler,
+    transcribe_single,
+)
+from utils.whisper_registry import WhisperModelRegistry, model_registry
+
+# Whisper's encoder sees at most 30 seconds of audio.
+MAX_DECODE_WINDOW_S = 30.0
+# Shorter tails after the committed words are not worth a decode.
+MIN_TAIL_S = 0.1
+
+
+class SharedWhisperSTTService(WhisperSTTService):
+    """Whisper STT service that borrows its model from a process-wide registry.
+
+    Behaves exactly like ``WhisperSTTService`` but, instead of loading a new
+    ``WhisperModel`` per instance, it borrows one from ``WhisperModelRegistry``
+    and gives it back when the pipeline is cleaned up. Concurrent calls on the
+    same replica therefore share a single copy of the weights.
+
+    Finished utterances are handed to a ``WhisperBatchScheduler`` so that
+    utterances from different calls are transcribed in one batched GPU call.
+
+    The service runs at the call's sample rate; audio is resampled to
+    Whisper's 16 kHz only when it is transcribed.
+
+    Args:
+        registry: Registry to borrow the model from. Defaults to the
+            process-wide ``model_registry``.
+        scheduler: Batch scheduler to transcribe through. Defaults to the
+            process-wide ``stt_scheduler``.
+        batching: Set to False to transcribe each utterance on its own.
+        inference: Transcribe through the inference server instead of a
+            model in this process, as call workers do.
+        speculative_pause_ms: When set, the utterance so far is transcribed
+            as soon as the user pauses this long, before the VAD declares
+            the end of speech, and pushed as a ``TentativeTranscriptionFrame``.
+            A ``SpeechResumedFrame`` follows if the user keeps talking.
+        pause_threshold_db: Level below which audio counts as a pause.
+        streaming_interval_ms: When set, the utterance is decoded this often
+            while the user speaks. Words two consecutive decodes agree on
+            are committed and pushed as an ``InterimTranscriptionFrame``, and
+            the final transcription only decodes the audio after them.
+        max_window_s: Once the audio decoded while streaming is longer than
+            this, the window starts after the last committed word.
+        **kwargs: Arguments accepted by ``WhisperSTTService``.
+
+    Example:
+        ```python
+        stt = SharedWhisperSTTService(
+            model=model_path,
+            language="kn",
+            device="cuda",
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        *,
+        registry: Optional[WhisperModelRegistry] = None,
+        scheduler: Optional[WhisperBatchScheduler] = None,
+        batching: bool = True,
+        speculative_pause_ms: Optional[int] = None,
+        pause_threshold_db: float = -40.0,
+        streaming_interval_ms: Optional[int] = None,
+        max_window_s: float = 20.0,
+        inference: Optional[InferenceClient] = None,
+        **kwargs,
+    ):
+        # WhisperSTTService.__init__ calls self._load(), so these must exist first.
+        self._registry = registry or model_registry
+        self._borrowed = False
+        self._inference = inference
+        super().__init__(**kwargs)
+
+        self._scheduler = (scheduler or stt_scheduler) if batching else None
+
+        self._speculative_pause_ms = speculative_pause_ms
+        self._pause_threshold_db = pause_threshold_db
+        self._pause_ms = 0.0
+        self._heard_speech = False
+        self._tentative_task: Optional[asyncio.Task] = None
+        self._tentative_count = 0
+
+        self._streaming_interval_ms = streaming_interval_ms
+        self._max_window_s = max_window_s
+        self._agreement = LocalAgreement()
+        self._window_start_s = 0.0
+        self._since_decode_ms = 0.0
+        self._partial_task: Optional[asyncio.Task] = None
+        self._partial_count = 0
+
+    @property
+    def buffered_audio_bytes(self) -> int:
+        """Size of the audio buffered for the current utterance."""
+        return len(self._audio_buffer)
+
+    def language_to_service_language(self, language: Language) -> Optional[str]:
+        # Pipecat's Whisper map does not list every language Whisper knows
+        # (Kannada among them), which silently turned on auto-detection.
+        # Fall back to the plain ISO code in that case.
+        whisper_language = super().language_to_service_language(language)
+        if whisper_language is None and isinstance(language, str) and 2 <= len(language) <= 3:
+            whisper_language = str(getattr(language, "value", language)).lower()
+        return whisper_language
+
+    @property
+    def _can_transcribe(self) -> bool:
+        return self._model is not None or self._inference is not None
+
+    @property
+    def _model_key(self):
+        return (self.model_name, self._device, self._compute_type)
+
+    def _load(self):
+        """Borrow the model from the registry instead of loading a private copy."""
+        if self._inference:
+            # The model lives in the inference server.
+            self._model = None
+            return
+        try:
+            self._model = self._registry.acquire(
+                self.model_name, self._device, self._compute_type
+            )
+            self._borrowed = True
+        except ModuleNotFoundError as e:
+            logger.error(f"Exception: {e}")
+            logger.error("In order to use Whisper, you need to `pip install pipecat-ai[whisper]`.")
+            self._model = None
+
+    def _release(self):
+        if not self._borrowed:
+            return
+        self._registry.release(self.model_name, self._device, self._compute_type)
+        self._borrowed = False
+        self._model = None
+
+    async def cleanup(self):
+        await super().cleanup()
+        self._release()
+
+    @staticmethod
+    def _audio_to_float(audio: bytes) -> np.ndarray:
+        """Convert the 16-bit PCM (optionally WAV wrapped) segment to float32."""
+        if audio[:4] == b"RIFF":
+            with wave.open(io.BytesIO(audio), "rb") as wav:
+                audio = wav.readframes(wav.getnframes())
+        # Divide by 32768 because we have signed 16-bit data.
+        return np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def _to_whisper_rate(self, audio: np.ndarray) -> np.ndarray:
+        """Resample the call's audio (8 kHz on phone calls) to Whisper's 16 kHz."""
+        return resample(audio, self.sample_rate, WHISPER_SAMPLE_RATE)
+
+    async def _transcribe(self, audio: np.ndarray, language: Optional[str]) -> str:
+        audio = self._to_whisper_rate(audio)
+        if self._inference:
+            return await self._inference.transcribe(
+                self._model_key,
+                audio,
+                language,
+                self._no_speech_prob,
+                batching=self._scheduler is not None,
+            )
+        if self._scheduler:
+            return await self._scheduler.transcribe(
+                self._model, audio, language, self._no_speech_prob
+            )
+        return await asyncio.to_thread(
+            transcribe_single, self._model, audio, language, self._no_speech_prob
+        )
+
+    async def _transcribe_utterance(self, audio: np.ndarray) -> str:
+        """Transcribe the utterance, reusing the words committed while streaming."""
+        language = self.language_to_service_language(self._settings["language"])
+        committed = self._agreement.text
+        if not committed:
+            return (await self._transcribe(audio, language)).strip()
+
+        tail = audio[int(self._agreement.committed_end_s * self.sample_rate) :]
+        tail_text = ""
+        if len(tail) >= MIN_TAIL_S * self.sample_rate:
+            tail_text = (await self._transcribe(tail, language)).strip()
+        return f"{committed} {tail_text}".strip()
+
+    async def process_audio_frame(self, frame: AudioRawFrame, direction: FrameDirection):
+        await super().process_audio_frame(frame, direction)
+        if not self._user_speaking:
+            return
+        if self._speculative_pause_ms:
+            await self._track_pause(frame.audio)
+        if self._streaming_interval_ms:
+            self._since_decode_ms += 1000 * len(frame.audio) / 2 / self.sample_rate
+            self._maybe_decode_partial()
+
+    async def _handle_user_started_speaking(self, frame: UserStartedSpeakingFrame):
+        await super()._handle_user_started_speaking(frame)
+        await self._reset_pause(cancel=True)
+        await self._reset_streaming()
+
+    async def _handle_user_stopped_speaking(self, frame: UserStoppedSpeakingFrame):
+        # A tentative transcription still running is kept: it is usually
+        # done before the final one and the speculation can still use it.
+        await self._reset_pause(cancel=False)
+        # Nothing more may be committed while the final tail is decoded.
+        if self._partial_task:
+            await self.cancel_task(self._partial_task)
+            self._partial_task = None
+        await super()._handle_user_stopped_speaking(frame)
+        await self._reset_streaming()
+
+    async def _reset_streaming(self):
+        if self._partial_task:
+            await self.cancel_task(self._partial_task)
+            self._partial_task = None
+        self._agreement.reset()
+        self._window_start_s = 0.0
+        self._since_decode_ms = 0.0
+
+    def _maybe_decode_partial(self):
+        if not self._can_transcribe or self._since_decode_ms < self._streaming_interval_ms:
+            return
+        # Skip a round rather than queue decodes behind a slow one.
+        if self._partial_task and not self._partial_task.done():
+            return
+        self._since_decode_ms = 0.0
+        self._partial_count += 1
+        self._partial_task = self.create_task(
+            self._decode_partial(bytes(self._audio_buffer)), f"partial_{self._partial_count}"
+        )
+
+    async def _decode_partial(self, audio: bytes):
+        samples = self._audio_to_float(audio)
+        duration_s = len(samples) / self.sample_rate
+
+        # Slide the window past the committed words once it gets long.
+        committed_end_s = self._agreement.committed_end_s
+        if duration_s - self._window_start_s > self._max_window_s:
+            self._window_start_s = max(self._window_start_s, committed_end_s)
+        start_s = max(self._window_start_s, duration_s - MAX_DECODE_WINDOW_S)
+
+        audio = self._to_whisper_rate(samples[int(start_s * self.sample_rate) :])
+        language = self.language_to_service_language(self._settings["language"])
+        if self._inference:
+            words = await self._inference.transcribe_words(
+                self._model_key,
+                audio,
+                language,
+                self._no_speech_prob,
+                offset_s=start_s,
+                initial_prompt=self._agreement.text or None,
+            )
+        else:
+            words = await asyncio.to_thread(
+                transcribe_words,
+                self._model,
+                audio,
+                language,
+                self._no_speech_prob,
+                offset_s=start_s,
+                initial_prompt=self._agreement.text or None,
+            )
+        if self._agreement.insert(words):
+            text = self._agreement.text
+            logger.debug(f"Partial transcription: [{text}]")
+            await self.push_frame(
+                InterimTranscriptionFrame(text, "", time_now_iso8601(), self._settings["language"])
+            )
+
+    async def _reset_pause(self, *, cancel: bool):
+        self._pause_ms = 0.0
+        self._heard_speech = False
+        if cancel and self._tentative_task:
+            await self.cancel_task(self._tentative_task)
+        self._tentative_task = None
+
+    async def _track_pause(self, audio: bytes):
+        samples = np.frombuffer(audio, dtype=np.int16).astype(np.float32)
+        if not samples.size:
+            return
+        rms = float(np.sqrt(np.mean(samples**2))) / 32768.0
+        level_db = 20 * np.log10(rms + 1e-10)
+
+        if level_db >= self._pause_threshold_db:
+            if self._tentative_task:
+                # The user kept talking: whatever was started is stale.
+                await self._reset_pause(cancel=True)
+                await self.push_frame(SpeechResumedFrame())
+            self._pause_ms = 0.0
+            self._heard_speech = True
+            return
+
+        self._pause_ms += 1000 * samples.size / self.sample_rate
+        if self._heard_speech and not self._tentative_task:
+            if self._pause_ms >= self._speculative_pause_ms:
+                self._tentative_count += 1
+                self._tentative_task = self.create_task(
+                    self._transcribe_tentative(bytes(self._audio_buffer)),
+                    f"tentative_{self._tentative_count}",
+                )
+
+    async def _transcribe_tentative(self, audio: bytes):
+        text = await self._transcribe_utterance(self._audio_to_float(audio))
+        if text:
+            logger.debug(f"Tentative transcription: [{text}]")
+            await self.push_frame(TentativeTranscriptionFrame(text))
+
+    async def run_stt(self, audio: bytes) -> AsyncGenerator[Frame, None]:
+        """Transcribe a finished utterance, batched with other calls when possible."""
+        if not self._can_transcribe:
+            logger.error(f"{self} error: Whisper model not available")
+            yield ErrorFrame("Whisper model not available")
+            return
+
+        await self.start_processing_metrics()
+        await self.start_ttfb_metrics()
+
+        text = await self._transcribe_utterance(self._audio_to_float(audio))
+
+        await self.stop_ttfb_metrics()
+        await self.stop_processing_metrics()
+
+        if text:
+            await self._handle_transcription(text, True, self._settings["language"])
+            logger.debug(f"Transcription: [{text}]")
+            yield TranscriptionFrame(text, "", time_now_iso8601(), self._settings["language"])
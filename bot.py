@@ -1,280 +1,248 @@
 """Twilio + Daily voice bot implementation."""
 import os
+import random
 import sys
+from typing import Awaitable, Callable, List, Optional, Tuple, Type
 
 from dotenv import load_dotenv
 from loguru import logger
-from twilio.rest import Client
 
-from pipecat.audio.vad.silero import SileroVADAnalyzer
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.transports.base_transport import BaseTransport, TransportParams
 from pipecat.transports.services.daily import DailyParams, DailyTransport
-from huggingface_hub import snapshot_download
 
-from pipecat.services.whisper.stt import WhisperSTTService
-from pipecat.services.groq.llm import GroqLLMService
 from pipecat.services.groq.tts import GroqTTSService
 from pipecat.transcriptions.language import Language
-from CustomBhasniTTS import BhasniTTSService
-import aiohttp
+from CustomBhasniTTS import BhasniTTSService, prerender_phrases
+from CustomWhisperSTT import SharedWhisperSTTService
+from utils.call_audio import CallAudioFormat, negotiate_call_audio
+from utils.call_supervisor import CallRecord
+from utils.cpu_inference import default_compute_type
+from utils.greeting import GreetingAudio
+from utils.model_cache import ModelWarmup
+from utils.script_engine import ScriptTurnEngine
+from utils.speculation import SpeculativeLLMProcessor
+from utils.script_phrases import extract_script_phrases, split_sentences
+from utils.http_pool import http_pool
+from utils.inference_server import InferenceClient, RemoteVADAnalyzer
+from utils.latency_tracing import LatencyMetrics, TurnLatencyObserver
+from utils.llm_router import LLMEndpoint, LLMRouter, RoutedGroqLLMService
+from utils.stage_context import StageContextProcessor
+from utils.streaming_stt import PartialTranscriptInterruption
+from utils.tts_cache import TTSPhraseCache
+from utils.tts_failover import EspeakVoice, FallbackVoice, GroqSpeechVoice, TTSFailover
+from utils.twilio_forwarding import twilio_forwarder
+from utils.vad_engine import SharedSileroVADAnalyzer
 from pipecat.audio.interruptions.min_words_interruption_strategy import MinWordsInterruptionStrategy
+from script import COMPLAINT_FIELDS, CORE_SECTIONS, GREETINGS, SCRIPT_TURNS, STAGES, prompt
 
-prompt = """
-You are **ರಾಜ್** (Raj), a friendly and professional customer service representative calling from Karnataka Water Helpline (ಕರ್ನಾಟಕ ನೀರು ಸಹಾಯವಾಣಿ). Your goal is to collect water-related complaints from citizens efficiently while maintaining empathy and professionalism throughout the conversation.
 
-## ಪಾತ್ರ ಮತ್ತು ಧ್ವನಿ (Role and Voice):
-- **ಪಾತ್ರ**: Water helpline complaint collection officer
-- **ಧ್ವನಿ**: Clear, empathetic, and professional Kannada tone with local Karnataka accent
-- **ಭಾಷೆ**: Primary Kannada; switch to English/Hindi only if user initiates
-- **ವರ್ತನೆ**: Patient, understanding, and solution-oriented
-
-## ಮುಖ್ಯ ನಿಯಮಗಳು (Golden Rules):
-- **GOLDEN RULE 1**: Always follow the exact script below - DO NOT deviate from the conversation flow
-- **GOLDEN RULE 2**: Collect ALL required information before ending the call
-- **GOLDEN RULE 3**: Repeat the complaint back to ensure accuracy
-- **GOLDEN RULE 4**: Maintain TTS compatibility with proper break tags
-- **GOLDEN RULE 5**: Show empathy for water problems while staying professional
-
-## TTS ಹೊಂದಾಣಿಕೆ ನಿಯಮಗಳು (TTS Compatibility Rules):
-- Use `<break time="500ms"/>` tags for natural pauses
-- Print exactly as written - DO NOT change spelling, punctuation, or capitalization
-- Use ,,ಅಂದ್ರೆ,, or ,,ಸರಿ,, for natural fillers (maximum 4 per conversation)
-- Maintain proper Kannada pronunciation markers
-
----
-
-## 1. ಆರಂಭಿಕ ಸ್ವಾಗತ (Opening Greeting)
-
-### ಮೊದಲ ಸಂಪರ್ಕ:
-**ರಾಜ್ ಹೇಳುತ್ತಾನೆ:**
-"ನಮಸ್ಕಾರ <break time="700ms"/> ನಾನು ರಾಜ್ <break time="500ms"/> ಕರ್ನಾಟಕ ನೀರು ಸಹಾಯವಾಣಿಯಿಂದ ಮಾತನಾಡುತ್ತಿದ್ದೇನೆ. <break time="300ms"/> ನಿಮ್ಮ ಹೆಸರು ಏನು ಸರ್?"
-
-### ಪ್ರತಿಕ್ರಿಯೆಗಳು:
-- **ಹೆಸರು ದೊರೆತರೆ:**
-  "ಧನ್ಯವಾದಗಳು [ಹೆಸರು] ಸರ್. <break time="400ms"/> ನಿಮ್ಮ ನೀರಿನ ಸಮಸ್ಯೆ ಬಗ್ಗೆ ತಿಳಿಸಲು ಕರೆ ಮಾಡಿದ್ದೀರಾ?"
-  
-- **ಸ್ಪಷ್ಟವಾಗಿಲ್ಲದಿದ್ದರೆ:**
-  "ಕ್ಷಮಿಸಿ <break time="300ms"/> ದಯವಿಟ್ಟು ನಿಮ್ಮ ಹೆಸರನ್ನು ಮತ್ತೊಮ್ಮೆ ಹೇಳಬಹುದೇ?"
-
-- **ಬೇಸರ ತೋರಿದರೆ:**
-  "ಸರ್ <break time="400ms"/> ನಿಮ್ಮ ಸಮಯ ಬೆಲೆಯುತ್ತದೆ. ಕೇವಲ ೨-೩ ನಿಮಿಷಗಳು ಬೇಕು. ನೀರಿನ ಸಮಸ್ಯೆ ಇದೆಯೇ?"
-
----
-
-## 2. ದೂರಿನ ಉದ್ದೇಶ ಖಚಿತಪಡಿಸುವಿಕೆ (Complaint Confirmation)
-
-**ರಾಜ್ ಹೇಳುತ್ತಾನೆ:**
-"ಸರಿ <break time="500ms"/> ನಿಮ್ಮ ಮನೆಯಲ್ಲಿ ಅಥವಾ ಪ್ರದೇಶದಲ್ಲಿ ಯಾವ ರೀತಿಯ ನೀರಿನ ಸಮಸ್ಯೆ ಇದೆ? <break time="300ms"/> ದಯವಿಟ್ಟು ವಿವರವಾಗಿ ತಿಳಿಸಿ."
-
-### ಪ್ರತಿಕ್ರಿಯೆಗಳು:
-- **ದೂರು ಪ್ರಾರಂಭಿಸಿದರೆ:**
-  "ಅಂದ್ರೆ,, ಹೌದು ಸರ್ <break time="400ms"/> ನಾನು ಕೇಳುತ್ತಿದ್ದೇನೆ. ದಯವಿಟ್ಟು ಮುಂದುವರಿಸಿ."
-  
-- **ಸಮಯವಿಲ್ಲ ಎಂದರೆ:**
-  "ಅರ್ಥಮಾಡಿಕೊಂಡೆ ಸರ್. ಯಾವಾಗ ಕರೆ ಮಾಡಬಹುದು? ಇಂದು ಸಂಜೆಯಲ್ಲಿ ಅಥವಾ ನಾಳೆ?"
-  
-- **ಸಮಸ್ಯೆ ಇಲ್ಲ ಎಂದರೆ:**
-  "ಸಂತೋಷ ಸರ್. ಆದರೆ ಭವಿಷ್ಯದಲ್ಲಿ ಯಾವುದೇ ನೀರಿನ ಸಮಸ್ಯೆ ಬಂದರೆ ಈ ಸಂಖ್ಯೆಗೆ ಕರೆ ಮಾಡಬಹುದು. ಧನ್ಯವಾದಗಳು."
-
----
-
-## 3. ವಿವರವಾದ ದೂರು ಸಂಗ್ರಹ (Detailed Complaint Collection)
-
-### ಮೂಲ ಮಾಹಿತಿ ಸಂಗ್ರಹ:
-**ರಾಜ್ ಕೇಳುತ್ತಾನೆ:**
-
-#### ಸ್ಥಳ:
-"ಮೊದಲು ನಿಮ್ಮ ವಿಳಾಸ ತಿಳಿಸಿ - ಯಾವ ಪ್ರದೇಶ <break time="400ms"/> ಯಾವ ವಾರ್ಡ್?"
-
-#### ಸಮಸ್ಯೆಯ ವಿಧ:
-"ಈಗ ನಿಮ್ಮ ಸಮಸ್ಯೆ ಯಾವುದು? 
-- ನೀರು ಬರುತ್ತಿಲ್ಲವೇ?
-- ನೀರು ಕೊಳಕಾಗಿದೆಯೇ?
-- ಪೈಪ್ ಸಿಡಿದಿದೆಯೇ?
-- ಇತರ ಯಾವುದೇ ಸಮಸ್ಯೆಯೇ?"
-
-#### ಸಮಯಾವಧಿ:
-"ಈ ಸಮಸ್ಯೆ ಎಷ್ಟು ದಿನಗಳಿಂದ ಇದೆ?"
-
-#### ತೀವ್ರತೆ:
-"ಇದು ತುರ್ತು ಸಮಸ್ಯೆಯೇ? ಎಷ್ಟು ಮನೆಗಳಿಗೆ ಪರಿಣಾಮವಾಗಿದೆ?"
-
-### ದೂರು ಕೇಳುವಾಗ ಬಳಸುವ ಪದಗಳು:
-- "ಅಂದ್ರೆ,, ಹೌದು ಸರ್"
-- "ಸರಿ <break time="300ms"/> ಮುಂದುವರಿಸಿ"
-- "ಅರ್ಥವಾಯಿತು ಸರ್"
-- "ಇನ್ನು ಬೇರೆ ಏನಾದರೂ ಇದೆಯೇ?"
-
----
-
-## 4. ದೂರು ಪುನರಾವರ್ತನೆ (Complaint Repetition)
-
-**ರಾಜ್ ಹೇಳುತ್ತಾನೆ:**
-"ಸರಿ ಸರ್ <break time="500ms"/> ನಾನು ನಿಮ್ಮ ದೂರು ಅರ್ಥಮಾಡಿಕೊಂಡಿದ್ದೇನೆ. <break time="300ms"/> ನಿಮ್ಮ ಸಮಸ್ಯೆ ಹೀಗಿದೆ:
-
-**[ಬಳಕೆದಾರರ ದೂರನ್ನು ಸಂಕ್ಷಿಪ್ತವಾಗಿ ಪುನರಾವರ್ತಿಸಿ]**
-
-- ಸ್ಥಳ: [ವಿಳಾಸ]
-- ಸಮಸ್ಯೆ: [ಸಮಸ್ಯೆಯ ವಿವರ]  
-- ಅವಧಿ: [ಎಷ್ಟು ದಿನಗಳಿಂದ]
-
-<break time="500ms"/> ಇದು ಸರಿಯಾಗಿದೆಯೇ ಸರ್? ಬೇರೆ ಯಾವುದಾದರೂ ವಿಷಯ ಸೇರಿಸಲು ಇದೆಯೇ?"
-
-### ಪ್ರತಿಕ್ರಿಯೆಗಳು:
-- **ಸರಿ ಎಂದರೆ:**
-  "ಧನ್ಯವಾದಗಳು ಸರ್" → ಮುಕ್ತಾಯಕ್ಕೆ ಹೋಗಿ
-  
-- **ತಿದ್ದುಪಡಿ ಬೇಕಾದರೆ:**
-  "ಸರಿ ಸರ್ <break time="400ms"/> ದಯವಿಟ್ಟು ಸರಿಯಾದ ಮಾಹಿತಿ ತಿಳಿಸಿ" → ಮತ್ತೆ ಕೇಳಿ
-  
-- **ಹೆಚ್ಚು ಮಾಹಿತಿ ಸೇರಿಸಿದರೆ:**
-  "ಸರಿ ಸರ್ ,,ಅಂದ್ರೆ,, ನೋಟ್ ಮಾಡಿದ್ದೇನೆ" → ಅಪ್‌ಡೇಟ್ ಮಾಡಿ
-
----
-
-## 5. ಸಂಪರ್ಕ ವಿವರಗಳು (Contact Details)
-
-**ರಾಜ್ ಕೇಳುತ್ತಾನೆ:**
-"ಸರ್ <break time="400ms"/> ನಮ್ಮ ಟೀಮ್ ನಿಮ್ಮನ್ನು ಸಂಪರ್ಕಿಸಲು ನಿಮ್ಮ ಫೋನ್ ಸಂಖ್ಯೆ ಖಚಿತಪಡಿಸಬಹುದೇ?"
-
-**ಆಯ್ಕೆಯ ಮಾಹಿತಿ:**
-"ಅಲ್ಲದೆ ನಿಮ್ಮ ವಾಟರ್ ಕನೆಕ್ಷನ್ ಸಂಖ್ಯೆ ಅಥವಾ ಮೀಟರ್ ಸಂಖ್ಯೆ ಇದೆಯೇ?"
-
----
-
-## 6. ಅಂತಿಮ ಮುಕ್ತಾಯ (Final Closing)
-
-**ರಾಜ್ ಹೇಳುತ್ತಾನೆ:**
-"ಧನ್ಯವಾದಗಳು ಸರ್ <break time="500ms"/> ನಿಮ್ಮ ದೂರು ತಿಳಿಸಿದ್ದಕ್ಕಾಗಿ. <break time="300ms"/> ನಿಮ್ಮ ಸಮಸ್ಯೆಯನ್ನು ನಾವು ಗಂಭೀರವಾಗಿ ಪರಿಗಣಿಸುತ್ತೇವೆ. 
-
-<break time="400ms"/> ನಮ್ಮ ಫೀಲ್ಡ್ ಎಂಜಿನಿಯರ್‌ಗಳು ಇಂದೇ ಅಥವಾ ನಾಳೆ ನಿಮ್ಮನ್ನು ಸಂಪರ್ಕಿಸುತ್ತಾರೆ. 
-
-<break time="300ms"/> ನಿಮ್ಮ ದೂರು ಸಂಖ್ಯೆ [COMPLAINT_ID] ಅನ್ನು ನೋಟ್ ಮಾಡಿಕೊಳ್ಳಿ.
-
-<break time="500ms"/> ಒಳ್ಳೆಯ ದಿನವಾಗಲಿ ಸರ್. ನಮಸ್ಕಾರ."
-
----
-
-## 7. ಕಷ್ಟಕರ ಪರಿಸ್ಥಿತಿಗಳು (Handling Difficult Situations)
-
-### ಕೋಪಗೊಂಡ ಗ್ರಾಹಕ:
-"ಸರ್ <break time="400ms"/> ನಿಮ್ಮ ಕೋಪ ಅರ್ಥವಾಗುತ್ತದೆ. ನೀರು ಮೂಲಭೂತ ಅವಶ್ಯಕತೆ. ನಾವು ಈ ಸಮಸ್ಯೆಯನ್ನು ಬೇಗ ಬಗೆಹರಿಸುತ್ತೇವೆ."
-
-### ಹಿಂದಿನ ದೂರುಗಳ ಬಗ್ಗೆ:
-"ಸರ್ <break time="300ms"/> ಹಿಂದಿನ ದೂರಿನ ಸಂಖ್ಯೆ ತಿಳಿದಿದೆಯೇ? ಇಲ್ಲದಿದ್ದರೆ ಹೊಸ ದೂರು ದಾಖಲಿಸುತ್ತೇವೆ."
-
-### ತಾಂತ್ರಿಕ ಪ್ರಶ್ನೆಗಳು:
-"ಸರ್ <break time="400ms"/> ವಿವರವಾದ ತಾಂತ್ರಿಕ ಮಾಹಿತಿಗಾಗಿ ನಮ್ಮ ಇಂಜಿನಿಯರ್ ನಿಮ್ಮನ್ನು ಸಂಪರ್ಕಿಸುತ್ತಾರೆ."
-
-### ತುರ್ತು ಪರಿಸ್ಥಿತಿ:
-"ಸರ್ <break time="300ms"/> ಇದು ತುರ್ತು ಪರಿಸ್ಥಿತಿ ಎಂದು ಮಾರ್ಕ್ ಮಾಡುತ್ತೇನೆ. ೨೪ ಗಂಟೆಯೊಳಗೆ ನಮ್ಮ ಟೀಮ್ ಆಕ್ಷನ್ ತೆಗೆದುಕೊಳ್ಳುತ್ತದೆ."
-
----
-
-## 8. ಹೆಚ್ಚುವರಿ ಮಾಹಿತಿ ಬೇಸ್ (Additional Knowledge Base)
-
-### ಸಾಮಾನ್ಯ ನೀರಿನ ಸಮಸ್ಯೆಗಳು:
-- **ನೀರು ಬರುತ್ತಿಲ್ಲ**: "ಪೈಪ್‌ಲೈನ್ ಸಮಸ್ಯೆ ಅಥವಾ ಟ್ಯಾಂಕ್ ಮೇಂಟಿನೆನ್ಸ್ ಆಗಿರಬಹುದು"
-- **ಕೊಳಕು ನೀರು**: "ವಾಟರ್ ಟೆಸ್ಟಿಂಗ್ ಟೀಮ್ ಕಳುಹಿಸುತ್ತೇವೆ"
-- **ಕಡಿಮೆ ಪ್ರೆಶರ್**: "ಪಂಪ್ ಮತ್ತು ಪೈಪ್‌ಲೈನ್ ಚೆಕ್ ಮಾಡುತ್ತೇವೆ"
-- **ಬಿಲ್‌ನ ಸಮಸ್ಯೆ**: "ಬಿಲ್ಲಿಂಗ್ ವಿಭಾಗಕ್ಕೆ ಫಾರ್ವರ್ಡ್ ಮಾಡುತ್ತೇವೆ"
+# Setup logging
+load_dotenv()
+logger.remove(0)
+logger.add(sys.stderr, level="DEBUG")
 
-### ಪ್ರತಿಕ್ರಿಯೆ ಸಮಯ:
-- **ತುರ್ತು**: "೨೪ ಗಂಟೆಯೊಳಗೆ"
-- **ಸಾಮಾನ್ಯ**: "೨-೩ ದಿನಗಳಲ್ಲಿ"
-- **ಕಡಿಮೆ ಆದ್ಯತೆ**: "೧ ವಾರದೊಳಗೆ"
+# "cpu" runs the tiny Kannada model on cheap CPU replicas, int8 by default
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cuda")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE") or default_compute_type(WHISPER_DEVICE)
+
+# The Whisper model is resolved from the local cache, loaded and warmed up in
+# the background (started from the app lifespan), so importing this module is cheap.
+whisper_warmup = ModelWarmup(
+    repo_id=os.getenv("WHISPER_REPO_ID", "elprofessor67/faster-whisper-kannada-tiny"),
+    device=WHISPER_DEVICE,
+    compute_type=WHISPER_COMPUTE_TYPE,
+    language="kn",
+    token=os.environ.get("HF_TOKEN", None),
+    cache_dir=os.getenv("MODEL_CACHE_DIR"),
+)
+# Decoded PCM for the script's fixed lines, shared by all calls
+TTS_VOICE_ID = "Female1"
+TTS_LANGUAGE = Language.KN
+# Codecs the SIP leg offers; Twilio sends phone calls as G.711 (8 kHz)
+SIP_CODECS = os.getenv("SIP_CODECS", "PCMU").split(",")
+# Calls run at the rate of the phone line, so TTS audio and the pre-rendered
+# phrases are rendered at it too
+CALL_AUDIO = negotiate_call_audio(SIP_CODECS)
+TTS_SAMPLE_RATE = CALL_AUDIO.sample_rate
+TTS_BASE_URL = os.getenv("TTS_BASE_URL", "https://tts.bhashini.ai/v1")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+# Words the caller must say before the bot stops talking
+MIN_INTERRUPTION_WORDS = 2
+
+tts_cache = TTSPhraseCache(
+    max_bytes=int(os.getenv("TTS_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    disk_dir=os.getenv("TTS_CACHE_DIR"),
+)
+
+
+def tts_fallback_voice(name: str) -> Optional[FallbackVoice]:
+    """The voice used when Bhashini fails: "espeak", "groq" or "none"."""
+    if name == "espeak":
+        return EspeakVoice(voice="kn")
+    if name == "groq":
+        # PlayAI has no Kannada voice
+        return GroqSpeechVoice(api_key=os.getenv("GROQ_API_KEY"), base_url=GROQ_BASE_URL)
+    return None
+
+
+# Hedge slow Bhashini requests and speak with a fallback voice when it is
+# down; shared by all calls, since the endpoint's health is
+tts_failover = TTSFailover(
+    name="bhasni",
+    fallback=tts_fallback_voice(os.getenv("TTS_FALLBACK", "espeak")),
+    first_byte_timeout_s=float(os.getenv("TTS_FIRST_BYTE_TIMEOUT_S", "4")),
+    hedging=os.getenv("TTS_HEDGING", "1") == "1",
+)
+
+def llm_endpoints() -> List[LLMEndpoint]:
+    """Groq, and the OpenAI-compatible endpoint at LLM_HEDGE_BASE_URL if set."""
+    endpoints = [
+        LLMEndpoint(
+            name="groq", base_url=GROQ_BASE_URL, api_key=os.getenv("GROQ_API_KEY"), model=LLM_MODEL
+        )
+    ]
+    hedge_base_url = os.getenv("LLM_HEDGE_BASE_URL")
+    if hedge_base_url:
+        endpoints.append(
+            LLMEndpoint(
+                name=os.getenv("LLM_HEDGE_NAME", "hedge"),
+                base_url=hedge_base_url,
+                api_key=os.getenv("LLM_HEDGE_API_KEY") or os.getenv("GROQ_API_KEY"),
+                model=os.getenv("LLM_HEDGE_MODEL", LLM_MODEL),
+            )
+        )
+    return endpoints
 
----
 
-## 9. ಮುಖ್ಯ ವೈಶಿಷ್ಟ್ಯಗಳು (Key Features)
+# Send completions to the endpoint with the best recent time to first token
+# and hedge slow ones to the next; shared by all calls, like the endpoints
+llm_router = LLMRouter(
+    llm_endpoints(),
+    first_token_timeout_s=float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT_S", "5")),
+    hedging=os.getenv("LLM_HEDGING", "1") == "1",
+)
 
-### ನಡವಳಿಕೆ ಮಾರ್ಗದರ್ಶಿ:
-- **ಸ್ವರ**: ಮೃದು, ತಾಳ್ಮೆಯುಳ್ಳ, ಮತ್ತು ಸಹಾಯಕಾರಿ
-- **ವೇಗ**: ಮಧ್ಯಮ ವೇಗದಲ್ಲಿ ಮಾತನಾಡಿ
-- **ಸಹಾನುಭೂತಿ**: ನೀರಿನ ಸಮಸ್ಯೆಗಳ ಗಂಭೀರತೆಯನ್ನು ಅರ್ಥಮಾಡಿಕೊಳ್ಳಿ
-- **ಪ್ರಾಮಾಣಿಕತೆ**: ಸ್ಪಷ್ಟವಾದ ಸಮಯದ ಚೌಕಟ್ಟುಗಳನ್ನು ನೀಡಿ
+# The opening greeting as PCM, played as soon as the caller joins
+greeting_audio = GreetingAudio(
+    texts=GREETINGS,
+    voices=os.getenv("GREETING_VOICES", TTS_VOICE_ID).split(","),
+    sample_rate=TTS_SAMPLE_RATE,
+)
 
-### ಡಾಕ್ಯುಮೆಂಟೇಶನ್ ಅವಶ್ಯಕತೆಗಳು:
-- ದೂರುದಾರನ ಹೆಸರು ಮತ್ತು ಸಂಪರ್ಕ ವಿವರಗಳು
-- ನಿಖರವಾದ ವಿಳಾಸ ಮತ್ತು ವಾರ್ಡ್ ಸಂಖ್ಯೆ
-- ಸಮಸ್ಯೆಯ ವಿವರವಾದ ವಿವರಣೆ
-- ಸಮಯಾವಧಿ ಮತ್ತು ತೀವ್ರತೆಯ ಮಟ್ಟ
-- ಅನುಸರಣೆಯ ಆದ್ಯತೆ ಮಟ್ಟ
 
-### ಗುಣಮಟ್ಟ ನಿಯಂತ್ರಣ:
-- **GOLDEN RULE**: ಎಲ್ಲಾ ಅಗತ್ಯ ಮಾಹಿತಿ ಸಂಗ್ರಹಿಸುವವರೆಗೆ ಕರೆ ಮುಕ್ತಾಯಗೊಳಿಸಬೇಡಿ
-- ದೂರು ಪುನರಾವರ್ತನೆ ಕಡ್ಡಾಯ
-- ವೃತ್ತಿಪರ ಮತ್ತು ಸಹಾನುಭೂತಿಯ ಸ್ವರ ಕಾಯ್ದುಕೊಳ್ಳಿ
-- ಸ್ಪಷ್ಟ ಫಾಲೋ-ಅಪ್ ಕ್ರಿಯೆಗಳನ್ನು ತಿಳಿಸಿ
+async def render_greetings() -> None:
+    """Synthesize the opening greeting for every language and voice."""
+    await greeting_audio.render(http_pool.session(TTS_BASE_URL), base_url=TTS_BASE_URL)
 
----
 
-**ಟಿಪ್ಪಣಿ**: ಈ ಸ್ಕ್ರಿಪ್ಟ್‌ನಿಂದ ವಿಚಲನ ಮಾಡಬೇಡಿ. ಎಲ್ಲಾ ದೂರುಗಳನ್ನು ಗಂಭೀರವಾಗಿ ಪರಿಗಣಿಸಿ ಮತ್ತು ಪ್ರತಿ ನಾಗರಿಕರಿಗೆ ಗುಣಮಟ್ಟದ ಸೇವೆ ಒದಗಿಸಿ.
+async def prerender_script_phrases() -> None:
+    """Synthesize the fixed lines of the script into the TTS cache."""
+    phrases = extract_script_phrases(prompt)
+    # Sentences of the scripted turns that don't depend on the conversation
+    for turn in SCRIPT_TURNS:
+        phrases += [
+            s for s in split_sentences(turn.template) if "{" not in s and s not in phrases
+        ]
 
-"""
+    await prerender_phrases(
+        tts_cache,
+        http_pool.session(TTS_BASE_URL),
+        phrases,
+        voice_id=TTS_VOICE_ID,
+        language=TTS_LANGUAGE,
+        sample_rate=TTS_SAMPLE_RATE,
+        base_url=TTS_BASE_URL,
+    )
 
 
-# Setup logging
-load_dotenv()
-logger.remove(0)
-logger.add(sys.stderr, level="DEBUG")
+def call_transport_params(
+    params_cls: Type[TransportParams] = DailyParams,
+    *,
+    call_id: Optional[str] = None,
+    inference: Optional[InferenceClient] = None,
+    **kwargs,
+) -> TransportParams:
+    """Audio and VAD settings of a call, for Daily or a stand-in transport.
 
-model_path = snapshot_download(
-        repo_id="elprofessor67/faster-whisper-kannada-tiny",
-        local_files_only=False,
-        force_download=True,
-        token=os.environ.get("HF_TOKEN", None),
+    Close the VAD analyzer when the call ends.
+    """
+    # Infer through the process-wide VAD model, batched with other calls; in
+    # a call worker that model is in the inference server
+    if inference:
+        vad_analyzer = RemoteVADAnalyzer(client=inference, call_id=call_id)
+    else:
+        vad_analyzer = SharedSileroVADAnalyzer(call_id=call_id)
+    return params_cls(
+        audio_in_enabled=True,
+        audio_out_enabled=True,
+        vad_enabled=True,
+        vad_analyzer=vad_analyzer,
+        vad_audio_passthrough=True,
+        **kwargs,
     )
-# Initialize Twilio client
-twilio_client = Client(os.getenv("TWILIO_ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"))
-
 
 
-async def run_bot(room_url: str, token: str, call_id: str, sip_uri: str) -> None:
-    """Run the voice bot with the given parameters.
+def build_bot_task(
+    transport: BaseTransport,
+    call_id: str,
+    model_path: str,
+    *,
+    audio_format: CallAudioFormat = CALL_AUDIO,
+    turn_metrics: Optional[LatencyMetrics] = None,
+    call: Optional[CallRecord] = None,
+    inference: Optional[InferenceClient] = None,
+) -> Tuple[PipelineTask, Callable[[], Awaitable[None]]]:
+    """Build the pipeline of one call on ``transport``.
 
     Args:
-        room_url: The Daily room URL
-        token: The Daily room token
-        call_id: The Twilio call ID
-        sip_uri: The Daily SIP URI for forwarding the call
+        transport: The call's transport, Daily or a stand-in.
+        call_id: The call ID, used in logs and latency traces.
+        model_path: Local path of the warm Whisper model.
+        audio_format: The call's negotiated audio format. The pipeline
+            receives and sends audio at its sample rate.
+        turn_metrics: Where the turn latencies are recorded. Defaults to the
+            process-wide histograms.
+        call: The call's supervisor record; the pipeline's memory and
+            objects are reported and watched through it.
+        inference: The call worker's inference server connection; Whisper
+            runs there instead of in this process.
+
+    Returns:
+        The pipeline task and a coroutine function that starts the
+        conversation once the caller is there.
     """
-    logger.info(f"Starting bot with room: {room_url}")
-    logger.info(f"SIP endpoint: {sip_uri}")
-
-    call_already_forwarded = False
-
-    # Setup the Daily transport
-    transport = DailyTransport(
-        room_url,
-        token,
-        "Phone Bot",
-        params = DailyParams(
-            audio_in_enabled=True,
-            audio_out_enabled=True,
-            vad_enabled=True,
-            vad_analyzer=SileroVADAnalyzer(),
-            vad_audio_passthrough=True,
-            allow_interruptions=True,
-            interruption_strategies=[
-                MinWordsInterruptionStrategy(min_words=2)
-            ]
-        ),
-    )
-
-    stt = WhisperSTTService(
+    # Borrow the process-wide model instead of loading a copy for every call
+    stt = SharedWhisperSTTService(
             model=model_path,
             language="kn",
-            device="cuda",
+            device=WHISPER_DEVICE,
+            compute_type=WHISPER_COMPUTE_TYPE,
             no_speech_prob=0.4,
+            # Transcribe as soon as the caller pauses so the LLM can start
+            # before the VAD declares the end of the turn (0 disables)
+            speculative_pause_ms=int(os.getenv("SPECULATIVE_PAUSE_MS", "300")) or None,
+            # Decode while the caller is talking and push stable partial
+            # transcripts, so only the tail is left when they stop (0 disables)
+            streaming_interval_ms=int(os.getenv("STT_STREAMING_INTERVAL_MS", "600")) or None,
+            inference=inference,
         )
+
+    # Interrupt the bot on partial transcripts instead of waiting for the
+    # caller to finish
+    partial_interruption = PartialTranscriptInterruption(
+        strategies=[MinWordsInterruptionStrategy(min_words=MIN_INTERRUPTION_WORDS)]
+    )
     
-    llm = GroqLLMService(
+    llm = RoutedGroqLLMService(
+        router=llm_router,
         api_key=os.getenv("GROQ_API_KEY"),
-        model="llama-3.1-8b-instant"
+        base_url=GROQ_BASE_URL,
+        model=LLM_MODEL,
     )
 
 
@@ -290,12 +258,21 @@ async def run_bot(room_url: str, token: str, call_id: str, sip_uri: str) -> None
     # )
 
 
-    session = aiohttp.ClientSession()
+    # Borrow a pooled session: its connections are already open and are
+    # reused across calls
     tts = BhasniTTSService(
-        voice_id="Female1",
-        aiohttp_session=session,
+        voice_id=TTS_VOICE_ID,
+        aiohttp_session=http_pool.session(TTS_BASE_URL),
+        base_url=TTS_BASE_URL,
+        sample_rate=audio_format.sample_rate,
+        phrase_cache=tts_cache,
+        # Start playing while the MP3 is still downloading
+        streaming=True,
+        # Request the next sentences of a reply while the current one plays
+        pipeline_depth=int(os.getenv("TTS_PIPELINE_DEPTH", "3")),
+        failover=tts_failover,
         params=BhasniTTSService.InputParams(
-            language=Language.KN,
+            language=TTS_LANGUAGE,
         )
     )
 
@@ -311,12 +288,46 @@ async def run_bot(room_url: str, token: str, call_id: str, sip_uri: str) -> None
     context = OpenAILLMContext(messages)
     context_aggregator = llm.create_context_aggregator(context)
 
+    # Answer the fixed turns of the script (greeting, read-back, closing)
+    # directly; only free-form turns go to the LLM
+    complaint_id = " ".join(str(random.randint(0, 9)) for _ in range(6))
+    script_turns = ScriptTurnEngine(
+        turns=SCRIPT_TURNS,
+        stages=STAGES,
+        fields=COMPLAINT_FIELDS,
+        values=lambda: {"complaint_id": complaint_id},
+    )
+
+    # Send the LLM only the script sections for the current stage and a
+    # summary of older turns, instead of the full prompt and transcript
+    stage_context = StageContextProcessor(
+        prompt=prompt,
+        stages=STAGES,
+        fields=COMPLAINT_FIELDS,
+        core_sections=CORE_SECTIONS,
+    )
+
+    # Start the LLM on the tentative transcript; the reply is used if the
+    # final transcript matches and dropped if the caller keeps talking
+    speculative_llm = SpeculativeLLMProcessor(
+        llm=llm,
+        context=context,
+        prepare_messages=lambda messages: stage_context.build_messages(messages)[0],
+        skip=lambda messages: script_turns.match(messages) is not None,
+        # Optionally synthesize the first sentence of the reply too
+        prefetch_tts=tts.prefetch if os.getenv("SPECULATIVE_TTS") == "1" else None,
+    )
+
     # Build the pipeline
     pipeline = Pipeline(
         [
             transport.input(),  
             stt, 
+            partial_interruption,
             context_aggregator.user(),
+            script_turns,
+            stage_context,
+            speculative_llm,
             llm,  
             tts,  
             transport.output(),
@@ -328,18 +339,98 @@ async def run_bot(room_url: str, token: str, call_id: str, sip_uri: str) -> None
     task = PipelineTask(
         pipeline,
         params=PipelineParams(
+            # Nothing is resampled between the phone line and the services
+            audio_in_sample_rate=audio_format.sample_rate,
+            audio_out_sample_rate=audio_format.sample_rate,
+            # Interruptions are configured on the pipeline; the transport
+            # params ignore them
+            allow_interruptions=True,
+            interruption_strategies=[
+                MinWordsInterruptionStrategy(min_words=MIN_INTERRUPTION_WORDS)
+            ],
             enable_metrics=True,
             enable_usage_metrics=True,
         ),
+        # Trace each turn from the end of the user's speech to the bot's audio
+        observers=[TurnLatencyObserver(call_id=call_id, metrics=turn_metrics)],
     )
 
-    
+    if call:
+        call.add_memory_probe("stt_audio", lambda: stt.buffered_audio_bytes)
+        call.add_memory_probe(
+            "context",
+            lambda: sum(len(str(m.get("content", "")).encode()) for m in context.get_messages()),
+        )
+        call.attach("pipeline_task", task)
+        call.attach("stt", stt)
+        call.attach("llm", llm)
+        call.attach("tts", tts)
+
+    async def start_conversation():
+        # Play the pre-rendered greeting right away; it is recorded in the
+        # context as the bot's first turn. Generate it if it isn't rendered.
+        if not await greeting_audio.play(transport.output(), TTS_LANGUAGE, TTS_VOICE_ID):
+            await task.queue_frames([context_aggregator.user().get_context_frame()])
+
+    return task, start_conversation
+
+
+async def run_bot(
+    room_url: str,
+    token: str,
+    call_id: str,
+    sip_uri: str,
+    call: Optional[CallRecord] = None,
+    inference: Optional[InferenceClient] = None,
+) -> None:
+    """Run the voice bot with the given parameters.
+
+    Args:
+        room_url: The Daily room URL
+        token: The Daily room token
+        call_id: The Twilio call ID
+        sip_uri: The Daily SIP URI for forwarding the call
+        call: The call's supervisor record, if the call is supervised
+        inference: The inference server connection, when running in a call
+            worker
+    """
+    logger.info(f"Starting bot with room: {room_url}")
+    logger.info(f"SIP endpoint: {sip_uri}")
+
+    call_already_forwarded = False
+
+    # Daily doesn't report the codec of the SIP leg, so it is configured
+    audio_format = negotiate_call_audio(SIP_CODECS)
+    logger.info(f"Call audio: {audio_format.codec} at {audio_format.sample_rate} Hz")
+
+    if inference:
+        # The inference server loaded the model before the worker started
+        model_path = inference.model_path
+    else:
+        # Normally already done: the replica only reports ready once the model is warm
+        model_path = await whisper_warmup.wait_ready()
+
+    # Setup the Daily transport
+    transport_params = call_transport_params(call_id=call_id, inference=inference)
+    transport = DailyTransport(
+        room_url,
+        token,
+        "Phone Bot",
+        params=transport_params,
+    )
+
+    task, start_conversation = build_bot_task(
+        transport, call_id, model_path, audio_format=audio_format, call=call, inference=inference
+    )
+    if call:
+        call.attach("transport", transport)
+
     # Handle participant joining
     @transport.event_handler("on_first_participant_joined")
     async def on_first_participant_joined(transport, participant):
         logger.info(f"First participant joined: {participant['id']}")
         await transport.capture_participant_transcription(participant["id"])
-        await task.queue_frames([context_aggregator.user().get_context_frame()])
+        await start_conversation()
 
     # Handle participant leaving
     @transport.event_handler("on_participant_left")
@@ -357,17 +448,17 @@ async def run_bot(room_url: str, token: str, call_id: str, sip_uri: str) -> None
         if call_already_forwarded:
             logger.warning("Call already forwarded, ignoring this event.")
             return
+        # Set before awaiting so a concurrent event doesn't forward it again
+        call_already_forwarded = True
 
         logger.info(f"Forwarding call {call_id} to {sip_uri}")
 
         try:
             # Update the Twilio call with TwiML to forward to the Daily SIP endpoint
-            twilio_client.calls(call_id).update(
-                twiml=f"<Response><Dial><Sip>{sip_uri}</Sip></Dial></Response>"
-            )
-            logger.info("Call forwarded successfully")
-            call_already_forwarded = True
+            elapsed = await twilio_forwarder.forward(call_id, sip_uri)
+            logger.info(f"Call forwarded successfully in {elapsed * 1000:.0f}ms")
         except Exception as e:
+            call_already_forwarded = False
             logger.error(f"Failed to forward call: {str(e)}")
             raise
 
@@ -391,5 +482,9 @@ async def run_bot(room_url: str, token: str, call_id: str, sip_uri: str) -> None
         logger.warning(f"Dial-in warning: {data}")
 
     # Run the pipeline
-    runner = PipelineRunner()
-    await runner.run(task)
\ No newline at end of file
+    # Signals are the server's: it drains the calls on shutdown
+    runner = PipelineRunner(handle_sigint=False)
+    try:
+        await runner.run(task)
+    finally:
+        transport_params.vad_analyzer.close()
\ No newline at end of file
@@ -1,24 +1,93 @@
 """Webhook server to handle Twilio calls and start the voice bot."""
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import PlainTextResponse
-from utils.daily_helpers import create_sip_room
-from bot import run_bot
+from fastapi.responses import PlainTextResponse, Response
+from bot import (
+    TTS_BASE_URL,
+    greeting_audio,
+    llm_router,
+    prerender_script_phrases,
+    render_greetings,
+    run_bot,
+    tts_cache,
+    tts_failover,
+    whisper_warmup,
+)
+from utils.admission import admission
+from utils.call_supervisor import call_supervisor
+from utils.call_workers import call_workers
+from utils.cpu_inference import parse_cpu_list, pin_to_cores
+from utils.http_pool import http_pool
+from utils.latency_tracing import latency_metrics
+from utils.mp3_stream import decoder_limit
+from utils.room_pool import room_pool
+from utils.speculation import speculation_metrics
+from utils.stt_scheduler import stt_scheduler
+from utils.transcode_pool import transcode_pool
+from utils.twilio_forwarding import twilio_forwarder
+from utils.vad_engine import vad_engine
+from utils.whisper_registry import model_registry
 import asyncio
+import os
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import aiohttp
 from fastapi.responses import JSONResponse
 # Load environment variables
 load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create aiohttp session to be used for Daily API calls
-    app.state.session = aiohttp.ClientSession()
+    # Keep this process on its own cores, before the model threads start
+    pin_to_cores(parse_cpu_list(os.getenv("CPU_AFFINITY")))
+    if call_workers.enabled:
+        # Calls run in worker processes, which render their own greeting and
+        # phrases; the models are loaded by the inference server
+        startup_tasks = [asyncio.create_task(call_workers.start())]
+    else:
+        # Load and warm the Whisper model without blocking the server startup
+        whisper_warmup.start()
+        # Load the VAD model all calls share before the first call needs it
+        vad_engine.load()
+        startup_tasks = [
+            # Render the script's fixed lines so they play without a TTS round trip
+            asyncio.create_task(prerender_script_phrases()),
+            # Render the opening greeting so callers hear it the moment they join
+            asyncio.create_task(render_greetings()),
+            # Open connections to the TTS API before the first call needs them
+            asyncio.create_task(
+                http_pool.warm_up(
+                    TTS_BASE_URL, connections=int(os.getenv("TTS_WARM_CONNECTIONS", "4"))
+                )
+            ),
+        ]
+    # Keep SIP rooms and bot tokens ready for incoming calls
+    room_pool_task = asyncio.create_task(room_pool.run())
+    # Unload Whisper models that no call has used for a while
+    eviction_task = asyncio.create_task(model_registry.run_eviction_loop())
+    # Sample event-loop lag and GPU memory for admission control
+    admission_task = asyncio.create_task(admission.run())
+    # Flag calls and sockets that are never cleaned up
+    supervisor_task = asyncio.create_task(call_supervisor.run())
     yield
-    # Close session when shutting down
-    await app.state.session.close()
+    # Let the live calls finish before the replica goes away; new calls go
+    # to other replicas meanwhile
+    admission.start_draining()
+    await call_supervisor.drain(float(os.getenv("DRAIN_TIMEOUT_S", "25")))
+    supervisor_task.cancel()
+    admission_task.cancel()
+    eviction_task.cancel()
+    room_pool_task.cancel()
+    for task in startup_tasks:
+        task.cancel()
+    if call_workers.enabled:
+        await call_workers.stop()
+    await stt_scheduler.stop()
+    vad_engine.stop()
+    transcode_pool.shutdown()
+    # Don't leave unused rooms behind
+    await room_pool.close()
+    # Close the pooled connections when shutting down
+    await http_pool.close()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -50,9 +119,20 @@ async def handle_call(request: Request):
         caller_phone = str(data.get("From", "unknown-caller"))
         print(f"Processing call with ID: {call_sid} from {caller_phone}")
 
-        # Create a Daily room with SIP capabilities
+        # Don't take the call when the replica is saturated: hold, reject or redirect it
+        attempt = int(request.query_params.get("attempt", "0"))
+        twiml = admission.admit(attempt)
+        if twiml:
+            print(f"Not admitting call {call_sid}: replica saturated")
+            return Response(
+                content=twiml,
+                media_type="application/xml",
+                headers={"X-Replica-Saturation": str(admission.saturation())},
+            )
+
+        # Take a ready Daily room with SIP capabilities, or create one
         try:
-            room_details = await create_sip_room(request.app.state.session, caller_phone)
+            room_details = await room_pool.get_room(caller_phone)
         except Exception as e:
             print(f"Error creating Daily room: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to create Daily room: {str(e)}")
@@ -67,8 +147,15 @@ async def handle_call(request: Request):
             raise HTTPException(status_code=500, detail="No SIP endpoint provided by Daily")
 
         try:
-            
-            asyncio.create_task(run_bot(room_url, token, call_sid, sip_endpoint))
+            # Supervised, so the call is listed, drained on shutdown and
+            # checked for leaks once it ends
+            if call_workers.enabled:
+                # Handed to a worker process; this process only tracks it
+                run = lambda record: call_workers.run_call(room_url, token, call_sid, sip_endpoint)
+            else:
+                run = lambda record: run_bot(room_url, token, call_sid, sip_endpoint, call=record)
+            call = call_supervisor.start(call_sid, run)
+            admission.track_call(call.task)
             print(f"Started async bot for call: {call_sid}")
 
         except Exception as e:
@@ -82,7 +169,8 @@ async def handle_call(request: Request):
                 "call_sid": call_sid,
                 "sip_endpoint": sip_endpoint,
                 "room_url": room_url
-            }
+            },
+            headers={"X-Replica-Saturation": str(admission.saturation())},
         )
 
     except HTTPException:
@@ -96,3 +184,54 @@ async def handle_call(request: Request):
 async def health_check():
     """Simple health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: only route calls once the models are loaded and warm."""
+    if call_workers.enabled:
+        status = call_workers.stats()
+        if not call_workers.ready:
+            return JSONResponse(status_code=503, content={"status": "not ready", "workers": status})
+        return {"status": "ready", "workers": status}
+    status = whisper_warmup.status()
+    if not whisper_warmup.ready:
+        return JSONResponse(status_code=503, content={"status": "not ready", "whisper": status})
+    return {"status": "ready", "whisper": status}
+
+
+@app.get("/saturation")
+async def saturation():
+    """Load relative to capacity, for the autoscaler: 1.0 means saturated."""
+    return {"saturation": admission.saturation(), "signals": admission.signals()}
+
+
+@app.get("/calls")
+async def calls():
+    """The live calls with their age and memory, and leak checks."""
+    return {"calls": call_supervisor.calls(), **call_supervisor.stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime statistics for the shared inference components."""
+    return {
+        "turn_latency": latency_metrics.stats(),
+        "speculation": speculation_metrics.stats(),
+        "llm_router": llm_router.stats(),
+        "admission": admission.stats(),
+        "calls": call_supervisor.stats(),
+        "call_workers": call_workers.stats(),
+        "inference_server": await call_workers.inference_stats(),
+        "whisper_models": model_registry.stats(),
+        "stt_scheduler": stt_scheduler.stats(),
+        "vad": vad_engine.stats(),
+        "tts_cache": tts_cache.stats(),
+        "tts_failover": tts_failover.stats(),
+        "greeting": greeting_audio.stats(),
+        "transcode_pool": transcode_pool.stats(),
+        "mp3_decoders": decoder_limit.stats(),
+        "http_pool": http_pool.stats(),
+        "room_pool": room_pool.stats(),
+        "twilio_forwarding": twilio_forwarder.stats(),
+    }
@@ -0,0 +1,290 @@
+"""Capacity-aware admission control for incoming calls.
+
+Past a certain load, STT batches queue up on the GPU and the shared event
+loop falls behind, which makes every call on the replica slow rather than
+just the newest one. New calls are only admitted while the live load signals
+are below their limits; otherwise the call is held, rejected or redirected
+with TwiML. The same signals are combined into a saturation value that an
+autoscaler can scale on instead of raw request concurrency.
+"""
+
+import asyncio
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Set
+from xml.sax.saxutils import escape
+
+from loguru import logger
+
+from utils.call_workers import call_workers
+from utils.latency_tracing import LatencyHistogram
+from utils.stt_scheduler import stt_scheduler
+
+HOLD = "hold"
+REJECT = "reject"
+REDIRECT = "redirect"
+
+
+@lru_cache(maxsize=1)
+def _nvml_device():
+    try:
+        import pynvml
+    except ImportError:
+        return None
+    try:
+        pynvml.nvmlInit()
+    except pynvml.NVMLError:
+        return None
+    # NVML ignores CUDA_VISIBLE_DEVICES, so map it to the device Whisper runs on.
+    visible = os.getenv("CUDA_VISIBLE_DEVICES", "0").split(",")[0].strip()
+    if not visible:
+        return None
+    return pynvml.nvmlDeviceGetHandleByIndex(int(visible) if visible.isdigit() else 0)
+
+
+def gpu_memory_fraction() -> Optional[float]:
+    """Fraction of GPU memory in use, or None when there is no GPU.
+
+    Read through NVML rather than torch.cuda, which would create a CUDA
+    context, and take its memory, in every process that asks.
+    """
+    device = _nvml_device()
+    if device is None:
+        return None
+    import pynvml
+
+    memory = pynvml.nvmlDeviceGetMemoryInfo(device)
+    return memory.used / memory.total
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs a timer.
+
+    A coroutine sleeps for ``interval_s`` and records how much later than
+    requested it woke up. The lag is a direct measure of how long callbacks
+    (audio frames, STT results, TTS chunks) wait for the loop.
+
+    Args:
+        interval_s: Sampling interval.
+        smoothing: Weight of the newest sample in the moving average.
+        histogram: Also records every sample here, in milliseconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval_s: float = 0.1,
+        smoothing: float = 0.2,
+        histogram: Optional[LatencyHistogram] = None,
+    ):
+        self._interval_s = interval_s
+        self._smoothing = smoothing
+        self._histogram = histogram
+        self._lag_s = 0.0
+        self._max_lag_s = 0.0
+
+    @property
+    def lag_ms(self) -> float:
+        return 1000 * self._lag_s
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self._interval_s)
+            lag = max(0.0, loop.time() - start - self._interval_s)
+            self._lag_s += self._smoothing * (lag - self._lag_s)
+            self._max_lag_s = max(self._max_lag_s, lag)
+            if self._histogram:
+                self._histogram.observe(1000 * lag)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"lag_ms": round(self.lag_ms, 1), "max_lag_ms": round(1000 * self._max_lag_s, 1)}
+
+
+class AdmissionController:
+    """Decides whether a replica takes another call.
+
+    Each signal is divided by its limit; the largest ratio is the replica's
+    saturation. Calls are admitted while the saturation is below 1.
+
+    Args:
+        stt_queue_depth: Returns the number of utterances waiting for STT.
+        workers_loop_lag_ms: Returns the event-loop lag of the processes
+            the calls run in, when that is not this one. The larger of it and
+            this process's lag is the loop lag signal.
+        max_calls: Maximum number of concurrent calls.
+        max_stt_queue: Maximum STT queue depth.
+        max_loop_lag_ms: Maximum event-loop lag.
+        max_gpu_memory: Maximum fraction of GPU memory in use.
+        action: What to do with a call when saturated: "hold", "reject" or
+            "redirect".
+        overflow_url: Webhook the call is redirected to, for "redirect".
+            Held calls that are still not admitted are redirected there too,
+            or rejected when it is not set.
+        hold_s: How long a held call waits before it is retried.
+        max_holds: How many times a call is held before giving up.
+        gpu_poll_interval_s: How often GPU memory is sampled.
+    """
+
+    def __init__(
+        self,
+        *,
+        stt_queue_depth: Callable[[], int],
+        workers_loop_lag_ms: Optional[Callable[[], float]] = None,
+        max_calls: int = 20,
+        max_stt_queue: int = 16,
+        max_loop_lag_ms: float = 100.0,
+        max_gpu_memory: float = 0.9,
+        action: str = HOLD,
+        overflow_url: Optional[str] = None,
+        hold_s: int = 2,
+        max_holds: int = 3,
+        gpu_poll_interval_s: float = 2.0,
+    ):
+        if action not in (HOLD, REJECT, REDIRECT):
+            raise ValueError(f"Unknown admission action: {action}")
+        if action == REDIRECT and not overflow_url:
+            raise ValueError("The redirect admission action requires an overflow URL")
+
+        self._stt_queue_depth = stt_queue_depth
+        self._workers_loop_lag_ms = workers_loop_lag_ms
+        self._max_calls = max_calls
+        self._max_stt_queue = max_stt_queue
+        self._max_loop_lag_ms = max_loop_lag_ms
+        self._max_gpu_memory = max_gpu_memory
+        self._action = action
+        self._overflow_url = overflow_url
+        self._hold_s = hold_s
+        self._max_holds = max_holds
+        self._gpu_poll_interval_s = gpu_poll_interval_s
+
+        self.loop_lag = LoopLagMonitor()
+        self._gpu_memory: Optional[float] = None
+        self._calls: Set[asyncio.Task] = set()
+        self._draining = False
+
+        self._admitted = 0
+        self._held = 0
+        self._rejected = 0
+        self._redirected = 0
+
+    @property
+    def active_calls(self) -> int:
+        return len(self._calls)
+
+    async def run(self):
+        """Sample the load signals. Runs until cancelled."""
+        lag_task = asyncio.create_task(self.loop_lag.run())
+        try:
+            while True:
+                try:
+                    self._gpu_memory = await asyncio.to_thread(gpu_memory_fraction)
+                except Exception as e:
+                    logger.warning(f"Failed to read GPU memory usage: {e}")
+                await asyncio.sleep(self._gpu_poll_interval_s)
+        finally:
+            lag_task.cancel()
+
+    @property
+    def loop_lag_ms(self) -> float:
+        lag_ms = self.loop_lag.lag_ms
+        if self._workers_loop_lag_ms:
+            lag_ms = max(lag_ms, self._workers_loop_lag_ms())
+        return lag_ms
+
+    def start_draining(self):
+        """Admit no more calls: the replica is shutting down."""
+        self._draining = True
+
+    def signals(self) -> Dict[str, float]:
+        """Each load signal as a fraction of its limit."""
+        signals = {
+            "calls": self.active_calls / self._max_calls,
+            "stt_queue": self._stt_queue_depth() / self._max_stt_queue,
+            "loop_lag": self.loop_lag_ms / self._max_loop_lag_ms,
+        }
+        if self._gpu_memory is not None:
+            signals["gpu_memory"] = self._gpu_memory / self._max_gpu_memory
+        if self._draining:
+            # Saturated for good, so held calls are retried on other replicas.
+            signals["draining"] = 1.0
+        return signals
+
+    def saturation(self) -> float:
+        """Load of the replica relative to its limits; 1 means saturated."""
+        return round(max(self.signals().values()), 3)
+
+    def admit(self, attempt: int = 0) -> Optional[str]:
+        """Decide on a new call.
+
+        Args:
+            attempt: How many times this call was held already.
+
+        Returns:
+            None if the call is admitted, otherwise the TwiML to respond with.
+        """
+        signals = self.signals()
+        if max(signals.values()) < 1:
+            self._admitted += 1
+            return None
+
+        busiest = max(signals, key=signals.get)
+        logger.warning(f"Replica saturated ({busiest}: {signals[busiest]:.2f}), not admitting call")
+
+        action = self._action
+        if action == HOLD and attempt >= self._max_holds:
+            action = REDIRECT if self._overflow_url else REJECT
+
+        if action == HOLD:
+            self._held += 1
+            return (
+                f'<Response><Pause length="{self._hold_s}"/>'
+                f'<Redirect method="POST">/start?attempt={attempt + 1}</Redirect></Response>'
+            )
+        if action == REDIRECT:
+            self._redirected += 1
+            return f'<Response><Redirect method="POST">{escape(self._overflow_url)}</Redirect></Response>'
+        self._rejected += 1
+        if attempt:
+            # A held call has been answered, so it can only be hung up.
+            return "<Response><Hangup/></Response>"
+        return '<Response><Reject reason="busy"/></Response>'
+
+    def track_call(self, task: asyncio.Task):
+        """Count ``task`` as an active call until it finishes."""
+        self._calls.add(task)
+        task.add_done_callback(self._calls.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "saturation": self.saturation(),
+            "signals": {name: round(value, 3) for name, value in self.signals().items()},
+            "active_calls": self.active_calls,
+            "stt_queue_depth": self._stt_queue_depth(),
+            "gpu_memory": round(self._gpu_memory, 3) if self._gpu_memory is not None else None,
+            **self.loop_lag.stats(),
+            "workers_loop_lag_ms": round(self._workers_loop_lag_ms(), 1)
+            if self._workers_loop_lag_ms
+            else None,
+            "admitted": self._admitted,
+            "held": self._held,
+            "rejected": self._rejected,
+            "redirected": self._redirected,
+        }
+
+
+admission = AdmissionController(
+    # With call workers, STT is queued in the inference server and the calls'
+    # event loops run in the workers.
+    stt_queue_depth=lambda: (
+        call_workers.stt_queue_depth if call_workers.enabled else stt_scheduler.queue_depth
+    ),
+    workers_loop_lag_ms=lambda: call_workers.loop_lag_ms if call_workers.enabled else 0.0,
+    max_calls=int(os.getenv("ADMISSION_MAX_CALLS", "20")),
+    max_stt_queue=int(os.getenv("ADMISSION_MAX_STT_QUEUE", "16")),
+    max_loop_lag_ms=float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "100")),
+    max_gpu_memory=float(os.getenv("ADMISSION_MAX_GPU_MEMORY", "0.9")),
+    action=os.getenv("ADMISSION_ACTION", HOLD),
+    overflow_url=os.getenv("ADMISSION_OVERFLOW_URL"),
+)
@@ -0,0 +1,61 @@
+"""The audio format of a call, negotiated from its telephony leg.
+
+Phone calls reach the bot over SIP as G.711 at 8 kHz, but the pipeline ran
+at 16 kHz in and 24 kHz out. The caller's audio was upsampled to 16 kHz
+without gaining anything. TTS was rendered at 16 kHz, resampled to 24 kHz
+for the output, and downsampled to 8 kHz again on the SIP leg. Each call now
+runs at the rate its codec carries. VAD and TTS work at that rate, and only
+Whisper, which needs 16 kHz, resamples its input.
+"""
+
+from dataclasses import dataclass
+from typing import Sequence
+
+# Sample rates of the codecs a SIP leg may negotiate.
+CODEC_SAMPLE_RATES = {
+    "pcmu": 8000,
+    "pcma": 8000,
+    "g711": 8000,
+    "g729": 8000,
+    "gsm": 8000,
+    "g722": 16000,
+    "l16": 16000,
+    "opus": 16000,
+}
+# Rates the pipeline can run at: Silero VAD supports only these.
+PIPELINE_SAMPLE_RATES = (8000, 16000)
+
+
+@dataclass(frozen=True)
+class CallAudioFormat:
+    """Sample rate and codec of a call's audio, in and out."""
+
+    sample_rate: int
+    codec: str
+    num_channels: int = 1
+
+    @property
+    def narrowband(self) -> bool:
+        return self.sample_rate <= 8000
+
+
+# The caller's audio without the phone line, e.g. for local test callers.
+WIDEBAND = CallAudioFormat(sample_rate=16000, codec="l16")
+
+
+def negotiate_call_audio(codecs: Sequence[str]) -> CallAudioFormat:
+    """The format of a call whose telephony leg offers ``codecs``.
+
+    The first known codec wins, as in an SDP answer. Its rate is capped to
+    the rates the pipeline supports, since a wider codec carries no more
+    than 16 kHz of useful speech for Whisper.
+
+    Raises:
+        ValueError: If none of the codecs is known.
+    """
+    for codec in codecs:
+        rate = CODEC_SAMPLE_RATES.get(codec.strip().lower())
+        if rate:
+            rate = max(r for r in PIPELINE_SAMPLE_RATES if r <= rate)
+            return CallAudioFormat(sample_rate=rate, codec=codec.strip().lower())
+    raise ValueError(f"No supported codec among {list(codecs)}")
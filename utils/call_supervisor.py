@@ -0,0 +1,256 @@
+"""Registry of the live calls, graceful drain and leak detection.
+
+Calls were started as fire-and-forget tasks: nothing knew which calls were
+live, a replica stopped by the autoscaler dropped its calls mid-sentence,
+and a call whose pipeline or transport was never released went unnoticed.
+The supervisor owns every call's task, reports the live calls with their
+age and memory, lets running calls finish on shutdown, and flags calls
+that run far too long, objects that outlive their call, and sockets that
+stay open once the replica is idle.
+"""
+
+import asyncio
+import gc
+import os
+import time
+import weakref
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from loguru import logger
+
+
+def open_sockets() -> Optional[int]:
+    """Number of sockets this process has open, or None outside Linux."""
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return None
+    count = 0
+    for fd in fds:
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                count += 1
+        except OSError:
+            # Closed while listing.
+            continue
+    return count
+
+
+class CallRecord:
+    """A live call: its task and the resources it holds."""
+
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.task: Optional[asyncio.Task] = None
+        self.started_at = time.monotonic()
+        self.started_wall = time.time()
+        self.ended_at: Optional[float] = None
+        self.stuck = False
+        self._resources: Dict[str, weakref.ref] = {}
+        self._memory_probes: Dict[str, Callable[[], int]] = {}
+
+    @property
+    def age_s(self) -> float:
+        return (self.ended_at or time.monotonic()) - self.started_at
+
+    def attach(self, name: str, resource: Any):
+        """Watch ``resource``; it must be garbage once the call has ended."""
+        self._resources[name] = weakref.ref(resource)
+
+    def add_memory_probe(self, name: str, probe: Callable[[], int]):
+        """Count the bytes ``probe`` returns as memory held by the call."""
+        self._memory_probes[name] = probe
+
+    def memory_bytes(self) -> Dict[str, int]:
+        memory = {}
+        for name, probe in self._memory_probes.items():
+            try:
+                memory[name] = probe()
+            except Exception:
+                continue
+        return memory
+
+    def alive_resources(self) -> List[str]:
+        return [name for name, ref in self._resources.items() if ref() is not None]
+
+    def ended(self):
+        self.ended_at = time.monotonic()
+        # The probes reference the call's objects and would keep them alive.
+        self._memory_probes.clear()
+
+    def info(self) -> Dict[str, Any]:
+        memory = self.memory_bytes()
+        return {
+            "call_id": self.call_id,
+            "started_at": self.started_wall,
+            "age_s": round(self.age_s, 1),
+            "memory_kb": round(sum(memory.values()) / 1024, 1),
+            "memory_breakdown_kb": {name: round(size / 1024, 1) for name, size in memory.items()},
+            "stuck": self.stuck,
+        }
+
+
+class CallSupervisor:
+    """Runs every call as a supervised task.
+
+    Args:
+        max_call_duration_s: Calls running longer than this are flagged as
+            stuck.
+        leak_grace_s: How long after a call ended its resources may still
+            be alive, and how long the replica must be idle before open
+            sockets are compared with the idle baseline.
+        check_interval_s: How often leaks are checked.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_call_duration_s: float = 3600.0,
+        leak_grace_s: float = 60.0,
+        check_interval_s: float = 30.0,
+    ):
+        self._max_call_duration_s = max_call_duration_s
+        self._leak_grace_s = leak_grace_s
+        self._check_interval_s = check_interval_s
+
+        self._calls: Dict[str, CallRecord] = {}
+        self._ended: Deque[CallRecord] = deque()
+        self._last_call_ended: Optional[float] = None
+        self._idle_sockets: Optional[int] = None
+        self.draining = False
+
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._stuck = 0
+        self._leaked: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self._leaked_calls = 0
+        self._socket_growth = 0
+
+    @property
+    def active_calls(self) -> int:
+        return len(self._calls)
+
+    def start(self, call_id: str, run: Callable[[CallRecord], Awaitable[None]]) -> CallRecord:
+        """Run ``run(record)`` as the task of call ``call_id``.
+
+        Raises:
+            RuntimeError: If the supervisor is draining.
+        """
+        if self.draining:
+            raise RuntimeError("The replica is draining and takes no new calls")
+        record = CallRecord(call_id)
+        record.task = asyncio.create_task(run(record), name=f"call-{call_id}")
+        record.task.add_done_callback(lambda task: self._finished(record))
+        self._calls[call_id] = record
+        self._started += 1
+        return record
+
+    def _finished(self, record: CallRecord):
+        self._calls.pop(record.call_id, None)
+        record.ended()
+        self._ended.append(record)
+        self._last_call_ended = record.ended_at
+
+        task = record.task
+        if task.cancelled():
+            self._cancelled += 1
+        elif task.exception():
+            self._failed += 1
+            logger.error(f"Call {record.call_id} failed: {task.exception()!r}")
+        else:
+            self._completed += 1
+        # A failed task's traceback would keep the call's objects alive.
+        record.task = None
+        logger.info(f"Call {record.call_id} ended after {record.age_s:.0f}s")
+
+    async def drain(self, timeout_s: float):
+        """Stop taking calls and wait up to ``timeout_s`` for the live ones.
+
+        Calls still running after that are cancelled, so the pipelines can
+        still leave their rooms and release their resources.
+        """
+        self.draining = True
+        tasks = [record.task for record in self._calls.values()]
+        if not tasks:
+            return
+        logger.info(f"Draining {len(tasks)} calls (up to {timeout_s:.0f}s)")
+        _, pending = await asyncio.wait(tasks, timeout=timeout_s)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} calls still running after the drain timeout")
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending, timeout=5.0)
+
+    async def run(self):
+        """Check for stuck calls and leaks. Runs until cancelled."""
+        while True:
+            await asyncio.sleep(self._check_interval_s)
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning(f"Call leak check failed: {e}")
+
+    def check(self):
+        now = time.monotonic()
+        for record in self._calls.values():
+            if not record.stuck and record.age_s > self._max_call_duration_s:
+                record.stuck = True
+                self._stuck += 1
+                logger.warning(f"Call {record.call_id} has been running for {record.age_s:.0f}s")
+
+        due = []
+        while self._ended and now - self._ended[0].ended_at >= self._leak_grace_s:
+            due.append(self._ended.popleft())
+        if due:
+            # Reference cycles alone must not count as leaks.
+            gc.collect()
+        for record in due:
+            alive = record.alive_resources()
+            if alive:
+                self._leaked_calls += 1
+                self._leaked.append({"call_id": record.call_id, "resources": alive})
+                logger.warning(f"Call {record.call_id} ended but {', '.join(alive)} still alive")
+
+        # Pooled keep-alive connections close on their own when idle, so
+        # after a quiet period the sockets should be back to the baseline.
+        idle = not self._calls and (
+            self._last_call_ended is None or now - self._last_call_ended >= self._leak_grace_s
+        )
+        sockets = open_sockets()
+        if idle and sockets is not None:
+            if self._idle_sockets is None or sockets < self._idle_sockets:
+                self._idle_sockets = sockets
+            elif sockets > self._idle_sockets + self._socket_growth:
+                self._socket_growth = sockets - self._idle_sockets
+                logger.warning(
+                    f"{self._socket_growth} more sockets open than when the replica was "
+                    "last idle"
+                )
+
+    def calls(self) -> List[Dict[str, Any]]:
+        return [record.info() for record in self._calls.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active_calls": self.active_calls,
+            "draining": self.draining,
+            "started": self._started,
+            "completed": self._completed,
+            "failed": self._failed,
+            "cancelled": self._cancelled,
+            "stuck": self._stuck,
+            "leaked_calls": self._leaked_calls,
+            "recent_leaks": list(self._leaked),
+            "open_sockets": open_sockets(),
+            "idle_sockets": self._idle_sockets,
+            "socket_growth": self._socket_growth,
+        }
+
+
+call_supervisor = CallSupervisor(
+    max_call_duration_s=float(os.getenv("MAX_CALL_DURATION_S", "3600")),
+    leak_grace_s=float(os.getenv("CALL_LEAK_GRACE_S", "60")),
+)
@@ -0,0 +1,458 @@
+"""Calls spread over worker processes that share one inference server.
+
+In a single process every call's transport, VAD bookkeeping, STT
+post-processing, LLM streaming, JSON and logging share one GIL and one event
+loop, so a replica uses about one of its cores however many it has. With
+``CALL_WORKERS`` set, the web server only answers webhooks: each call is
+handed to the least busy of N worker processes, and the workers send their
+audio to one inference server process that owns the Whisper and VAD models.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from utils.cpu_inference import parse_cpu_list, pin_to_cores
+from utils.inference_server import (
+    DEFAULT_RING_BYTES,
+    InferenceChannel,
+    InferenceClient,
+    serve,
+)
+from utils.shm_ring import ShmRing
+
+
+class _Worker:
+    def __init__(self, index: int, process: multiprocessing.Process, conn: Connection):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.alive = True
+        self.calls: Dict[str, asyncio.Future] = {}
+        self.calls_started = 0
+        self.loop_lag_ms = 0.0
+
+
+class CallWorkerPool:
+    """Runs calls in worker processes next to a shared inference server.
+
+    ``start`` creates one channel per worker, and one for this process to
+    read the server's stats, then starts the inference server, waits until
+    its models are loaded, and starts the workers. Processes are spawned,
+    not forked, so no CUDA context or event loop is inherited.
+
+    The load of the calls is where they run, not here: the STT queue depth
+    is polled from the inference server and each worker reports its event
+    loop lag, so admission control can read them from this process.
+
+    A worker that dies ends its calls with an error and is not replaced.
+    If the inference server dies, every live call is ended, since none of
+    them can hear the caller any more, and the pool reports not ready.
+
+    Args:
+        num_workers: Number of call worker processes. 0 runs calls in this
+            process instead.
+        worker_cores: Cores the workers are pinned to, one per worker in
+            turn. Empty leaves them unpinned.
+        ring_bytes: Size of each channel's audio ring.
+        start_timeout_s: How long the inference server may take to load.
+        load_interval_s: How often the STT queue depth and the workers' loop
+            lag are sampled.
+    """
+
+    def __init__(
+        self,
+        *,
+        num_workers: int = 0,
+        worker_cores: Sequence[int] = (),
+        ring_bytes: int = DEFAULT_RING_BYTES,
+        start_timeout_s: float = 600.0,
+        load_interval_s: float = 1.0,
+    ):
+        self._num_workers = num_workers
+        self._worker_cores = list(worker_cores)
+        self._ring_bytes = ring_bytes
+        self._start_timeout_s = start_timeout_s
+        self._load_interval_s = load_interval_s
+
+        self._rings: List[ShmRing] = []
+        self._server: Optional[multiprocessing.Process] = None
+        self._inference: Optional[InferenceClient] = None
+        self._workers: List[_Worker] = []
+        self._poll_task: Optional[asyncio.Task] = None
+        self._stt_queue_depth = 0
+        self._ready = False
+        self._server_lost = False
+        self._error: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._num_workers > 0
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self._ready
+            and self._server_running
+            and any(worker.alive for worker in self._workers)
+        )
+
+    @property
+    def _server_running(self) -> bool:
+        # The sentinel fires before the process can be reaped, so is_alive()
+        # alone may still be True right after it died.
+        return (
+            self._server is not None
+            and not self._server_lost
+            and self._server.is_alive()
+        )
+
+    @property
+    def stt_queue_depth(self) -> int:
+        """Utterances waiting for STT in the inference server."""
+        return self._stt_queue_depth if self._server_running else 0
+
+    @property
+    def loop_lag_ms(self) -> float:
+        """Event-loop lag of the busiest worker."""
+        return max((worker.loop_lag_ms for worker in self._workers if worker.alive), default=0.0)
+
+    async def start(self):
+        context = multiprocessing.get_context("spawn")
+        server_channels, client_channels = [], []
+        for _ in range(self._num_workers + 1):
+            ring = ShmRing.create(self._ring_bytes)
+            self._rings.append(ring)
+            server_conn, client_conn = context.Pipe()
+            server_channels.append(InferenceChannel(server_conn, ring.name, self._ring_bytes))
+            client_channels.append(InferenceChannel(client_conn, ring.name, self._ring_bytes))
+
+        ready_recv, ready_send = context.Pipe(duplex=False)
+        self._server = context.Process(
+            target=serve, args=(server_channels, ready_send), name="inference-server"
+        )
+        self._server.start()
+        # The server's ends now live in the server; a closed pipe means it died.
+        ready_send.close()
+        for channel in server_channels:
+            channel.conn.close()
+
+        try:
+            if not await asyncio.to_thread(ready_recv.poll, self._start_timeout_s):
+                raise RuntimeError(f"Not ready after {self._start_timeout_s:.0f}s")
+            status, detail = ready_recv.recv()
+        except EOFError:
+            status, detail = "failed", f"exited with code {self._server.exitcode}"
+        except Exception as e:
+            status, detail = "failed", str(e)
+        finally:
+            ready_recv.close()
+        if status != "ready":
+            self._error = f"Inference server failed to start: {detail}"
+            logger.error(self._error)
+            return
+        model_path = detail
+
+        self._inference = InferenceClient(client_channels[0], model_path)
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self._server.sentinel, self._server_exited)
+        for index, channel in enumerate(client_channels[1:]):
+            commands, worker_commands = context.Pipe()
+            cores = [self._worker_cores[index % len(self._worker_cores)]] if self._worker_cores else []
+            process = context.Process(
+                target=worker_main,
+                args=(index, channel, model_path, worker_commands, cores, self._load_interval_s),
+                name=f"call-worker-{index}",
+            )
+            process.start()
+            worker_commands.close()
+            channel.conn.close()
+            worker = _Worker(index, process, commands)
+            loop.add_reader(commands.fileno(), self._on_message, worker)
+            self._workers.append(worker)
+
+        self._poll_task = asyncio.create_task(self._poll_server())
+        self._ready = True
+        logger.info(f"Started {len(self._workers)} call workers and the inference server")
+
+    async def run_call(self, room_url: str, token: str, call_id: str, sip_uri: str) -> None:
+        """Run the call in the least busy worker and wait until it ends.
+
+        Cancelling cancels the call in the worker.
+        """
+        if not self._server_running:
+            raise RuntimeError("The inference server is not running")
+        workers = [worker for worker in self._workers if worker.alive]
+        if not workers:
+            raise RuntimeError("No call worker is running")
+        worker = min(workers, key=lambda worker: len(worker.calls))
+
+        future = asyncio.get_running_loop().create_future()
+        worker.calls[call_id] = future
+        worker.calls_started += 1
+        worker.conn.send(("start", call_id, (room_url, token, call_id, sip_uri)))
+        logger.info(f"Call {call_id} runs in worker {worker.index}")
+        try:
+            await future
+        except asyncio.CancelledError:
+            if worker.alive:
+                worker.conn.send(("cancel", call_id, None))
+            raise
+
+    async def _poll_server(self):
+        while self._server_running:
+            try:
+                stats = await self._inference.server_stats()
+                self._stt_queue_depth = stats["stt_scheduler"]["queue_depth"]
+            except Exception as e:
+                logger.debug(f"Failed to read the inference server's queue depth: {e}")
+            await asyncio.sleep(self._load_interval_s)
+
+    def _on_message(self, worker: _Worker):
+        while worker.alive and worker.conn.poll():
+            try:
+                kind, call_id, detail = worker.conn.recv()
+            except (EOFError, OSError):
+                self._worker_exited(worker)
+                return
+            if kind == "loop_lag":
+                worker.loop_lag_ms = detail
+                continue
+            if kind != "ended":
+                continue
+            error = detail
+            future = worker.calls.pop(call_id, None)
+            if future is None or future.done():
+                continue
+            if error:
+                future.set_exception(RuntimeError(f"Call {call_id} failed in worker: {error}"))
+            else:
+                future.set_result(None)
+
+    def _worker_exited(self, worker: _Worker):
+        worker.alive = False
+        asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+        worker.conn.close()
+        if self._ready:
+            logger.error(f"Call worker {worker.index} exited with {len(worker.calls)} calls")
+        for call_id, future in worker.calls.items():
+            if not future.done():
+                future.set_exception(RuntimeError(f"Worker of call {call_id} exited"))
+        worker.calls.clear()
+
+    def _server_exited(self):
+        asyncio.get_running_loop().remove_reader(self._server.sentinel)
+        self._server_lost = True
+        if not self._ready:
+            # Stopped on purpose.
+            return
+        self._error = "Inference server exited"
+        calls = sum(len(worker.calls) for worker in self._workers)
+        logger.error(f"{self._error}; ending {calls} calls")
+        for worker in self._workers:
+            for call_id, future in list(worker.calls.items()):
+                if future.done():
+                    continue
+                # The worker still tears the call down and leaves the room;
+                # its report comes after the call was failed here.
+                future.set_exception(RuntimeError(f"Inference server of call {call_id} exited"))
+                try:
+                    worker.conn.send(("cancel", call_id, None))
+                except OSError:
+                    pass
+
+    async def stop(self, timeout_s: float = 10.0):
+        """Stop the workers, then the inference server."""
+        self._ready = False
+        if self._poll_task:
+            self._poll_task.cancel()
+        if self._server:
+            asyncio.get_running_loop().remove_reader(self._server.sentinel)
+        for worker in self._workers:
+            if worker.alive:
+                try:
+                    worker.conn.send(("stop", None, None))
+                except OSError:
+                    pass
+        for worker in self._workers:
+            await asyncio.to_thread(worker.process.join, timeout_s)
+            if worker.process.is_alive():
+                logger.warning(f"Call worker {worker.index} did not stop; terminating it")
+                worker.process.terminate()
+            if worker.alive:
+                self._worker_exited(worker)
+
+        # With every channel closed, the server stops on its own.
+        if self._inference:
+            self._inference.close()
+        if self._server:
+            await asyncio.to_thread(self._server.join, timeout_s)
+            if self._server.is_alive():
+                self._server.terminate()
+        for ring in self._rings:
+            ring.close()
+        self._rings.clear()
+
+    async def inference_stats(self) -> Optional[Dict[str, Any]]:
+        """The inference server's batching and model stats, if it is up."""
+        if not self._inference:
+            return None
+        try:
+            return await self._inference.server_stats()
+        except Exception as e:
+            return {"error": str(e)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "error": self._error,
+            "server_pid": self._server.pid if self._server else None,
+            "server_running": self._server_running,
+            "stt_queue_depth": self.stt_queue_depth,
+            "workers": [
+                {
+                    "index": worker.index,
+                    "pid": worker.process.pid,
+                    "alive": worker.alive,
+                    "active_calls": len(worker.calls),
+                    "calls_started": worker.calls_started,
+                    "loop_lag_ms": round(worker.loop_lag_ms, 1),
+                }
+                for worker in self._workers
+            ],
+            "inference_client": self._inference.stats() if self._inference else None,
+        }
+
+
+class _CallWorker:
+    """The event loop of one worker process: runs the calls it is handed."""
+
+    def __init__(
+        self,
+        channel: InferenceChannel,
+        model_path: str,
+        commands: Connection,
+        load_interval_s: float,
+    ):
+        self._channel = channel
+        self._model_path = model_path
+        self._commands = commands
+        self._load_interval_s = load_interval_s
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._stopped: Optional[asyncio.Event] = None
+
+    async def run(self):
+        from bot import TTS_BASE_URL, prerender_script_phrases, render_greetings, run_bot
+        from utils.admission import LoopLagMonitor
+        from utils.call_supervisor import call_supervisor
+        from utils.http_pool import http_pool
+        from utils.transcode_pool import transcode_pool
+
+        self._run_bot = run_bot
+        self._supervisor = call_supervisor
+        self._inference = InferenceClient(self._channel, self._model_path)
+        self._stopped = asyncio.Event()
+        # Every worker plays the greeting and fixed phrases of its own calls
+        background = [
+            asyncio.create_task(prerender_script_phrases()),
+            asyncio.create_task(render_greetings()),
+            asyncio.create_task(
+                http_pool.warm_up(
+                    TTS_BASE_URL, connections=int(os.getenv("TTS_WARM_CONNECTIONS", "4"))
+                )
+            ),
+            # The call objects live here, so they are checked for leaks here
+            asyncio.create_task(call_supervisor.run()),
+            # The calls' loop lag is measured here and sent to admission control
+            asyncio.create_task(self._report_loop_lag(LoopLagMonitor())),
+        ]
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self._commands.fileno(), self._on_command)
+
+        await self._stopped.wait()
+
+        loop.remove_reader(self._commands.fileno())
+        for task in self._calls.values():
+            task.cancel()
+        await asyncio.gather(*self._calls.values(), return_exceptions=True)
+        for task in background:
+            task.cancel()
+        transcode_pool.shutdown()
+        await http_pool.close()
+        self._inference.close()
+        self._commands.close()
+
+    async def _report_loop_lag(self, monitor):
+        monitor_task = asyncio.create_task(monitor.run())
+        try:
+            while True:
+                await asyncio.sleep(self._load_interval_s)
+                try:
+                    self._commands.send(("loop_lag", None, monitor.lag_ms))
+                except OSError:
+                    return
+        finally:
+            monitor_task.cancel()
+
+    def _on_command(self):
+        while not self._stopped.is_set() and self._commands.poll():
+            try:
+                kind, call_id, args = self._commands.recv()
+            except (EOFError, OSError):
+                # The web server went away.
+                self._stopped.set()
+                return
+            if kind == "start":
+                record = self._supervisor.start(
+                    call_id,
+                    lambda record, args=args: self._run_bot(
+                        *args, call=record, inference=self._inference
+                    ),
+                )
+                task = record.task
+                task.add_done_callback(lambda task, call_id=call_id: self._ended(call_id, task))
+                self._calls[call_id] = task
+            elif kind == "cancel" and call_id in self._calls:
+                self._calls[call_id].cancel()
+            elif kind == "stop":
+                self._stopped.set()
+
+    def _ended(self, call_id: str, task: asyncio.Task):
+        self._calls.pop(call_id, None)
+        error = None
+        # The supervisor has logged the failure.
+        if not task.cancelled() and task.exception():
+            error = repr(task.exception())
+        try:
+            self._commands.send(("ended", call_id, error))
+        except OSError:
+            pass
+
+
+def worker_main(
+    index: int,
+    channel: InferenceChannel,
+    model_path: str,
+    commands: Connection,
+    cores: Sequence[int],
+    load_interval_s: float,
+):
+    """Entry point of a call worker process."""
+    # Ctrl+C reaches the whole process group; the web server stops the workers.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    pin_to_cores(cores)
+    logger.info(f"Call worker {index} started in process {os.getpid()}")
+    asyncio.run(_CallWorker(channel, model_path, commands, load_interval_s).run())
+
+
+call_workers = CallWorkerPool(
+    num_workers=int(os.getenv("CALL_WORKERS", "0")),
+    worker_cores=parse_cpu_list(os.getenv("CALL_WORKER_CPUS")),
+    ring_bytes=int(os.getenv("INFERENCE_RING_MB", "8")) * 1024 * 1024,
+)
@@ -0,0 +1,83 @@
+"""Settings for running the Whisper model on CPU replicas.
+
+The Kannada model is a tiny Whisper, which CTranslate2 runs faster than real
+time on a few CPU cores with int8 weights, so a GPU per replica is not a
+requirement. On CPU the throughput depends on how the cores are shared:
+``intra_threads`` parallelise one transcription, ``num_workers`` let several
+transcriptions run side by side, and pinning the process to a fixed set of
+cores keeps replicas or worker processes on the same host from stealing each
+other's cores and caches.
+"""
+
+import os
+from typing import List, Optional, Sequence
+
+from loguru import logger
+
+# Compute types used when WHISPER_COMPUTE_TYPE is not set. int8 weights with
+# int8 activations are the fastest CTranslate2 path on x86 and ARM CPUs.
+DEFAULT_COMPUTE_TYPES = {"cpu": "int8"}
+
+
+def default_compute_type(device: str) -> str:
+    """The CTranslate2 compute type to use on ``device`` unless configured."""
+    return DEFAULT_COMPUTE_TYPES.get(device, "default")
+
+
+def parse_cpu_list(spec: Optional[str]) -> List[int]:
+    """Parse a CPU list like ``"0-3,8,10-11"`` (the ``taskset -c`` syntax).
+
+    Returns:
+        The sorted core ids, or an empty list for an empty spec.
+    """
+    cores = set()
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            if int(last) < int(first):
+                raise ValueError(f"Invalid CPU range: {part}")
+            cores.update(range(int(first), int(last) + 1))
+        else:
+            cores.add(int(part))
+    return sorted(cores)
+
+
+def pin_to_cores(cores: Sequence[int]) -> bool:
+    """Restrict the whole process to ``cores``.
+
+    CPU affinity is per thread on Linux and new threads inherit it from the
+    thread that starts them, so every thread that already exists is pinned
+    too. Call it before the model is loaded so the CTranslate2 and executor
+    threads start on the right cores.
+
+    Returns:
+        True if the process was pinned.
+    """
+    if not cores:
+        return False
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("CPU pinning is not supported on this platform")
+        return False
+
+    try:
+        thread_ids = [int(tid) for tid in os.listdir("/proc/self/task")]
+    except OSError:
+        thread_ids = [0]
+    for thread_id in thread_ids:
+        try:
+            os.sched_setaffinity(thread_id, cores)
+        except ProcessLookupError:
+            # The thread exited in the meantime.
+            pass
+    logger.info(f"Pinned process {os.getpid()} to cores {list(cores)}")
+    return True
+
+
+def available_cores() -> int:
+    """Number of cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
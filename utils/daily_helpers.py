@@ -1,6 +1,7 @@
 """Helper functions for interacting with the Daily API."""
 
 import os
+import time
 from typing import Dict, Optional
 
 import aiohttp
@@ -13,30 +14,42 @@ from pipecat.transports.services.helpers.daily_rest import (
     DailyRoomSipParams,
 )
 
+from utils.http_pool import http_pool
+
 load_dotenv()
 
+DAILY_API_URL = os.getenv("DAILY_API_URL", "https://api.daily.co/v1")
+
 
 # Initialize Daily API helper
 async def get_daily_helper(session: Optional[aiohttp.ClientSession] = None) -> DailyRESTHelper:
-    """Get a Daily REST helper with the configured API key."""
+    """Get a Daily REST helper with the configured API key.
+
+    Uses the process-wide connection pool unless a session is given.
+    """
     if session is None:
-        session = aiohttp.ClientSession()
+        session = http_pool.session(DAILY_API_URL)
 
     return DailyRESTHelper(
         daily_api_key=os.getenv("DAILY_API_KEY", ""),
-        daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
+        daily_api_url=DAILY_API_URL,
         aiohttp_session=session,
     )
 
 
 async def create_sip_room(
-    session: Optional[aiohttp.ClientSession] = None, caller_phone: str = "unknown-caller"
+    session: Optional[aiohttp.ClientSession] = None,
+    caller_phone: str = "unknown-caller",
+    expires_in_s: Optional[float] = None,
 ) -> Dict[str, str]:
     """Create a Daily room with SIP capabilities for phone calls.
 
     Args:
-        session: Optional aiohttp session to use for API calls
+        session: Optional aiohttp session to use for API calls. Defaults to
+            the shared connection pool.
         caller_phone: The phone number of the caller to use in display name
+        expires_in_s: Optional lifetime of the room. Nobody can join it
+            afterwards, but a call already in progress is not ended.
 
     Returns:
         Dictionary with room URL, token, and SIP endpoint
@@ -57,6 +70,7 @@ async def create_sip_room(
         # enable_dialout=True,  # Needed for outbound calls if you expand the bot
         enable_chat=False,  # No need for chat in a voice bot
         start_video_off=True,  # Voice only
+        exp=time.time() + expires_in_s if expires_in_s else None,
     )
 
     # Create room parameters
@@ -73,4 +87,15 @@ async def create_sip_room(
         return {"room_url": room.url, "token": token, "sip_endpoint": room.config.sip_endpoint}
     except Exception as e:
         print(f"Error creating room: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+async def delete_sip_room(room_url: str, session: Optional[aiohttp.ClientSession] = None) -> None:
+    """Delete a Daily room that is no longer needed.
+
+    Args:
+        room_url: URL of the room to delete
+        session: Optional aiohttp session to use for API calls
+    """
+    daily_helper = await get_daily_helper(session)
+    await daily_helper.delete_room_by_url(room_url)
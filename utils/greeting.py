@@ -0,0 +1,151 @@
+"""Pre-synthesized opening greeting.
+
+The greeting used to start with a context frame queued when the caller
+joined, so the first thing the caller heard waited for an LLM completion, a
+TTS request and an MP3 decode: seconds of dead air on a phone line. The
+greeting is now rendered to PCM once at startup, for every language and
+voice in use, and queued straight into the output transport when the caller
+joins. The frames around the audio make the assistant context aggregator
+record the greeting as the bot's first turn, as if the LLM had said it.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import aiohttp
+from loguru import logger
+
+from pipecat.frames.frames import (
+    Frame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    TTSTextFrame,
+)
+from pipecat.processors.frame_processor import FrameProcessor
+from pipecat.transcriptions.language import Language
+
+from CustomBhasniTTS import bhasni_synthesize, language_to_bhasni_language, mp3_to_pcm
+from utils.transcode_pool import transcode_pool
+
+GreetingKey = Tuple[Language, str]
+
+
+class GreetingAudio:
+    """Greeting PCM for every configured language and voice.
+
+    Args:
+        texts: The greeting for each language.
+        voices: TTS voices the greeting is rendered with.
+        sample_rate: Sample rate of the rendered PCM.
+    """
+
+    def __init__(
+        self,
+        *,
+        texts: Mapping[Language, str],
+        voices: Sequence[str],
+        sample_rate: int = 16000,
+    ):
+        self._texts = texts
+        self._voices = voices
+        self._sample_rate = sample_rate
+        self._pcm: Dict[GreetingKey, bytes] = {}
+
+        self._played = 0
+        self._missed = 0
+
+    def text(self, language: Language) -> Optional[str]:
+        return self._texts.get(language)
+
+    def ready(self, language: Language, voice: str) -> bool:
+        return (language, voice) in self._pcm
+
+    async def render(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        base_url: str = "https://tts.bhashini.ai/v1",
+        api_key: Optional[str] = None,
+    ) -> int:
+        """Synthesize the greetings that are not rendered yet.
+
+        Returns:
+            The number of greetings rendered.
+        """
+
+        async def render_one(language: Language, voice: str) -> bool:
+            start = time.perf_counter()
+            try:
+                mp3_data = await bhasni_synthesize(
+                    session,
+                    self._texts[language],
+                    language=language_to_bhasni_language(language) or "English",
+                    voice_id=voice,
+                    base_url=base_url,
+                    api_key=api_key,
+                )
+                pcm = await transcode_pool.run(mp3_to_pcm, mp3_data, self._sample_rate)
+            except Exception as e:
+                logger.warning(f"Failed to render the greeting for {language}/{voice}: {e}")
+                return False
+            self._pcm[(language, voice)] = pcm
+            logger.debug(
+                f"Rendered the greeting for {language}/{voice} in "
+                f"{time.perf_counter() - start:.2f}s"
+            )
+            return True
+
+        pending = [
+            (language, voice)
+            for language in self._texts
+            for voice in self._voices
+            if not self.ready(language, voice)
+        ]
+        results = await asyncio.gather(*(render_one(l, v) for l, v in pending))
+        rendered = sum(results)
+        logger.info(f"Rendered {rendered} of {len(pending)} greetings")
+        return rendered
+
+    def frames(self, language: Language, voice: str) -> Optional[List[Frame]]:
+        """The frames that play the greeting, or None if it isn't rendered."""
+        pcm = self._pcm.get((language, voice))
+        if pcm is None:
+            return None
+        return [
+            LLMFullResponseStartFrame(),
+            TTSStartedFrame(),
+            TTSAudioRawFrame(audio=pcm, sample_rate=self._sample_rate, num_channels=1),
+            TTSStoppedFrame(),
+            # Pushed on by the output transport once the audio before it has
+            # played, into the assistant context aggregator.
+            TTSTextFrame(self._texts[language]),
+            LLMFullResponseEndFrame(),
+        ]
+
+    async def play(self, output: FrameProcessor, language: Language, voice: str) -> bool:
+        """Queue the greeting into the output transport.
+
+        Returns:
+            False if the greeting isn't rendered, so the caller has to fall
+            back to generating it.
+        """
+        frames = self.frames(language, voice)
+        if frames is None:
+            self._missed += 1
+            return False
+        for frame in frames:
+            await output.queue_frame(frame)
+        self._played += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rendered": len(self._pcm),
+            "bytes": sum(len(pcm) for pcm in self._pcm.values()),
+            "played": self._played,
+            "missed": self._missed,
+        }
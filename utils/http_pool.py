@@ -0,0 +1,186 @@
+"""Process-wide HTTP connection pool for outbound API calls.
+
+Every call used to open its own ``aiohttp.ClientSession`` for the TTS API,
+and never closed it: the first request of each call paid for DNS, TCP and
+TLS again, and the sockets leaked. All outbound traffic now goes through one
+long-lived session per upstream host, with keep-alive, a DNS cache and a
+per-host connection limit. Sessions are created lazily and closed by the app
+lifespan.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+from loguru import logger
+from yarl import URL
+
+
+class _HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.awaiting_response = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+        self.total_response_s = 0.0
+        self.max_response_s = 0.0
+
+
+class HTTPPool:
+    """Shared aiohttp sessions, one per upstream host.
+
+    Each host gets its own connector, so a burst of TTS requests cannot
+    starve the Daily or Twilio APIs of connections, and idle connections are
+    kept alive for reuse by later calls.
+
+    Args:
+        limit_per_host: Default maximum number of connections per host.
+        host_limits: Per-host overrides of ``limit_per_host``.
+        keepalive_timeout_s: How long idle connections are kept open.
+        dns_ttl_s: How long resolved addresses are cached.
+        connect_timeout_s: Timeout for establishing a connection.
+    """
+
+    def __init__(
+        self,
+        *,
+        limit_per_host: int = 32,
+        host_limits: Optional[Dict[str, int]] = None,
+        keepalive_timeout_s: float = 60.0,
+        dns_ttl_s: int = 300,
+        connect_timeout_s: float = 10.0,
+    ):
+        self._limit_per_host = limit_per_host
+        self._host_limits = host_limits or {}
+        self._keepalive_timeout_s = keepalive_timeout_s
+        self._dns_ttl_s = dns_ttl_s
+        self._connect_timeout_s = connect_timeout_s
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._stats: Dict[str, _HostStats] = {}
+
+    def session(self, url: str) -> aiohttp.ClientSession:
+        """Return the shared session for the host of ``url``.
+
+        Callers borrow the session and must not close it.
+        """
+        host = URL(url).host or url
+        session = self._sessions.get(host)
+        if session is None or session.closed:
+            session = self._create_session(host)
+            self._sessions[host] = session
+        return session
+
+    async def warm_up(self, url: str, connections: int = 2):
+        """Open ``connections`` keep-alive connections to the host of ``url``.
+
+        This resolves and caches the host's address and completes the TLS
+        handshakes before the first call needs them.
+        """
+        session = self.session(url)
+
+        async def connect():
+            async with session.head(url, allow_redirects=False) as response:
+                await response.read()
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(connect() for _ in range(connections)), return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning(f"HTTP warm-up to {URL(url).host} failed: {failures[0]}")
+        logger.info(
+            f"Warmed up {connections - len(failures)} connections to {URL(url).host} "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            host: {
+                "limit": self._host_limits.get(host, self._limit_per_host),
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "awaiting_response": stats.awaiting_response,
+                "new_connections": stats.new_connections,
+                "reused_connections": stats.reused_connections,
+                "dns_cache_hits": stats.dns_cache_hits,
+                "dns_cache_misses": stats.dns_cache_misses,
+                "avg_response_ms": round(1000 * stats.total_response_s / stats.requests, 1)
+                if stats.requests
+                else 0.0,
+                "max_response_ms": round(1000 * stats.max_response_s, 1),
+            }
+            for host, stats in self._stats.items()
+        }
+
+    def _create_session(self, host: str) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=self._host_limits.get(host, self._limit_per_host),
+            keepalive_timeout=self._keepalive_timeout_s,
+            ttl_dns_cache=self._dns_ttl_s,
+            use_dns_cache=True,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=300, sock_connect=self._connect_timeout_s),
+            trace_configs=[self._trace_config(host)],
+        )
+
+    def _trace_config(self, host: str) -> aiohttp.TraceConfig:
+        stats = self._stats.setdefault(host, _HostStats())
+
+        async def on_request_start(session, ctx, params):
+            ctx.start = time.perf_counter()
+            stats.requests += 1
+            stats.awaiting_response += 1
+
+        async def on_request_end(session, ctx, params):
+            # Fired once the response headers are in, before the body is read.
+            elapsed = time.perf_counter() - ctx.start
+            stats.awaiting_response -= 1
+            stats.total_response_s += elapsed
+            stats.max_response_s = max(stats.max_response_s, elapsed)
+
+        async def on_request_exception(session, ctx, params):
+            stats.awaiting_response -= 1
+            stats.errors += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            stats.new_connections += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats.reused_connections += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            stats.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            stats.dns_cache_misses += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+
+http_pool = HTTPPool(
+    limit_per_host=int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "32")),
+    keepalive_timeout_s=float(os.getenv("HTTP_POOL_KEEPALIVE_S", "60")),
+    dns_ttl_s=int(os.getenv("HTTP_POOL_DNS_TTL_S", "300")),
+)
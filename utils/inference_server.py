@@ -0,0 +1,490 @@
+"""A local process that runs Whisper and the VAD for the call workers.
+
+With calls spread over several worker processes, each worker would load its
+own Whisper and Silero models and batch only its own calls. Instead one
+inference server process owns the models, and every worker reaches it over
+a channel: a pipe for small request and reply messages, and a shared-memory
+ring for the audio. The server runs the same batch scheduler and shared VAD
+engine as the single-process deployment, so utterances and VAD frames from
+all workers' calls are still batched together.
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import os
+import signal
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+from utils.latency_tracing import LatencyHistogram
+from utils.shm_ring import RingFullError, ShmRing
+from utils.streaming_stt import Word, transcribe_words
+from utils.stt_scheduler import stt_scheduler, transcribe_single
+from utils.vad_engine import FRAME_SAMPLES, SharedSileroVADAnalyzer, vad_engine
+from utils.whisper_registry import model_registry
+
+# Long enough for the 30 second decode window of streaming STT, as float32.
+DEFAULT_RING_BYTES = 8 * 1024 * 1024
+
+
+class InferenceServerError(Exception):
+    """The inference server failed a request or went away."""
+
+
+@dataclass
+class InferenceChannel:
+    """What one side of a channel needs: its pipe end and the audio ring."""
+
+    conn: Connection
+    ring_name: str
+    ring_bytes: int
+
+
+class InferenceServer:
+    """Serves Whisper and VAD requests from several channels.
+
+    Every channel is read by its own thread. VAD frames block in the shared
+    engine until their batch has run, so they are inferred from a thread
+    pool; transcriptions go through the batch scheduler on the server's
+    event loop.
+
+    Args:
+        channels: One channel per client process.
+        vad_threads: Threads that wait on VAD batches; at least the number
+            of calls the replica takes.
+    """
+
+    def __init__(self, channels: List[InferenceChannel], *, vad_threads: int = 64):
+        self._channels = channels
+        self._vad_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=vad_threads, thread_name_prefix="vad-request"
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._analyzers: Dict[Tuple[int, str], SharedSileroVADAnalyzer] = {}
+        self._models: Dict[Tuple[str, str, str], Any] = {}
+        self._lock = threading.Lock()
+        self._models_lock = threading.Lock()
+        self._requests: Counter = Counter()
+        self._errors = 0
+
+    async def run(self, ready: Connection):
+        """Load the models, then serve until every channel is closed.
+
+        ``("ready", model_path)`` or ``("failed", error)`` is sent on
+        ``ready`` once the models are loaded.
+        """
+        from bot import whisper_warmup
+
+        try:
+            # Load failures are retried; the web server's start timeout
+            # bounds the wait.
+            await whisper_warmup.start()
+            model_path = await whisper_warmup.wait_ready()
+            vad_engine.load()
+        except Exception as e:
+            logger.error(f"Inference server failed to load its models: {e}")
+            ready.send(("failed", str(e)))
+            return
+
+        self._loop = asyncio.get_running_loop()
+        threads = [
+            threading.Thread(
+                target=self._serve_channel, args=(index, channel), name=f"inference-channel-{index}"
+            )
+            for index, channel in enumerate(self._channels)
+        ]
+        for thread in threads:
+            thread.start()
+        ready.send(("ready", model_path))
+        logger.info(f"Inference server serving {len(threads)} channels")
+
+        try:
+            for thread in threads:
+                await asyncio.to_thread(thread.join)
+        finally:
+            await stt_scheduler.stop()
+            vad_engine.stop()
+            self._vad_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _serve_channel(self, index: int, channel: InferenceChannel):
+        ring = ShmRing.attach(channel.ring_name, channel.ring_bytes)
+        send_lock = threading.Lock()
+
+        def respond(request_id: int, result: Any = None, error: Optional[str] = None):
+            if error:
+                self._errors += 1
+            with send_lock:
+                try:
+                    channel.conn.send((request_id, result, error))
+                except (OSError, EOFError):
+                    # The client is gone; its calls are over.
+                    pass
+
+        try:
+            while True:
+                try:
+                    request_id, kind, params, size = channel.conn.recv()
+                except (EOFError, OSError):
+                    break
+                if kind == "close":
+                    break
+                payload = ring.read(size) if size else b""
+                self._requests[kind] += 1
+                try:
+                    self._dispatch(index, kind, params, payload, request_id, respond)
+                except Exception as e:
+                    respond(request_id, error=repr(e))
+        finally:
+            with self._lock:
+                for key in [key for key in self._analyzers if key[0] == index]:
+                    self._analyzers.pop(key).close()
+            ring.close()
+            channel.conn.close()
+
+    def _dispatch(self, index, kind, params, payload, request_id, respond):
+        def reply(future):
+            if future.cancelled():
+                respond(request_id, error="cancelled")
+            elif future.exception():
+                respond(request_id, error=repr(future.exception()))
+            else:
+                respond(request_id, future.result())
+
+        if kind == "vad":
+            analyzer = self._vad_analyzer(index, params)
+            self._vad_pool.submit(analyzer.voice_confidence, payload).add_done_callback(reply)
+        elif kind == "vad_close":
+            with self._lock:
+                analyzer = self._analyzers.pop((index, params["vad_id"]), None)
+            if analyzer:
+                analyzer.close()
+            respond(request_id)
+        elif kind == "transcribe":
+            audio = np.frombuffer(payload, dtype=np.float32)
+            asyncio.run_coroutine_threadsafe(
+                self._transcribe(params, audio), self._loop
+            ).add_done_callback(reply)
+        elif kind == "words":
+            audio = np.frombuffer(payload, dtype=np.float32)
+            asyncio.run_coroutine_threadsafe(
+                self._transcribe_words(params, audio), self._loop
+            ).add_done_callback(reply)
+        elif kind == "stats":
+            respond(request_id, self.stats())
+        else:
+            respond(request_id, error=f"Unknown request {kind!r}")
+
+    def _vad_analyzer(self, index: int, params: Dict[str, Any]) -> SharedSileroVADAnalyzer:
+        key = (index, params["vad_id"])
+        with self._lock:
+            analyzer = self._analyzers.get(key)
+            if analyzer is None:
+                analyzer = SharedSileroVADAnalyzer(
+                    call_id=params.get("call_id"), sample_rate=params["sample_rate"]
+                )
+                analyzer.set_sample_rate(params["sample_rate"])
+                self._analyzers[key] = analyzer
+            return analyzer
+
+    def _model(self, key: Tuple[str, str, str]) -> Any:
+        # Borrowed once and kept: the server lives as long as the replica.
+        with self._models_lock:
+            if key not in self._models:
+                self._models[key] = model_registry.acquire(*key)
+            return self._models[key]
+
+    async def _transcribe(self, params: Dict[str, Any], audio: np.ndarray) -> str:
+        model = await asyncio.to_thread(self._model, params["model"])
+        if params["batching"]:
+            return await stt_scheduler.transcribe(
+                model, audio, params["language"], params["no_speech_prob"]
+            )
+        return await asyncio.to_thread(
+            transcribe_single, model, audio, params["language"], params["no_speech_prob"]
+        )
+
+    async def _transcribe_words(self, params: Dict[str, Any], audio: np.ndarray) -> List[Word]:
+        model = await asyncio.to_thread(self._model, params["model"])
+        return await asyncio.to_thread(
+            transcribe_words,
+            model,
+            audio,
+            params["language"],
+            params["no_speech_prob"],
+            offset_s=params["offset_s"],
+            initial_prompt=params["initial_prompt"],
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "channels": len(self._channels),
+            "requests": dict(self._requests),
+            "errors": self._errors,
+            "vad_streams": len(self._analyzers),
+            "stt_scheduler": stt_scheduler.stats(),
+            "vad": vad_engine.stats(),
+            "whisper_models": model_registry.stats(),
+        }
+
+
+def serve(channels: List[InferenceChannel], ready: Connection):
+    """Entry point of the inference server process."""
+    from utils.cpu_inference import parse_cpu_list, pin_to_cores
+
+    # Ctrl+C reaches the whole process group; the web server stops the server.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    pin_to_cores(parse_cpu_list(os.getenv("INFERENCE_CPU_AFFINITY")))
+    asyncio.run(InferenceServer(channels).run(ready))
+
+
+class InferenceClient:
+    """A process's connection to the inference server.
+
+    Thread-safe: VAD frames come from the transports' VAD threads,
+    transcriptions from the event loop. Writing to the ring and sending the
+    request happen under one lock, so the server finds the audio of every
+    request in the order the requests arrive. Waiting for room in the ring
+    happens outside it, so a long transcription waiting for the server to
+    catch up doesn't hold up every VAD frame of the process.
+
+    Args:
+        channel: This process's end of its channel.
+        model_path: Local path of the Whisper model the server loaded.
+        timeout_s: How long a request may take before it fails.
+    """
+
+    def __init__(self, channel: InferenceChannel, model_path: str, *, timeout_s: float = 30.0):
+        self.model_path = model_path
+        self._conn = channel.conn
+        self._ring = ShmRing.attach(channel.ring_name, channel.ring_bytes)
+        self._timeout_s = timeout_s
+
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, concurrent.futures.Future] = {}
+        self._closed = False
+        self._receiver = threading.Thread(
+            target=self._receive, name="inference-client", daemon=True
+        )
+        self._receiver.start()
+
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self._bytes_sent = 0
+
+    def request(
+        self, kind: str, params: Optional[Dict[str, Any]] = None, audio: Optional[Any] = None
+    ) -> concurrent.futures.Future:
+        """Send a request; its audio, if any, goes through the ring."""
+        if self._closed:
+            raise InferenceServerError("The inference server connection is closed")
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        started = time.perf_counter()
+        future.add_done_callback(lambda _: self._observe(kind, started))
+
+        size = memoryview(audio).nbytes if audio is not None else 0
+        deadline = time.monotonic() + self._timeout_s
+        while True:
+            try:
+                if size and not self._ring.wait_for_room(size, deadline - time.monotonic()):
+                    raise RingFullError(f"No room for {size} bytes after {self._timeout_s}s")
+            except (ValueError, RingFullError) as e:
+                raise InferenceServerError(f"Failed to send {kind} request: {e}") from e
+            with self._send_lock:
+                # Another thread may have taken the room meanwhile.
+                if size and self._ring.free < size:
+                    continue
+                request_id = next(self._ids)
+                self._pending[request_id] = future
+                try:
+                    if audio is not None:
+                        self._ring.write(audio, timeout_s=0)
+                    self._conn.send((request_id, kind, params or {}, size))
+                except Exception as e:
+                    self._pending.pop(request_id, None)
+                    raise InferenceServerError(f"Failed to send {kind} request: {e}") from e
+                break
+        self._bytes_sent += size
+        return future
+
+    def vad(self, vad_id: str, call_id: Optional[str], sample_rate: int, audio: bytes) -> float:
+        """Voice confidence of one frame; blocks until the server answers."""
+        future = self.request(
+            "vad", {"vad_id": vad_id, "call_id": call_id, "sample_rate": sample_rate}, audio
+        )
+        return self._result(future)
+
+    def close_vad(self, vad_id: str):
+        if not self._closed:
+            self.request("vad_close", {"vad_id": vad_id})
+
+    async def transcribe(
+        self,
+        model: Tuple[str, str, str],
+        audio: np.ndarray,
+        language: Optional[str],
+        no_speech_prob: float,
+        *,
+        batching: bool = True,
+    ) -> str:
+        """Transcribe 16 kHz float32 ``audio`` with the (path, device, compute type) model."""
+        params = {
+            "model": model,
+            "language": language,
+            "no_speech_prob": no_speech_prob,
+            "batching": batching,
+        }
+        return await self._request_async("transcribe", params, audio.astype(np.float32))
+
+    async def transcribe_words(
+        self,
+        model: Tuple[str, str, str],
+        audio: np.ndarray,
+        language: Optional[str],
+        no_speech_prob: float,
+        *,
+        offset_s: float = 0.0,
+        initial_prompt: Optional[str] = None,
+    ) -> List[Word]:
+        """Like ``transcribe_words``, run on the server."""
+        params = {
+            "model": model,
+            "language": language,
+            "no_speech_prob": no_speech_prob,
+            "offset_s": offset_s,
+            "initial_prompt": initial_prompt,
+        }
+        return await self._request_async("words", params, audio.astype(np.float32))
+
+    async def server_stats(self) -> Dict[str, Any]:
+        return await self._request_async("stats")
+
+    def close(self):
+        """Close the channel; the server frees this process's VAD state."""
+        if not self._closed:
+            self._closed = True
+            # Closing the pipe under the receiver, blocked reading it, would
+            # not reach the server: ask the server to close its end instead.
+            with self._send_lock:
+                try:
+                    self._conn.send((0, "close", {}, 0))
+                except OSError:
+                    pass
+        self._receiver.join(timeout=1.0)
+        self._conn.close()
+        self._ring.close()
+
+    def _result(self, future: concurrent.futures.Future) -> Any:
+        try:
+            return future.result(timeout=self._timeout_s)
+        except concurrent.futures.TimeoutError:
+            raise InferenceServerError(f"No answer within {self._timeout_s}s") from None
+
+    async def _request_async(
+        self, kind: str, params: Optional[Dict[str, Any]] = None, audio: Optional[Any] = None
+    ) -> Any:
+        # Copying seconds of audio, or waiting for room in the ring, must not
+        # hold up the event loop.
+        future = await asyncio.to_thread(self.request, kind, params, audio)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self._timeout_s)
+        except asyncio.TimeoutError:
+            raise InferenceServerError(f"No answer within {self._timeout_s}s") from None
+
+    def _receive(self):
+        while True:
+            try:
+                request_id, result, error = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is None or future.done():
+                continue
+            if error:
+                future.set_exception(InferenceServerError(error))
+            else:
+                future.set_result(result)
+        # Nothing more will be answered.
+        self._closed = True
+        for future in list(self._pending.values()):
+            if not future.done():
+                future.set_exception(InferenceServerError("The inference server went away"))
+        self._pending.clear()
+
+    def _observe(self, kind: str, started: float):
+        histogram = self._latency.get(kind)
+        if histogram is None:
+            histogram = self._latency.setdefault(kind, LatencyHistogram(max_samples=1000))
+        histogram.observe(1000 * (time.perf_counter() - started))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "bytes_sent": self._bytes_sent,
+            "ring_used": self._ring.used if not self._closed else 0,
+            "latency_ms": {kind: h.summary() for kind, h in self._latency.items()},
+        }
+
+
+class RemoteVADAnalyzer(VADAnalyzer):
+    """Silero VAD for one call, inferred by the inference server.
+
+    Drop-in replacement for ``SharedSileroVADAnalyzer`` in a call worker:
+    the speech detection state machine runs here, the model and the call's
+    model state live on the server.
+
+    Args:
+        client: The worker's connection to the inference server.
+        call_id: Used to report this call's VAD latency on the server.
+        sample_rate: Audio sample rate, 8000 or 16000; set by the
+            transport if not given.
+        params: VAD parameters.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        *,
+        client: InferenceClient,
+        call_id: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        params: Optional[VADParams] = None,
+    ):
+        super().__init__(sample_rate=sample_rate, params=params)
+        self.call_id = call_id
+        self._client = client
+        self._vad_id = f"{call_id}-{next(self._ids)}"
+
+    def set_sample_rate(self, sample_rate: int):
+        if sample_rate not in FRAME_SAMPLES:
+            raise ValueError(
+                f"Silero VAD sample rate needs to be 16000 or 8000 (sample rate: {sample_rate})"
+            )
+        super().set_sample_rate(sample_rate)
+
+    def num_frames_required(self) -> int:
+        return FRAME_SAMPLES.get(self.sample_rate, 512)
+
+    def voice_confidence(self, buffer) -> float:
+        try:
+            return self._client.vad(self._vad_id, self.call_id, self.sample_rate, buffer)
+        except Exception as e:
+            logger.error(f"Error analyzing audio with the remote Silero VAD: {e}")
+            return 0
+
+    def close(self):
+        """Free this call's VAD state on the server."""
+        try:
+            self._client.close_vad(self._vad_id)
+        except InferenceServerError:
+            pass
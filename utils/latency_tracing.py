@@ -0,0 +1,196 @@
+"""Per-turn voice latency tracing.
+
+The services' TTFB metrics each cover one stage. The latency a caller
+actually notices is the time from the end of their speech to the bot's
+first audio, so every turn is traced across all stages: VAD end of speech,
+final transcription, first LLM token, first TTS audio, first audio played by
+the transport, and interruption. Each turn is logged as one structured line
+and the stage latencies feed process-wide histograms served on /metrics.
+"""
+
+import json
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    CancelFrame,
+    EndFrame,
+    LLMTextFrame,
+    StartInterruptionFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+
+# Stage latencies, as (name, from event, to event).
+STAGES = (
+    ("stt", "vad_end", "stt_final"),
+    ("llm_ttft", "stt_final", "llm_first_token"),
+    ("tts_ttfb", "llm_first_token", "tts_first_byte"),
+    ("transport", "tts_first_byte", "first_audio_out"),
+    ("voice_to_voice", "vad_end", "first_audio_out"),
+    ("time_to_interruption", "first_audio_out", "interruption"),
+)
+
+
+class LatencyHistogram:
+    """Percentiles over a window of recent samples.
+
+    Args:
+        max_samples: Number of most recent samples kept.
+    """
+
+    def __init__(self, max_samples: int = 10000):
+        self._samples: Deque[float] = deque(maxlen=max_samples)
+        self._count = 0
+
+    def observe(self, value_ms: float):
+        self._samples.append(value_ms)
+        self._count += 1
+
+    def summary(self) -> Dict[str, Any]:
+        if not self._samples:
+            return {"count": 0}
+        samples = sorted(self._samples)
+
+        def percentile(p: float) -> float:
+            index = min(len(samples) - 1, max(0, math.ceil(p / 100 * len(samples)) - 1))
+            return round(samples[index], 1)
+
+        return {
+            "count": self._count,
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "max": round(samples[-1], 1),
+        }
+
+
+class LatencyMetrics:
+    """Process-wide per-stage latency histograms, fed by every call."""
+
+    def __init__(self):
+        self._histograms: Dict[str, LatencyHistogram] = {
+            name: LatencyHistogram() for name, _, _ in STAGES
+        }
+        self._turns = 0
+        self._interrupted = 0
+
+    def record_turn(self, durations: Dict[str, float], interrupted: bool):
+        self._turns += 1
+        if interrupted:
+            self._interrupted += 1
+        for name, value in durations.items():
+            self._histograms[name].observe(value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "turns": self._turns,
+            "interrupted_turns": self._interrupted,
+            "stages_ms": {name: h.summary() for name, h in self._histograms.items()},
+        }
+
+
+latency_metrics = LatencyMetrics()
+
+
+class _Turn:
+    def __init__(self, index: int):
+        self.index = index
+        self.started_at = time.time()
+        self.events: Dict[str, float] = {}
+
+    def mark(self, event: str):
+        # Frames are observed at every hop through the pipeline; keep the first.
+        if event not in self.events:
+            self.events[event] = time.perf_counter()
+
+    def durations(self) -> Dict[str, float]:
+        return {
+            name: round(1000 * (self.events[end] - self.events[start]), 1)
+            for name, start, end in STAGES
+            if start in self.events and end in self.events
+        }
+
+
+class TurnLatencyObserver(BaseObserver):
+    """Traces the latency of every user turn of a call.
+
+    A turn starts when the VAD detects the end of the user's speech. If the
+    user speaks again before the bot answered, the turn restarts from the
+    new end of speech, since that is what the caller waits from.
+
+    Args:
+        call_id: Identifier of the call, included in every log line.
+        metrics: Histograms the turns are recorded in.
+    """
+
+    def __init__(self, *, call_id: str, metrics: Optional[LatencyMetrics] = None):
+        super().__init__()
+        self._call_id = call_id
+        self._metrics = metrics or latency_metrics
+        self._turn: Optional[_Turn] = None
+        self._turn_count = 0
+        self._vad_frame_id: Optional[int] = None
+        self._finished = False
+
+    async def on_push_frame(self, data: FramePushed):
+        frame = data.frame
+
+        if isinstance(frame, UserStoppedSpeakingFrame):
+            if frame.id != self._vad_frame_id:
+                self._vad_frame_id = frame.id
+                self._start_turn()
+        elif self._turn is None:
+            if isinstance(frame, (EndFrame, CancelFrame)):
+                self._finished = True
+        elif isinstance(frame, TranscriptionFrame):
+            self._turn.mark("stt_final")
+        elif isinstance(frame, LLMTextFrame):
+            self._turn.mark("llm_first_token")
+        elif isinstance(frame, TTSAudioRawFrame):
+            self._turn.mark("tts_first_byte")
+        elif isinstance(frame, BotStartedSpeakingFrame):
+            self._turn.mark("first_audio_out")
+        elif isinstance(frame, StartInterruptionFrame):
+            # Only an interruption of the bot's answer counts for this turn.
+            if "first_audio_out" in self._turn.events:
+                self._turn.mark("interruption")
+        elif isinstance(frame, (EndFrame, CancelFrame)) and not self._finished:
+            self._finished = True
+            self._finish_turn()
+
+    def _start_turn(self):
+        if self._turn and "first_audio_out" not in self._turn.events:
+            # The user kept talking before the bot answered.
+            self._turn = _Turn(self._turn.index)
+        else:
+            self._finish_turn()
+            self._turn_count += 1
+            self._turn = _Turn(self._turn_count)
+        self._turn.mark("vad_end")
+
+    def _finish_turn(self):
+        turn = self._turn
+        self._turn = None
+        if not turn:
+            return
+
+        durations = turn.durations()
+        interrupted = "interruption" in turn.events
+        self._metrics.record_turn(durations, interrupted)
+
+        record = {
+            "call_id": self._call_id,
+            "turn": turn.index,
+            "started_at": round(turn.started_at, 3),
+            "interrupted": interrupted,
+            **{f"{name}_ms": value for name, value in durations.items()},
+        }
+        logger.info(f"Turn latency {json.dumps(record)}")
@@ -0,0 +1,352 @@
+"""Hedged LLM requests routed across OpenAI-compatible endpoints.
+
+The LLM service was pinned to one Groq endpoint and model: when its time to
+first token (TTFT) spiked, every call on the replica stalled mid-turn. The
+router keeps a rolling TTFT per endpoint and sends each completion to the
+endpoint that has been fastest. When the first token is later than that
+endpoint's recent p95, the same request is sent to the next endpoint, and
+whichever answers first is streamed; the other request is closed. Endpoints
+that keep failing are skipped by a circuit breaker.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from loguru import logger
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.services.groq.llm import GroqLLMService
+
+from utils.latency_tracing import LatencyHistogram
+from utils.tts_failover import OPEN, CircuitBreaker, HedgeDeadline
+
+
+class LLMUnavailableError(Exception):
+    """Raised when no endpoint produced a first token in time."""
+
+
+class LLMEndpoint:
+    """An OpenAI-compatible endpoint and the model served from it.
+
+    Args:
+        name: Name used in reports.
+        base_url: The OpenAI-compatible base URL.
+        api_key: API key of the endpoint.
+        model: Model requested from this endpoint.
+        deadline: When a request to this endpoint is hedged.
+        breaker: Circuit breaker of this endpoint.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        base_url: str,
+        api_key: Optional[str],
+        model: str,
+        deadline: Optional[HedgeDeadline] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.model = model
+        self.deadline = deadline or HedgeDeadline()
+        self.breaker = breaker or CircuitBreaker()
+        self.ttft = LatencyHistogram(max_samples=200)
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+        self._api_key = api_key
+        self._client: Optional[AsyncOpenAI] = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # Created on first use, with the same connection limits as the
+        # pipecat OpenAI services.
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=self._api_key,
+                base_url=self.base_url,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_keepalive_connections=100, max_connections=1000, keepalive_expiry=None
+                    )
+                ),
+            )
+        return self._client
+
+    def median_ttft_ms(self) -> Optional[float]:
+        summary = self.ttft.summary()
+        return summary["p50"] if summary["count"] else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "requests": self.requests,
+            "wins": self.wins,
+            "failures": self.failures,
+            "breaker": self.breaker.state,
+            "ttft_ms": self.ttft.summary(),
+            "hedge_deadline_ms": round(1000 * self.deadline.deadline_s(), 1),
+        }
+
+
+class _Attempt:
+    """One completion request, read up to its first chunk."""
+
+    def __init__(self, index: int, endpoint: LLMEndpoint, params: Dict[str, Any]):
+        self.index = index
+        self.endpoint = endpoint
+        self.started_at = time.monotonic()
+        self.stream = None
+        self.iterator = None
+        self.task = asyncio.ensure_future(self._first_chunk(params))
+        endpoint.requests += 1
+
+    async def _first_chunk(self, params: Dict[str, Any]):
+        self.stream = await self.endpoint.client.chat.completions.create(
+            **{**params, "model": self.endpoint.model}
+        )
+        self.iterator = self.stream.__aiter__()
+        async for chunk in self.iterator:
+            return chunk
+        return None
+
+    async def close(self):
+        if not self.task.done():
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        if self.stream is not None:
+            await self.stream.close()
+
+
+class RoutedStream:
+    """The chunks of the winning completion, like the OpenAI ``AsyncStream``."""
+
+    def __init__(self, attempt: _Attempt, first_chunk: Any):
+        self.endpoint = attempt.endpoint.name
+        self._attempt = attempt
+        self._first_chunk = first_chunk
+
+    async def __aiter__(self):
+        yield self._first_chunk
+        async for chunk in self._attempt.iterator:
+            yield chunk
+
+    async def close(self):
+        await self._attempt.close()
+
+
+class LLMRouter:
+    """Routes completions to the fastest endpoint and hedges slow ones.
+
+    Endpoints are tried in order of their median TTFT; endpoints without
+    TTFTs yet keep the given order, so the first one is the primary. The
+    hedge goes to the next endpoint whose breaker is closed. With a single
+    endpoint there is no hedging, and its breaker never blocks requests.
+
+    When the hedge wins, the original request is still read up to its first
+    token (never further) to measure the latency the hedge saved, and then
+    closed.
+
+    Args:
+        endpoints: The endpoints, primary first.
+        first_token_timeout_s: Time without a first token after which the
+            completion fails.
+        hedging: Set to False to only route and use the breakers.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[LLMEndpoint],
+        *,
+        first_token_timeout_s: float = 5.0,
+        hedging: bool = True,
+    ):
+        if not endpoints:
+            raise ValueError("At least one LLM endpoint is required")
+        self._endpoints = list(endpoints)
+        self._first_token_timeout_s = first_token_timeout_s
+        self._hedging = hedging and len(self._endpoints) > 1
+        self._measuring: set = set()
+
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.saved = LatencyHistogram()
+
+    def _ranked(self) -> List[LLMEndpoint]:
+        def key(item):
+            index, endpoint = item
+            median = endpoint.median_ttft_ms()
+            return (endpoint.breaker.state == OPEN, median is None, median or 0.0, index)
+
+        ranked = [endpoint for _, endpoint in sorted(enumerate(self._endpoints), key=key)]
+        available = [endpoint for endpoint in ranked if endpoint.breaker.allow()]
+        # If every breaker is open, the least bad endpoint is still tried.
+        return available or ranked[:1]
+
+    async def stream(self, params: Dict[str, Any]) -> RoutedStream:
+        """Start a streamed completion and return it once it is answering.
+
+        ``params`` are the arguments of ``chat.completions.create``; the
+        model is replaced by the model of the endpoint each attempt goes to.
+
+        Raises:
+            LLMUnavailableError: If no endpoint produced a first chunk.
+        """
+        ranked = self._ranked()
+        start = time.monotonic()
+        hedge_at = start + ranked[0].deadline.deadline_s()
+        attempts: List[_Attempt] = [_Attempt(0, ranked[0], params)]
+        can_hedge = self._hedging and len(ranked) > 1
+        winner: Optional[_Attempt] = None
+        error: Optional[BaseException] = None
+
+        try:
+            while winner is None:
+                now = time.monotonic()
+                pending = [a.task for a in attempts if not a.task.done()]
+                # Hedge a slow first attempt, or fail over from a failed one.
+                if can_hedge and len(attempts) == 1 and (now >= hedge_at or not pending):
+                    self._start_hedge(attempts, ranked[1], params)
+                    continue
+                if not pending:
+                    break
+
+                remaining_s = start + self._first_token_timeout_s - now
+                if remaining_s <= 0:
+                    error = asyncio.TimeoutError(f"no token after {self._first_token_timeout_s}s")
+                    for attempt in attempts:
+                        if not attempt.task.done():
+                            self._record_failure(attempt, error)
+                    break
+                if can_hedge and len(attempts) == 1:
+                    remaining_s = min(remaining_s, hedge_at - now)
+                done, _ = await asyncio.wait(
+                    pending, timeout=remaining_s, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for attempt in attempts:
+                    if attempt.task not in done:
+                        continue
+                    if attempt.task.exception():
+                        error = attempt.task.exception()
+                        self._record_failure(attempt, error)
+                    elif attempt.task.result() is None:
+                        error = LLMUnavailableError("empty response")
+                        self._record_failure(attempt, error)
+                    elif winner is None:
+                        winner = attempt
+        finally:
+            for attempt in attempts:
+                if attempt is winner:
+                    continue
+                if winner is not None and winner.index == 1 and not attempt.task.done():
+                    self._measure_saving(attempt, 1000 * (time.monotonic() - start))
+                else:
+                    await attempt.close()
+
+        if winner is None:
+            raise LLMUnavailableError(f"No LLM endpoint answered: {error}") from error
+
+        ttft_s = time.monotonic() - winner.started_at
+        endpoint = winner.endpoint
+        endpoint.breaker.record_success()
+        endpoint.deadline.observe(ttft_s)
+        endpoint.ttft.observe(1000 * ttft_s)
+        endpoint.wins += 1
+        if winner.index == 1:
+            self.hedge_wins += 1
+        logger.debug(
+            f"LLM completion served by {endpoint.name} "
+            f"(first token {1000 * (time.monotonic() - start):.0f}ms"
+            f"{', hedged' if len(attempts) > 1 else ''})"
+        )
+        return RoutedStream(winner, winner.task.result())
+
+    def _start_hedge(self, attempts: List[_Attempt], endpoint: LLMEndpoint, params: Dict[str, Any]):
+        elapsed_ms = 1000 * (time.monotonic() - attempts[0].started_at)
+        logger.debug(
+            f"Hedging the {attempts[0].endpoint.name} completion to {endpoint.name} "
+            f"after {elapsed_ms:.0f}ms"
+        )
+        attempts.append(_Attempt(1, endpoint, params))
+        self.hedges += 1
+
+    def _record_failure(self, attempt: _Attempt, error: BaseException):
+        logger.warning(f"LLM endpoint {attempt.endpoint.name} failed: {error}")
+        attempt.endpoint.failures += 1
+        attempt.endpoint.breaker.record_failure()
+
+    def _measure_saving(self, attempt: _Attempt, winner_ms: float):
+        async def measure():
+            try:
+                first_chunk = await asyncio.wait_for(
+                    asyncio.shield(attempt.task), self._first_token_timeout_s - winner_ms / 1000
+                )
+            except asyncio.TimeoutError:
+                # Too slow to answer at all: the hedge saved at least this much.
+                first_chunk = None
+                ttft_ms = 1000 * self._first_token_timeout_s
+            except Exception as e:
+                self._record_failure(attempt, e)
+                return
+            else:
+                ttft_ms = 1000 * (time.monotonic() - attempt.started_at)
+            finally:
+                await attempt.close()
+
+            if first_chunk is not None:
+                attempt.endpoint.ttft.observe(ttft_ms)
+                attempt.endpoint.deadline.observe(ttft_ms / 1000)
+            self.saved.observe(max(0.0, ttft_ms - winner_ms))
+
+        task = asyncio.ensure_future(measure())
+        self._measuring.add(task)
+        task.add_done_callback(self._measuring.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoints": {endpoint.name: endpoint.stats() for endpoint in self._endpoints},
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_saved_ms": self.saved.summary(),
+        }
+
+
+class RoutedGroqLLMService(GroqLLMService):
+    """The Groq LLM service, with completions sent through an ``LLMRouter``.
+
+    Completions for the pipeline and for speculative replies both go through
+    ``get_chat_completions``, so both are routed and hedged. The router is
+    shared by all calls, since endpoint latency is.
+
+    Args:
+        router: Routes and hedges the completions.
+        **kwargs: Passed to ``GroqLLMService``.
+    """
+
+    def __init__(self, *, router: LLMRouter, **kwargs):
+        super().__init__(**kwargs)
+        self._router = router
+
+    async def get_chat_completions(self, context: OpenAILLMContext, messages: List[dict]):
+        params = {
+            "stream": True,
+            "messages": messages,
+            "tools": context.tools,
+            "tool_choice": context.tool_choice,
+            "stream_options": {"include_usage": True},
+            "frequency_penalty": self._settings["frequency_penalty"],
+            "presence_penalty": self._settings["presence_penalty"],
+            "seed": self._settings["seed"],
+            "temperature": self._settings["temperature"],
+            "top_p": self._settings["top_p"],
+            "max_tokens": self._settings["max_tokens"],
+            "max_completion_tokens": self._settings["max_completion_tokens"],
+        }
+        params.update(self._settings["extra"])
+        return await self._router.stream(params)
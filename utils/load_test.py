@@ -0,0 +1,372 @@
+"""Offline load test: how many calls one replica holds at the latency target.
+
+Calls run the bot's real pipeline (``bot.build_bot_task``) on a
+``LocalCallTransport``, with recorded Kannada utterances as the caller and
+the local mock Groq and Bhashini servers in a separate process. The number
+of concurrent calls is ramped in levels; each level is held for a while,
+with a new call starting whenever one hangs up. Every level reports:
+
+* the caller-perceived turn latency (end of speech to first bot audio)
+  and the per-stage latencies of the turn tracer,
+* event-loop lag,
+* CPU and resident memory per call,
+* throughput in completed turns per second.
+
+The knee is the last level where adding calls still adds throughput almost
+linearly; past it, calls mostly queue. ``max_calls_at_target`` is the last
+level whose p95 turn latency meets the target.
+
+Usage::
+
+    python -m utils.load_test --audio caller1.wav caller2.wav caller3.wav \\
+        --levels 1,2,4,8,16,32 --hold-s 60 --latency-target-ms 1500
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import wave
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from pipecat.pipeline.runner import PipelineRunner
+from pipecat.transports.base_transport import TransportParams
+
+from utils.admission import LoopLagMonitor
+from utils.call_audio import CallAudioFormat
+from utils.latency_tracing import LatencyHistogram, LatencyMetrics
+from utils.local_transport import LocalCallTransport, SimulatedCaller
+from utils.mock_services import add_mock_arguments, mock_kwargs, run_mock_services
+from utils.resampler import resample_pcm
+
+SAMPLE_RATE = 16000
+
+
+def load_utterances(paths: Sequence[str]) -> List[bytes]:
+    """Read the caller's utterances from 16 kHz mono 16-bit WAV files."""
+    utterances = []
+    for path in paths:
+        with wave.open(path, "rb") as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                raise ValueError(f"{path} must be 16 kHz mono 16-bit PCM")
+            utterances.append(wav.readframes(wav.getnframes()))
+    return utterances
+
+
+def rss_bytes() -> int:
+    """Current resident memory of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current outside Linux (kilobytes on Linux, bytes on macOS).
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+async def _wait_for_port(port: int, timeout_s: float = 10.0):
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Mock services did not start on port {port}")
+            await asyncio.sleep(0.1)
+
+
+class LoadTest:
+    """Runs the ramp against the bot pipeline.
+
+    Args:
+        utterances: Caller utterances, said in order on every call, at the
+            sample rate of ``audio_format``.
+        audio_format: Audio format of the calls, as negotiated for phone calls.
+        model_path: Local path of the warm Whisper model.
+        hold_s: How long each level runs.
+        reply_gap_s: Bot silence after which the caller speaks again.
+        reply_timeout_s: How long a caller waits for a reply.
+    """
+
+    def __init__(
+        self,
+        *,
+        utterances: Sequence[bytes],
+        audio_format: CallAudioFormat,
+        model_path: str,
+        hold_s: float,
+        reply_gap_s: float = 0.8,
+        reply_timeout_s: float = 15.0,
+    ):
+        self._utterances = utterances
+        self._audio_format = audio_format
+        self._model_path = model_path
+        self._hold_s = hold_s
+        self._reply_gap_s = reply_gap_s
+        self._reply_timeout_s = reply_timeout_s
+        self._call_ids = itertools.count(1)
+
+    async def _run_call(self, results: Dict[str, Any], turn_metrics: LatencyMetrics) -> None:
+        # Imported late: the bot reads the mock URLs from the environment.
+        from bot import build_bot_task, call_transport_params
+
+        call_id = f"load-{next(self._call_ids)}"
+        caller = SimulatedCaller(
+            self._utterances,
+            sample_rate=self._audio_format.sample_rate,
+            reply_gap_s=self._reply_gap_s,
+            reply_timeout_s=self._reply_timeout_s,
+            caller_id=call_id,
+        )
+        transport_params = call_transport_params(TransportParams, call_id=call_id)
+        transport = LocalCallTransport(caller, transport_params)
+        task, start_conversation = build_bot_task(
+            transport,
+            call_id,
+            self._model_path,
+            audio_format=self._audio_format,
+            turn_metrics=turn_metrics,
+        )
+
+        @transport.event_handler("on_first_participant_joined")
+        async def on_first_participant_joined(transport, participant):
+            await start_conversation()
+
+        @transport.event_handler("on_participant_left")
+        async def on_participant_left(transport, participant, reason):
+            await task.cancel()
+
+        try:
+            await PipelineRunner(handle_sigint=False).run(task)
+        except asyncio.CancelledError:
+            await task.cancel()
+            raise
+        finally:
+            transport_params.vad_analyzer.close()
+            results["turn_latencies_ms"].extend(caller.turn_latencies_ms)
+            if caller.greeting_ms is not None:
+                results["greeting_ms"].append(caller.greeting_ms)
+            results["timeouts"] += caller.timeouts
+            if caller.finished.is_set():
+                results["completed_calls"] += 1
+
+    async def _call_slot(
+        self, deadline: float, results: Dict[str, Any], turn_metrics: LatencyMetrics
+    ):
+        # Keep one call running until the level ends.
+        while time.monotonic() < deadline:
+            try:
+                await self._run_call(results, turn_metrics)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Simulated call failed: {e}")
+                results["failed_calls"] += 1
+                await asyncio.sleep(1)
+
+    async def run_level(self, calls: int) -> Dict[str, Any]:
+        """Hold ``calls`` concurrent calls for ``hold_s`` and measure them."""
+        results: Dict[str, Any] = {
+            "turn_latencies_ms": [],
+            "greeting_ms": [],
+            "timeouts": 0,
+            "completed_calls": 0,
+            "failed_calls": 0,
+        }
+        turn_metrics = LatencyMetrics()
+        lag = LatencyHistogram()
+        lag_task = asyncio.create_task(LoopLagMonitor(histogram=lag).run())
+
+        baseline_rss = rss_bytes()
+        peak_rss = baseline_rss
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        deadline = time.monotonic() + self._hold_s
+
+        slots = [
+            asyncio.create_task(self._call_slot(deadline, results, turn_metrics))
+            for _ in range(calls)
+        ]
+        while time.monotonic() < deadline:
+            await asyncio.sleep(1)
+            peak_rss = max(peak_rss, rss_bytes())
+
+        # Calls still running at the end of the level are hung up.
+        for slot in slots:
+            slot.cancel()
+        await asyncio.gather(*slots, return_exceptions=True)
+        wall_s = time.perf_counter() - wall_start
+        cpu_s = time.process_time() - cpu_start
+        lag_task.cancel()
+
+        turns = LatencyHistogram()
+        for value in results["turn_latencies_ms"]:
+            turns.observe(value)
+        greetings = LatencyHistogram()
+        for value in results["greeting_ms"]:
+            greetings.observe(value)
+
+        return {
+            "calls": calls,
+            "wall_s": round(wall_s, 1),
+            "turns": len(results["turn_latencies_ms"]),
+            "throughput_turns_per_s": round(len(results["turn_latencies_ms"]) / wall_s, 3),
+            "turn_latency_ms": turns.summary(),
+            "greeting_latency_ms": greetings.summary(),
+            "stages_ms": turn_metrics.stats()["stages_ms"],
+            "reply_timeouts": results["timeouts"],
+            "completed_calls": results["completed_calls"],
+            "failed_calls": results["failed_calls"],
+            "loop_lag_ms": lag.summary(),
+            "cpu_cores": round(cpu_s / wall_s, 3),
+            "cpu_per_call": round(cpu_s / wall_s / calls, 3),
+            "rss_mb": round(peak_rss / 2**20, 1),
+            "rss_mb_per_call": round((peak_rss - baseline_rss) / 2**20 / calls, 2),
+        }
+
+
+def find_knee(levels: List[Dict[str, Any]], efficiency: float) -> Optional[int]:
+    """The last level whose throughput still scales with the call count.
+
+    Throughput per call is compared with the first level's; the knee is the
+    last level before it drops below ``efficiency`` of that.
+    """
+    if not levels or not levels[0]["throughput_turns_per_s"]:
+        return None
+    per_call = levels[0]["throughput_turns_per_s"] / levels[0]["calls"]
+    knee = None
+    for level in levels:
+        if level["throughput_turns_per_s"] / level["calls"] < efficiency * per_call:
+            break
+        knee = level["calls"]
+    return knee
+
+
+def max_calls_at_target(levels: List[Dict[str, Any]], target_ms: float) -> Optional[int]:
+    """The last level whose p95 turn latency meets ``target_ms``."""
+    best = None
+    for level in levels:
+        p95 = level["turn_latency_ms"].get("p95")
+        if p95 is None or p95 > target_ms:
+            break
+        best = level["calls"]
+    return best
+
+
+def print_level(level: Dict[str, Any]):
+    latency = level["turn_latency_ms"]
+    lag = level["loop_lag_ms"]
+    print(
+        f"{level['calls']:>5} calls | {level['turns']:>5} turns "
+        f"{level['throughput_turns_per_s']:>7.2f}/s | "
+        f"turn p50 {latency.get('p50', '-')} p95 {latency.get('p95', '-')} "
+        f"p99 {latency.get('p99', '-')} ms | "
+        f"lag p95 {lag.get('p95', '-')} ms | "
+        f"CPU {level['cpu_per_call']:.3f} cores/call | "
+        f"RSS {level['rss_mb_per_call']:.1f} MB/call | "
+        f"timeouts {level['reply_timeouts']}"
+    )
+
+
+async def main(args):
+    # Point the bot at the mocks before it is imported.
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.mock_port}/openai/v1"
+    os.environ["TTS_BASE_URL"] = f"http://127.0.0.1:{args.mock_port}/v1"
+    os.environ.setdefault("GROQ_API_KEY", "load-test")
+
+    mocks = multiprocessing.Process(
+        target=run_mock_services, kwargs=mock_kwargs(args), daemon=True
+    )
+    mocks.start()
+
+    from bot import CALL_AUDIO, prerender_script_phrases, render_greetings, whisper_warmup
+    from utils.http_pool import http_pool
+    from utils.stt_scheduler import stt_scheduler
+    from utils.transcode_pool import transcode_pool
+
+    # The bot logs every frame at DEBUG; keep the load test readable.
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    try:
+        await _wait_for_port(args.mock_port)
+        model_path = await whisper_warmup.wait_ready()
+        await render_greetings()
+        await prerender_script_phrases()
+
+        # The callers sound like the phone line: 8 kHz unless configured otherwise.
+        utterances = [
+            resample_pcm(utterance, SAMPLE_RATE, CALL_AUDIO.sample_rate)
+            for utterance in load_utterances(args.audio)
+        ]
+        load_test = LoadTest(
+            utterances=utterances,
+            audio_format=CALL_AUDIO,
+            model_path=model_path,
+            hold_s=args.hold_s,
+            reply_gap_s=args.reply_gap_s,
+            reply_timeout_s=args.reply_timeout_s,
+        )
+
+        levels = []
+        for calls in args.levels:
+            level = await load_test.run_level(calls)
+            levels.append(level)
+            print_level(level)
+            p95 = level["turn_latency_ms"].get("p95")
+            if p95 is not None and p95 > args.abort_factor * args.latency_target_ms:
+                print(f"p95 turn latency {p95}ms is far past the target, stopping the ramp")
+                break
+
+        report = {
+            "levels": levels,
+            "knee_calls": find_knee(levels, args.knee_efficiency),
+            "max_calls_at_target": max_calls_at_target(levels, args.latency_target_ms),
+            "latency_target_ms": args.latency_target_ms,
+        }
+        print(f"Throughput knee: {report['knee_calls']} calls")
+        print(
+            f"Max calls with p95 turn latency <= {args.latency_target_ms:.0f}ms: "
+            f"{report['max_calls_at_target']}"
+        )
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+    finally:
+        await stt_scheduler.stop()
+        transcode_pool.shutdown()
+        await http_pool.close()
+        mocks.terminate()
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline load test of the voice bot")
+    parser.add_argument("--audio", nargs="+", required=True, help="16 kHz mono WAV utterances")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Concurrent calls per level")
+    parser.add_argument("--hold-s", type=float, default=60.0, help="Duration of each level")
+    parser.add_argument("--reply-gap-s", type=float, default=0.8)
+    parser.add_argument("--reply-timeout-s", type=float, default=15.0)
+    parser.add_argument("--latency-target-ms", type=float, default=1500.0)
+    parser.add_argument("--knee-efficiency", type=float, default=0.8)
+    parser.add_argument(
+        "--abort-factor", type=float, default=4.0, help="Stop once p95 exceeds this times the target"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Write the report as JSON")
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+    args.levels = [int(n) for n in args.levels.split(",")]
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
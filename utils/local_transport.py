@@ -0,0 +1,265 @@
+"""A local stand-in for the Daily transport, driven by recorded caller audio.
+
+Load tests need calls without phone traffic. ``LocalCallTransport`` gives
+the bot pipeline the same audio input and output it has on a Daily SIP call,
+but the caller is a ``SimulatedCaller`` that plays recorded utterances in
+real time and waits for the bot to answer each one. Bot audio is consumed
+at playback speed, as a phone line would.
+"""
+
+import asyncio
+import time
+from typing import List, Optional, Sequence
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    InputAudioRawFrame,
+    OutputAudioRawFrame,
+    StartFrame,
+    StartInterruptionFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection
+from pipecat.transports.base_input import BaseInputTransport
+from pipecat.transports.base_output import BaseOutputTransport
+from pipecat.transports.base_transport import BaseTransport, TransportParams
+
+# Audio is sent in 20 ms packets, like RTP on a phone call.
+FRAME_MS = 20
+
+
+class SimulatedCaller:
+    """A caller that says recorded utterances and waits for the replies.
+
+    The caller first waits for the greeting, then says each utterance, and
+    after each one waits until the bot has been quiet for ``reply_gap_s``
+    after answering. Silence is sent between utterances so the VAD sees the
+    end of speech. The time from the end of an utterance to the first bot
+    audio is the turn latency the caller experiences.
+
+    Args:
+        utterances: 16-bit mono PCM of each utterance, at ``sample_rate``.
+        sample_rate: Sample rate of the utterances.
+        reply_gap_s: Bot silence after which its reply counts as finished.
+        reply_timeout_s: How long to wait for a reply before moving on.
+        caller_id: Participant id reported to the bot.
+    """
+
+    def __init__(
+        self,
+        utterances: Sequence[bytes],
+        *,
+        sample_rate: int = 16000,
+        reply_gap_s: float = 0.8,
+        reply_timeout_s: float = 15.0,
+        caller_id: str = "caller",
+    ):
+        self.sample_rate = sample_rate
+        self.caller_id = caller_id
+        self._utterances = list(utterances)
+        self._reply_gap_s = reply_gap_s
+        self._reply_timeout_s = reply_timeout_s
+
+        self.turn_latencies_ms: List[float] = []
+        self.greeting_ms: Optional[float] = None
+        self.timeouts = 0
+        self.finished = asyncio.Event()
+
+        self._next_utterance = 0
+        self._speaking: Optional[memoryview] = None
+        self._offset = 0
+        self._waiting_since = time.monotonic()
+        self._awaiting_reply = True
+        self._last_bot_audio: Optional[float] = None
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.sample_rate * FRAME_MS // 1000 * 2
+
+    def joined(self):
+        """The call started; the caller now waits for the greeting."""
+        self._waiting_since = time.monotonic()
+        self._awaiting_reply = True
+
+    def next_frame(self) -> bytes:
+        """The caller's next 20 ms of audio."""
+        if self._speaking is None:
+            self._maybe_start_utterance()
+
+        if self._speaking is None:
+            return bytes(self.frame_bytes)
+
+        chunk = bytes(self._speaking[self._offset : self._offset + self.frame_bytes])
+        self._offset += self.frame_bytes
+        if self._offset >= len(self._speaking):
+            # The caller stopped talking; the turn latency starts now.
+            self._speaking = None
+            self._waiting_since = time.monotonic()
+            self._awaiting_reply = True
+            self._last_bot_audio = None
+        return chunk.ljust(self.frame_bytes, b"\0")
+
+    def bot_audio(self):
+        """The bot played audio to the caller."""
+        now = time.monotonic()
+        if self._awaiting_reply:
+            self._awaiting_reply = False
+            latency_ms = 1000 * (now - self._waiting_since)
+            if self.greeting_ms is None and self._next_utterance == 0:
+                self.greeting_ms = latency_ms
+            else:
+                self.turn_latencies_ms.append(latency_ms)
+        self._last_bot_audio = now
+
+    def _maybe_start_utterance(self):
+        now = time.monotonic()
+        if self._awaiting_reply:
+            if now - self._waiting_since < self._reply_timeout_s:
+                return
+            logger.warning(f"Caller {self.caller_id}: no reply after {self._reply_timeout_s}s")
+            self.timeouts += 1
+            self._awaiting_reply = False
+        elif self._last_bot_audio is not None and now - self._last_bot_audio < self._reply_gap_s:
+            return
+
+        if self._next_utterance >= len(self._utterances):
+            self.finished.set()
+            return
+        self._speaking = memoryview(self._utterances[self._next_utterance])
+        self._next_utterance += 1
+        self._offset = 0
+
+
+class LocalCallInputTransport(BaseInputTransport):
+    """Feeds the caller's audio into the pipeline in real time."""
+
+    def __init__(
+        self,
+        transport: "LocalCallTransport",
+        caller: SimulatedCaller,
+        params: TransportParams,
+        **kwargs,
+    ):
+        super().__init__(params, **kwargs)
+        self._transport = transport
+        self._caller = caller
+        self._feed_task: Optional[asyncio.Task] = None
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        if self.sample_rate != self._caller.sample_rate:
+            raise ValueError(
+                f"Caller audio is {self._caller.sample_rate} Hz, "
+                f"the pipeline expects {self.sample_rate} Hz"
+            )
+        await self.set_transport_ready(frame)
+        if not self._feed_task:
+            self._feed_task = self.create_task(self._feed())
+            self._caller.joined()
+            await self._transport.participant_joined()
+
+    async def stop(self, frame: EndFrame):
+        await self._stop_feed()
+        await super().stop(frame)
+
+    async def cancel(self, frame: CancelFrame):
+        await self._stop_feed()
+        await super().cancel(frame)
+
+    async def _stop_feed(self):
+        if self._feed_task:
+            await self.cancel_task(self._feed_task)
+            self._feed_task = None
+
+    async def _feed(self):
+        # Paced against the clock so a slow event loop doesn't slow the
+        # caller down, like a real phone line.
+        next_time = time.monotonic()
+        while not self._caller.finished.is_set():
+            await self.push_audio_frame(
+                InputAudioRawFrame(
+                    audio=self._caller.next_frame(), sample_rate=self.sample_rate, num_channels=1
+                )
+            )
+            next_time += FRAME_MS / 1000
+            await asyncio.sleep(max(0.0, next_time - time.monotonic()))
+        await self._transport.participant_left("hangup")
+
+
+class LocalCallOutputTransport(BaseOutputTransport):
+    """Plays the bot's audio to the caller at playback speed."""
+
+    def __init__(self, caller: SimulatedCaller, params: TransportParams, **kwargs):
+        super().__init__(params, **kwargs)
+        self._caller = caller
+        self._next_send_time = 0.0
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, StartInterruptionFrame):
+            self._next_send_time = 0.0
+
+    async def write_audio_frame(self, frame: OutputAudioRawFrame):
+        if frame.audio:
+            self._caller.bot_audio()
+        # Block for the duration of the chunk, like an audio device.
+        duration_s = len(frame.audio) / (2 * frame.num_channels * frame.sample_rate)
+        now = time.monotonic()
+        if self._next_send_time <= now:
+            self._next_send_time = now
+        self._next_send_time += duration_s
+        await asyncio.sleep(self._next_send_time - now)
+
+
+class LocalCallTransport(BaseTransport):
+    """Transport of one simulated call.
+
+    Fires ``on_first_participant_joined`` when the pipeline starts and
+    ``on_participant_left`` when the caller has said all utterances, with
+    the same arguments as ``DailyTransport``.
+
+    Args:
+        caller: The simulated caller.
+        params: Transport parameters, as for the Daily transport.
+    """
+
+    def __init__(self, caller: SimulatedCaller, params: TransportParams, **kwargs):
+        super().__init__(**kwargs)
+        self._caller = caller
+        self._params = params
+        self._input: Optional[LocalCallInputTransport] = None
+        self._output: Optional[LocalCallOutputTransport] = None
+
+        self._register_event_handler("on_first_participant_joined")
+        self._register_event_handler("on_participant_left")
+
+    @property
+    def caller(self) -> SimulatedCaller:
+        return self._caller
+
+    def input(self) -> LocalCallInputTransport:
+        if not self._input:
+            self._input = LocalCallInputTransport(
+                self, self._caller, self._params, name=self._input_name
+            )
+        return self._input
+
+    def output(self) -> LocalCallOutputTransport:
+        if not self._output:
+            self._output = LocalCallOutputTransport(
+                self._caller, self._params, name=self._output_name
+            )
+        return self._output
+
+    async def participant_joined(self):
+        await self._call_event_handler("on_first_participant_joined", {"id": self._caller.caller_id})
+
+    async def participant_left(self, reason: str):
+        await self._call_event_handler("on_participant_left", {"id": self._caller.caller_id}, reason)
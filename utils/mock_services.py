@@ -0,0 +1,246 @@
+"""Local mock servers for the Groq LLM and the Bhashini TTS APIs.
+
+Load tests must not depend on, pay for or be rate-limited by the real APIs,
+but the bot's latency depends on theirs. The mocks answer with the same
+wire format (OpenAI-compatible streamed chat completions, and MP3 from
+``/synthesize``) after a configurable latency with jitter, so the bot runs
+unchanged against ``GROQ_BASE_URL`` and ``TTS_BASE_URL`` pointing here.
+
+Run standalone with ``python -m utils.mock_services``.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict
+
+from aiohttp import web
+from loguru import logger
+
+# Bhashini voices speak Kannada at roughly this many characters per second.
+CHARS_PER_SECOND = 14
+# Synthesized durations are rounded to this, so few MP3s have to be encoded.
+DURATION_STEP_MS = 250
+
+DEFAULT_REPLY = "ಸರಿ, ನಿಮ್ಮ ದೂರನ್ನು ದಾಖಲಿಸಿಕೊಳ್ಳುತ್ತೇನೆ. ದಯವಿಟ್ಟು ನಿಮ್ಮ ವಿಳಾಸವನ್ನು ತಿಳಿಸಿ."
+
+
+@dataclass
+class LatencyProfile:
+    """A latency in milliseconds with normally distributed jitter."""
+
+    latency_ms: float
+    jitter_ms: float = 0.0
+
+    def sample_s(self) -> float:
+        return max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+
+
+class MockGroqServer:
+    """OpenAI-compatible ``/openai/v1/chat/completions`` with a fixed reply.
+
+    Args:
+        ttft: Time to the first token.
+        tokens_per_s: Streaming rate after the first token.
+        reply: The text every completion returns.
+    """
+
+    def __init__(
+        self, *, ttft: LatencyProfile, tokens_per_s: float = 300.0, reply: str = DEFAULT_REPLY
+    ):
+        self._ttft = ttft
+        self._tokens_per_s = tokens_per_s
+        self._reply = reply
+        self.requests = 0
+
+    def add_routes(self, app: web.Application):
+        app.router.add_post("/openai/v1/chat/completions", self._chat_completions)
+
+    def _chunk(self, completion_id: str, model: str, delta: Dict, finish_reason=None) -> bytes:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode()
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        model = body.get("model", "mock")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        tokens = [word + " " for word in self._reply.split()]
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+
+        await asyncio.sleep(self._ttft.sample_s())
+
+        if not body.get("stream"):
+            return web.json_response(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": self._reply},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(tokens),
+                        "total_tokens": prompt_tokens + len(tokens),
+                    },
+                }
+            )
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(self._chunk(completion_id, model, {"role": "assistant", "content": ""}))
+        for token in tokens:
+            await response.write(self._chunk(completion_id, model, {"content": token}))
+            await asyncio.sleep(1 / self._tokens_per_s)
+        await response.write(self._chunk(completion_id, model, {}, "stop"))
+
+        if body.get("stream_options", {}).get("include_usage"):
+            usage = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens),
+                },
+            }
+            await response.write(f"data: {json.dumps(usage)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+class MockBhashiniServer:
+    """Bhashini ``/synthesize``: returns an MP3 tone as long as the speech.
+
+    Args:
+        first_byte: Time to the first byte of the MP3.
+        bytes_per_s: Download rate of the MP3 body after the first byte.
+        chunk_size: Size of the streamed body chunks.
+    """
+
+    def __init__(
+        self, *, first_byte: LatencyProfile, bytes_per_s: float = 64000, chunk_size: int = 2048
+    ):
+        self._first_byte = first_byte
+        self._bytes_per_s = bytes_per_s
+        self._chunk_size = chunk_size
+        self._mp3: Dict[int, bytes] = {}
+        self.requests = 0
+
+    def add_routes(self, app: web.Application):
+        app.router.add_post("/v1/synthesize", self._synthesize)
+
+    def _encode(self, duration_ms: int) -> bytes:
+        from pydub.generators import Sine
+
+        if duration_ms not in self._mp3:
+            audio = Sine(220).to_audio_segment(duration=duration_ms, volume=-20.0)
+            audio = audio.set_frame_rate(22050).set_channels(1)
+            buffer = io.BytesIO()
+            audio.export(buffer, format="mp3")
+            self._mp3[duration_ms] = buffer.getvalue()
+        return self._mp3[duration_ms]
+
+    async def _synthesize(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        payload = await request.json()
+        text = payload.get("text", "")
+        if not text:
+            return web.Response(status=400, text="Empty text")
+
+        duration_ms = 1000 * len(text) / CHARS_PER_SECOND
+        duration_ms = max(1, round(duration_ms / DURATION_STEP_MS)) * DURATION_STEP_MS
+        mp3 = await asyncio.to_thread(self._encode, duration_ms)
+
+        await asyncio.sleep(self._first_byte.sample_s())
+
+        response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+        response.content_length = len(mp3)
+        await response.prepare(request)
+        for i in range(0, len(mp3), self._chunk_size):
+            await response.write(mp3[i : i + self._chunk_size])
+            await asyncio.sleep(self._chunk_size / self._bytes_per_s)
+        await response.write_eof()
+        return response
+
+
+def create_app(groq: MockGroqServer, bhashini: MockBhashiniServer) -> web.Application:
+    app = web.Application()
+    groq.add_routes(app)
+    bhashini.add_routes(app)
+    return app
+
+
+def run_mock_services(
+    *,
+    port: int,
+    llm_ttft_ms: float,
+    llm_jitter_ms: float,
+    llm_tokens_per_s: float,
+    llm_reply: str,
+    tts_latency_ms: float,
+    tts_jitter_ms: float,
+):
+    """Serve both mocks on ``port`` until the process is stopped.
+
+    Groq is then at ``http://127.0.0.1:{port}/openai/v1`` and Bhashini at
+    ``http://127.0.0.1:{port}/v1``. Meant to run in its own process, so the
+    mocks don't use the CPU being measured.
+    """
+    groq = MockGroqServer(
+        ttft=LatencyProfile(llm_ttft_ms, llm_jitter_ms),
+        tokens_per_s=llm_tokens_per_s,
+        reply=llm_reply,
+    )
+    bhashini = MockBhashiniServer(first_byte=LatencyProfile(tts_latency_ms, tts_jitter_ms))
+    logger.info(f"Mock Groq and Bhashini servers on port {port}")
+    web.run_app(create_app(groq, bhashini), host="127.0.0.1", port=port, print=None)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--mock-port", type=int, default=18080)
+    parser.add_argument("--llm-ttft-ms", type=float, default=350.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=300.0)
+    parser.add_argument("--llm-reply", default=DEFAULT_REPLY)
+    parser.add_argument("--tts-latency-ms", type=float, default=300.0)
+    parser.add_argument("--tts-jitter-ms", type=float, default=100.0)
+
+
+def mock_kwargs(args) -> Dict:
+    return {
+        "port": args.mock_port,
+        "llm_ttft_ms": args.llm_ttft_ms,
+        "llm_jitter_ms": args.llm_jitter_ms,
+        "llm_tokens_per_s": args.llm_tokens_per_s,
+        "llm_reply": args.llm_reply,
+        "tts_latency_ms": args.tts_latency_ms,
+        "tts_jitter_ms": args.tts_jitter_ms,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Groq and Bhashini servers")
+    add_mock_arguments(parser)
+    run_mock_services(**mock_kwargs(parser.parse_args()))
@@ -0,0 +1,260 @@
+"""Local, checksum-verified model cache and background model warm-up."""
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+from huggingface_hub import snapshot_download
+from huggingface_hub.utils import LocalEntryNotFoundError
+from loguru import logger
+
+from utils.stt_scheduler import transcribe_batch
+from utils.whisper_registry import WhisperModelRegistry, model_registry
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_GIT_SHA1_RE = re.compile(r"^[0-9a-f]{40}$")
+
+
+def _file_digest(path: str, algorithm: str, prefix: bytes = b"") -> str:
+    digest = hashlib.new(algorithm)
+    digest.update(prefix)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verify_snapshot(snapshot_path: str) -> bool:
+    """Check every file of a Hugging Face cache snapshot against its checksum.
+
+    Snapshot files are symlinks to blobs named after their hash: the SHA-256
+    for LFS files and the git blob SHA-1 for regular files. Recomputing the
+    hash catches truncated downloads and corrupted disks without contacting
+    the Hub.
+
+    Caches without symlinks (``HF_HUB_DISABLE_SYMLINKS`` or filesystems that
+    don't support them) hold plain copies whose names carry no hash. Such
+    files can't be verified and are accepted as they are; only an empty
+    snapshot fails.
+    """
+    found = 0
+    checked = 0
+    for root, _, files in os.walk(snapshot_path):
+        for name in files:
+            path = os.path.join(root, name)
+            found += 1
+            if not os.path.exists(path):
+                logger.warning(f"Broken model file in cache: {path}")
+                return False
+
+            blob = os.path.basename(os.path.realpath(path))
+            if _SHA256_RE.match(blob):
+                actual = _file_digest(path, "sha256")
+            elif _GIT_SHA1_RE.match(blob):
+                actual = _file_digest(path, "sha1", b"blob %d\0" % os.path.getsize(path))
+            else:
+                continue
+
+            if actual != blob:
+                logger.warning(f"Checksum mismatch for {path}")
+                return False
+            checked += 1
+
+    if found and not checked:
+        logger.info(f"Model files in {snapshot_path} are not named by hash; not verifying them")
+    return found > 0
+
+
+def ensure_local_model(
+    repo_id: str,
+    *,
+    revision: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    token: Optional[str] = None,
+) -> str:
+    """Return the path of a verified local copy of ``repo_id``.
+
+    The local cache is used when it is complete and its checksums match;
+    the model is only downloaded when it is missing or corrupted.
+    """
+    path = None
+    try:
+        path = snapshot_download(
+            repo_id=repo_id,
+            revision=revision,
+            cache_dir=cache_dir,
+            token=token,
+            local_files_only=True,
+        )
+    except LocalEntryNotFoundError:
+        logger.info(f"Model {repo_id} not cached locally, downloading")
+
+    if path and verify_snapshot(path):
+        logger.info(f"Using cached model {repo_id} from {path}")
+        return path
+
+    path = snapshot_download(
+        repo_id=repo_id,
+        revision=revision,
+        cache_dir=cache_dir,
+        token=token,
+        # Only force a fresh download when the cached copy is corrupted.
+        force_download=path is not None,
+    )
+    if not verify_snapshot(path):
+        raise RuntimeError(f"Downloaded model {repo_id} failed checksum verification")
+    return path
+
+
+def synthetic_speech(seconds: float = 2.0, sample_rate: int = 16000) -> np.ndarray:
+    """A voiced-sounding test signal: a gliding harmonic tone with light noise."""
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    pitch = 120 + 40 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    audio = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 * (1 - np.cos(2 * np.pi * 3 * t))
+    noise = np.random.default_rng(0).standard_normal(len(t)) * 0.01
+    return (0.2 * audio * envelope + noise).astype(np.float32)
+
+
+class ModelWarmup:
+    """Loads and warms the Whisper model in the background.
+
+    Resolving the model from the local cache, loading it into the registry
+    (pinned, so it is never evicted) and running a warm-up inference happens
+    in a worker thread. Until that finishes ``ready`` is False, which the
+    readiness endpoint reports so the platform does not route calls to a
+    replica whose models are still cold.
+
+    A failed download or load is retried with exponential backoff, so a
+    replica recovers from a transient Hub or GPU error instead of staying
+    not ready for good. Meanwhile ``wait_ready`` fails with the last error.
+
+    Args:
+        repo_id: Hugging Face repository of the CTranslate2 Whisper model.
+        device: Device to load the model on.
+        compute_type: CTranslate2 compute type.
+        language: Language code used for the warm-up inference.
+        token: Hugging Face token.
+        cache_dir: Hugging Face cache directory. Defaults to the hub default.
+        registry: Registry to load the model into.
+        retry_backoff_s: Delay before the first retry; doubles per failure.
+        max_backoff_s: Longest delay between retries.
+    """
+
+    def __init__(
+        self,
+        *,
+        repo_id: str,
+        device: str = "auto",
+        compute_type: str = "default",
+        language: Optional[str] = None,
+        token: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        registry: Optional[WhisperModelRegistry] = None,
+        retry_backoff_s: float = 5.0,
+        max_backoff_s: float = 120.0,
+    ):
+        self._repo_id = repo_id
+        self._device = device
+        self._compute_type = compute_type
+        self._language = language
+        self._token = token
+        self._cache_dir = cache_dir
+        self._registry = registry or model_registry
+        self._retry_backoff_s = retry_backoff_s
+        self._max_backoff_s = max_backoff_s
+
+        self._state = "pending"
+        self._error: Optional[str] = None
+        self._model_path: Optional[str] = None
+        self._elapsed_s: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._attempts = 0
+        # Set whenever an attempt has finished, successful or not.
+        self._attempt_done = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._state == "ready"
+
+    @property
+    def device(self) -> str:
+        return self._device
+
+    @property
+    def compute_type(self) -> str:
+        return self._compute_type
+
+    def start(self) -> asyncio.Task:
+        """Start loading in the background. Calling it again is a no-op."""
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def wait_ready(self) -> str:
+        """Wait until the model is loaded and warm.
+
+        Returns:
+            The local path of the model.
+        """
+        self.start()
+        if not self.ready:
+            # Between retries this returns at once, with the last error.
+            await self._attempt_done.wait()
+        if not self.ready:
+            raise RuntimeError(f"Whisper model failed to load: {self._error}")
+        return self._model_path
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "repo_id": self._repo_id,
+            "device": self._device,
+            "compute_type": self._compute_type,
+            "model_path": self._model_path,
+            "load_time_s": round(self._elapsed_s, 2) if self._elapsed_s is not None else None,
+            "error": self._error,
+            "attempts": self._attempts,
+        }
+
+    async def _run(self):
+        backoff_s = self._retry_backoff_s
+        while True:
+            self._attempts += 1
+            self._attempt_done.clear()
+            self._state = "loading"
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._load)
+                self._state = "ready"
+                self._error = None
+            except Exception as e:
+                logger.error(f"Failed to prepare Whisper model {self._repo_id}: {e}")
+                self._error = str(e)
+                self._state = "failed"
+            self._elapsed_s = time.perf_counter() - start
+            logger.info(f"Whisper model {self._repo_id} {self._state} after {self._elapsed_s:.2f}s")
+            self._attempt_done.set()
+            if self.ready:
+                return
+
+            logger.info(f"Retrying Whisper model {self._repo_id} in {backoff_s:.0f}s")
+            await asyncio.sleep(backoff_s)
+            backoff_s = min(backoff_s * 2, self._max_backoff_s)
+
+    def _load(self):
+        self._model_path = ensure_local_model(
+            self._repo_id, cache_dir=self._cache_dir, token=self._token
+        )
+        model = self._registry.acquire(
+            self._model_path, self._device, self._compute_type, pin=True
+        )
+        # The registry warm-up covers WhisperModel.transcribe; also exercise
+        # the batched path the scheduler uses, with a batch of two.
+        audio = synthetic_speech()
+        transcribe_batch(model, [audio, audio[: len(audio) // 2]], self._language)
@@ -0,0 +1,196 @@
+"""Incremental MP3 to PCM decoding.
+
+pydub can only decode a complete file, so the caller heard nothing until the
+whole TTS response had been downloaded and transcoded. Here the HTTP body is
+piped into an ffmpeg process as it arrives and PCM is read back as soon as
+ffmpeg has decoded the first MP3 frames.
+
+Each decoder is an ffmpeg process that lives as long as the download, so the
+number of them is capped separately from the transcoding pool: a slot is
+only taken once the first MP3 bytes have arrived, and network waits don't
+hold up pooled transcoding jobs.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+
+def is_audible(pcm: bytes, threshold: int = 500) -> bool:
+    """Whether a 16-bit PCM chunk contains more than near-silence."""
+    samples = np.frombuffer(pcm[: len(pcm) - len(pcm) % 2], dtype=np.int16)
+    return samples.size > 0 and int(np.abs(samples).max()) > threshold
+
+
+class DecoderLimit:
+    """Caps how many ffmpeg decoder processes run at once.
+
+    Args:
+        max_processes: Maximum number of decoders running at once; further
+            streams wait for one to finish.
+    """
+
+    def __init__(self, max_processes: int = 64):
+        self._max_processes = max_processes
+        self._slots = asyncio.Semaphore(max_processes)
+        self._running = 0
+        self._decodes = 0
+        self._total_wait_s = 0.0
+        self._max_wait_s = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot while an ffmpeg process is running."""
+        submitted = time.perf_counter()
+        async with self._slots:
+            wait_s = time.perf_counter() - submitted
+            self._decodes += 1
+            self._total_wait_s += wait_s
+            self._max_wait_s = max(self._max_wait_s, wait_s)
+            self._running += 1
+            try:
+                yield
+            finally:
+                self._running -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_processes": self._max_processes,
+            "running": self._running,
+            "decodes": self._decodes,
+            "avg_wait_ms": round(1000 * self._total_wait_s / self._decodes, 1)
+            if self._decodes
+            else 0.0,
+            "max_wait_ms": round(1000 * self._max_wait_s, 1),
+        }
+
+
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+class StreamingMP3Decoder:
+    """Decodes an MP3 byte stream into fixed-duration 16-bit mono PCM chunks.
+
+    Args:
+        sample_rate: Output sample rate in Hz.
+        frame_duration_ms: Duration of each PCM chunk that is yielded.
+        limit: Caps the ffmpeg processes running at once; the process-wide
+            ``decoder_limit`` by default.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int,
+        frame_duration_ms: int = 40,
+        limit: Optional[DecoderLimit] = None,
+    ):
+        self._sample_rate = sample_rate
+        self._frame_bytes = int(sample_rate * frame_duration_ms / 1000) * 2
+        self._limit = limit or decoder_limit
+
+    def _ffmpeg_args(self):
+        return [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            # Don't wait to probe a large chunk of input before decoding.
+            "-probesize",
+            "4096",
+            "-analyzeduration",
+            "0",
+            "-fflags",
+            "nobuffer",
+            "-f",
+            "mp3",
+            "-i",
+            "pipe:0",
+            "-f",
+            "s16le",
+            "-acodec",
+            "pcm_s16le",
+            "-ac",
+            "1",
+            "-ar",
+            str(self._sample_rate),
+            "-flush_packets",
+            "1",
+            "pipe:1",
+        ]
+
+    async def _feed(self, process: asyncio.subprocess.Process, chunks: AsyncIterator[bytes]):
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            # Closing stdin lets ffmpeg flush and exit, also when the download failed.
+            if not process.stdin.is_closing():
+                process.stdin.close()
+
+    async def decode(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Yield PCM chunks while ``chunks`` (the MP3 body) is still arriving.
+
+        Errors from the input iterator are re-raised once the decoded audio
+        received so far has been yielded. ffmpeg is only started, and a
+        decoder slot taken, once the first MP3 bytes have arrived.
+        """
+        chunks = chunks.__aiter__()
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            raise RuntimeError("The MP3 stream was empty") from None
+
+        async with self._limit.slot():
+            process = await asyncio.create_subprocess_exec(
+                *self._ffmpeg_args(),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            feeder = asyncio.create_task(self._feed(process, _prepend(first, chunks)))
+            buffer = bytearray()
+
+            try:
+                while True:
+                    data = await process.stdout.read(4096)
+                    if not data:
+                        break
+                    buffer += data
+                    while len(buffer) >= self._frame_bytes:
+                        yield bytes(buffer[: self._frame_bytes])
+                        del buffer[: self._frame_bytes]
+
+                if buffer:
+                    yield bytes(buffer)
+
+                await feeder
+                return_code = await process.wait()
+                if return_code != 0:
+                    error = (await process.stderr.read()).decode(errors="replace").strip()
+                    raise RuntimeError(f"ffmpeg exited with {return_code}: {error}")
+            finally:
+                if not feeder.done():
+                    feeder.cancel()
+                elif not feeder.cancelled():
+                    # Mark a download error as retrieved when we stopped early.
+                    feeder.exception()
+                if process.returncode is None:
+                    try:
+                        process.kill()
+                    except ProcessLookupError:
+                        pass
+                    await process.wait()
+                    logger.trace("Stopped ffmpeg decoder before the stream ended")
+
+
+decoder_limit = DecoderLimit(int(os.getenv("MP3_DECODER_MAX_PROCESSES", "64")))
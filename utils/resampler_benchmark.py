@@ -0,0 +1,131 @@
+"""Microbenchmark: polyphase resampler against pydub's ``set_frame_rate``.
+
+For every conversion both resamplers convert the same 16-bit mono clip
+repeatedly. Reported per conversion:
+
+* the median time per clip for each resampler, and the speedup;
+* the one-time cost of designing the polyphase filter. It is excluded
+  from the medians because the filter is cached;
+* for downsampling, the aliasing of each resampler. A tone above the new
+  Nyquist frequency should be removed; its level after resampling is
+  reported in dB relative to the input.
+
+Usage::
+
+    python -m utils.resampler_benchmark --seconds 4 --rounds 50 \\
+        --conversion 22050:8000 --conversion 8000:16000
+"""
+
+import argparse
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from pydub import AudioSegment
+
+from utils.model_cache import synthetic_speech
+from utils.resampler import polyphase_filter, resample_pcm
+
+
+def pydub_resample(pcm: bytes, from_rate: int, to_rate: int) -> bytes:
+    """The previous TTS path: pydub's ``set_frame_rate``."""
+    segment = AudioSegment(data=pcm, sample_width=2, frame_rate=from_rate, channels=1)
+    return segment.set_frame_rate(to_rate).raw_data
+
+
+def median_ms(fn: Callable[[], Any], rounds: int) -> float:
+    elapsed = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        elapsed.append(time.perf_counter() - start)
+    return round(1000 * float(np.median(elapsed)), 3)
+
+
+def alias_db(resample_fn: Callable[[bytes, int, int], bytes], from_rate: int, to_rate: int) -> float:
+    """Level of a tone at 0.8 of the input Nyquist after resampling, in dB."""
+    t = np.arange(from_rate) / from_rate
+    tone = 0.5 * np.sin(2 * np.pi * 0.4 * from_rate * t)
+    pcm = (tone * 32767).astype(np.int16).tobytes()
+    out = np.frombuffer(resample_fn(pcm, from_rate, to_rate), dtype=np.int16).astype(np.float32)
+    # Skip the filter's edges.
+    out = out[len(out) // 10 : -len(out) // 10] / 32767
+    rms_in = 0.5 / math.sqrt(2)
+    rms_out = float(np.sqrt(np.mean(out**2)))
+    return round(20 * math.log10(rms_out / rms_in + 1e-12), 1)
+
+
+def benchmark_conversion(from_rate: int, to_rate: int, seconds: float, rounds: int) -> Dict[str, Any]:
+    samples = synthetic_speech(seconds, from_rate)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+    divisor = math.gcd(from_rate, to_rate)
+    polyphase_filter.cache_clear()
+    start = time.perf_counter()
+    polyphase_filter(to_rate // divisor, from_rate // divisor)
+    filter_ms = round(1000 * (time.perf_counter() - start), 3)
+
+    pydub_ms = median_ms(lambda: pydub_resample(pcm, from_rate, to_rate), rounds)
+    polyphase_ms = median_ms(lambda: resample_pcm(pcm, from_rate, to_rate), rounds)
+    result = {
+        "conversion": f"{from_rate}->{to_rate}",
+        "clip_s": seconds,
+        "pydub_ms": pydub_ms,
+        "polyphase_ms": polyphase_ms,
+        "speedup": round(pydub_ms / polyphase_ms, 2) if polyphase_ms else None,
+        "filter_design_ms": filter_ms,
+        "pydub_alias_db": None,
+        "polyphase_alias_db": None,
+    }
+    # The test tone is only out of band when downsampling.
+    if 0.4 * from_rate > to_rate / 2:
+        result["pydub_alias_db"] = alias_db(pydub_resample, from_rate, to_rate)
+        result["polyphase_alias_db"] = alias_db(resample_pcm, from_rate, to_rate)
+    return result
+
+
+def main(args):
+    results = []
+    for conversion in args.conversion:
+        from_rate, _, to_rate = conversion.partition(":")
+        results.append(benchmark_conversion(int(from_rate), int(to_rate), args.seconds, args.rounds))
+
+    print(
+        f"{'conversion':<16}{'pydub ms':>10}{'polyphase ms':>14}{'speedup':>9}{'filter ms':>11}"
+        f"{'pydub alias dB':>16}{'polyphase alias dB':>20}"
+    )
+    def db(value):
+        return "-" if value is None else str(value)
+
+    for r in results:
+        print(
+            f"{r['conversion']:<16}{r['pydub_ms']:>10}{r['polyphase_ms']:>14}"
+            f"{r['speedup']:>9}{r['filter_design_ms']:>11}"
+            f"{db(r['pydub_alias_db']):>16}{db(r['polyphase_alias_db']):>20}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--conversion",
+        action="append",
+        help="from_rate:to_rate, repeatable (default: Bhashini's 22050 Hz to 8 and 16 kHz, "
+        "and 8 <-> 16 kHz)",
+    )
+    parser.add_argument("--seconds", type=float, default=4.0, help="Length of the clip")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args(argv)
+    args.conversion = args.conversion or ["22050:8000", "22050:16000", "16000:8000", "8000:16000"]
+    return args
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,225 @@
+"""Warm pool of pre-provisioned Daily SIP rooms.
+
+Answering a Twilio webhook used to wait for two sequential Daily REST round
+trips (create the room, then a bot token) before the bot could start. Rooms
+and tokens are now created ahead of time in the background, so ``/start``
+only has to pop one from the pool.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from loguru import logger
+
+from utils.daily_helpers import create_sip_room, delete_sip_room
+
+# Rooms are created before the caller is known, so they can't carry the
+# caller's number as the SIP participant's display name.
+POOLED_ROOM_DISPLAY_NAME = "Phone caller"
+
+
+class _PooledRoom:
+    def __init__(self, details: Dict[str, str], expires_at: float):
+        self.details = details
+        self.expires_at = expires_at
+
+
+class SIPRoomPool:
+    """Keeps a number of SIP-enabled rooms and bot tokens ready for calls.
+
+    The pool size follows the recent call arrival rate: it holds enough
+    rooms to cover the calls expected within ``horizon_s`` (the time it takes
+    to notice and refill, plus headroom for bursts), between ``min_size`` and
+    ``max_size``. Rooms are created with an expiry and are deleted once too
+    little of their lifetime is left, or when the pool shrinks.
+
+    Args:
+        min_size: Minimum number of rooms kept ready.
+        max_size: Maximum number of rooms kept ready. 0 disables the pool.
+        room_ttl_s: Lifetime of a pooled room.
+        min_remaining_s: Rooms with less lifetime left are not handed out.
+        horizon_s: How many seconds of expected calls the pool covers.
+        rate_window_s: Window over which the call arrival rate is measured.
+        refill_interval_s: How often the pool is checked when idle.
+        max_concurrent_creates: Rooms created in parallel while refilling.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_size: int = 1,
+        max_size: int = 8,
+        room_ttl_s: float = 60 * 60,
+        min_remaining_s: float = 10 * 60,
+        horizon_s: float = 30.0,
+        rate_window_s: float = 5 * 60,
+        refill_interval_s: float = 5.0,
+        max_concurrent_creates: int = 4,
+    ):
+        self._min_size = min(min_size, max_size)
+        self._max_size = max_size
+        self._room_ttl_s = room_ttl_s
+        self._min_remaining_s = min_remaining_s
+        self._horizon_s = horizon_s
+        self._rate_window_s = rate_window_s
+        self._refill_interval_s = refill_interval_s
+        self._max_concurrent_creates = max_concurrent_creates
+
+        self._rooms: Deque[_PooledRoom] = deque()
+        self._stale: Deque[_PooledRoom] = deque()
+        self._arrivals: Deque[float] = deque()
+        self._creating = 0
+        self._wakeup = asyncio.Event()
+
+        self._hits = 0
+        self._misses = 0
+        self._created = 0
+        self._create_failures = 0
+        self._expired = 0
+        self._total_create_s = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    def take(self) -> Optional[Dict[str, str]]:
+        """Return a ready room, or None when the pool is empty."""
+        self._record_arrival()
+        self._drop_expiring()
+        if not self._rooms:
+            self._misses += 1
+            self._wakeup.set()
+            return None
+
+        # Oldest first: they are the closest to expiring.
+        room = self._rooms.popleft()
+        self._hits += 1
+        self._wakeup.set()
+        return room.details
+
+    async def get_room(self, caller_phone: str = "unknown-caller") -> Dict[str, str]:
+        """Take a room from the pool, or create one when it is empty."""
+        room = self.take()
+        if room:
+            return room
+        if self.enabled:
+            logger.warning("SIP room pool is empty, creating a room on demand")
+        return await create_sip_room(caller_phone=caller_phone)
+
+    def target_size(self) -> int:
+        """Number of rooms to keep, from the recent call arrival rate."""
+        now = time.time()
+        while self._arrivals and self._arrivals[0] < now - self._rate_window_s:
+            self._arrivals.popleft()
+        rate = len(self._arrivals) / self._rate_window_s
+        target = self._min_size + math.ceil(rate * self._horizon_s)
+        return min(target, self._max_size)
+
+    async def run(self):
+        """Keep the pool filled. Runs until cancelled."""
+        if not self.enabled:
+            return
+        while True:
+            self._wakeup.clear()
+            try:
+                await self._refill()
+            except Exception as e:
+                logger.error(f"Error refilling SIP room pool: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._refill_interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        """Delete the rooms that are still in the pool."""
+        rooms = list(self._rooms) + list(self._stale)
+        self._rooms.clear()
+        self._stale.clear()
+        await asyncio.gather(*(self._delete(room) for room in rooms))
+
+    def stats(self) -> Dict[str, Any]:
+        takes = self._hits + self._misses
+        return {
+            "ready": len(self._rooms),
+            "creating": self._creating,
+            "target": self.target_size(),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / takes, 3) if takes else 0.0,
+            "created": self._created,
+            "create_failures": self._create_failures,
+            "expired": self._expired,
+            "avg_create_ms": round(1000 * self._total_create_s / self._created, 1)
+            if self._created
+            else 0.0,
+        }
+
+    def _record_arrival(self):
+        self._arrivals.append(time.time())
+
+    def _drop_expiring(self):
+        now = time.time()
+        while self._rooms and self._rooms[0].expires_at - now < self._min_remaining_s:
+            # Deleted by the refill loop, off the request path.
+            self._stale.append(self._rooms.popleft())
+            self._expired += 1
+
+    async def _refill(self):
+        self._drop_expiring()
+        while self._stale:
+            await self._delete(self._stale.popleft())
+
+        # Shrink when the arrival rate dropped, deleting the oldest rooms.
+        target = self.target_size()
+        while len(self._rooms) > target:
+            await self._delete(self._rooms.popleft())
+
+        missing = target - len(self._rooms) - self._creating
+        if missing > 0:
+            semaphore = asyncio.Semaphore(self._max_concurrent_creates)
+
+            async def create():
+                async with semaphore:
+                    await self._create()
+
+            await asyncio.gather(*(create() for _ in range(missing)))
+
+    async def _create(self):
+        self._creating += 1
+        start = time.perf_counter()
+        expires_at = time.time() + self._room_ttl_s
+        try:
+            details = await create_sip_room(
+                caller_phone=POOLED_ROOM_DISPLAY_NAME, expires_in_s=self._room_ttl_s
+            )
+            if not details.get("sip_endpoint"):
+                raise Exception("No SIP endpoint provided by Daily")
+        except Exception as e:
+            self._create_failures += 1
+            logger.warning(f"Failed to create pooled SIP room: {e}")
+            return
+        finally:
+            self._creating -= 1
+
+        self._created += 1
+        self._total_create_s += time.perf_counter() - start
+        self._rooms.append(_PooledRoom(details, expires_at))
+
+    async def _delete(self, room: _PooledRoom):
+        try:
+            await delete_sip_room(room.details["room_url"])
+        except Exception as e:
+            # The room expires on its own anyway.
+            logger.warning(f"Failed to delete pooled SIP room {room.details['room_url']}: {e}")
+
+
+room_pool = SIPRoomPool(
+    min_size=int(os.getenv("ROOM_POOL_MIN_SIZE", "1")),
+    max_size=int(os.getenv("ROOM_POOL_MAX_SIZE", "8")),
+    room_ttl_s=float(os.getenv("ROOM_POOL_TTL_S", "3600")),
+    horizon_s=float(os.getenv("ROOM_POOL_HORIZON_S", "30")),
+)
@@ -0,0 +1,159 @@
+"""Deterministic replies for the fixed turns of the call script.
+
+Several turns of the script are fixed text: the opening greeting, the
+read-back of the complaint and the closing. They used to cost a full LLM
+round trip before synthesis could start. The script-turn engine recognizes
+these turns from the transcript and emits their text directly, framed like
+an LLM response, so they flow through TTS and into the conversation context
+exactly as if the model had produced them. All other turns go to the LLM.
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    Frame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+from utils.script_phrases import split_sentences
+from utils.stage_context import ComplaintField, ConversationState, Stage, plain_text
+
+_PUNCTUATION_RE = re.compile(r"[.,!?।]")
+
+
+@dataclass
+class ScriptTurn:
+    """A turn the bot answers with fixed or template-filled text.
+
+    Attributes:
+        name: Turn name, for logging.
+        template: The reply. ``{field}`` placeholders are filled with the
+            complaint details and the engine's extra values.
+        at_start: The turn opens the call, before anything was said.
+        after: The bot's previous line contains one of these phrases.
+        requires: Complaint details that must have been collected.
+        answers: The caller's reply must be one of these. Any reply matches
+            when empty.
+    """
+
+    name: str
+    template: str
+    at_start: bool = False
+    after: Sequence[str] = ()
+    requires: Sequence[str] = ()
+    answers: Sequence[str] = ()
+
+
+def _normalize_answer(text: str) -> str:
+    return _PUNCTUATION_RE.sub("", plain_text(text)).strip().lower()
+
+
+class ScriptTurnEngine(FrameProcessor):
+    """Answers fixed script turns without calling the LLM.
+
+    Place it between the user context aggregator and the LLM. When the
+    conversation is at one of ``turns``, the context frame is consumed and
+    the reply is pushed as an LLM response instead.
+
+    Args:
+        turns: The deterministic turns.
+        stages: The conversation stages, used to read the transcript.
+        fields: The complaint details that templates can refer to.
+        values: Returns extra template values, e.g. a complaint number.
+    """
+
+    def __init__(
+        self,
+        *,
+        turns: Sequence[ScriptTurn],
+        stages: Sequence[Stage],
+        fields: Sequence[ComplaintField],
+        values: Optional[Callable[[], Dict[str, str]]] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._turns = turns
+        self._stages = stages
+        self._fields = fields
+        self._values = values
+
+        self._script_turns = 0
+        self._llm_turns = 0
+
+    def match(self, messages: List[dict]) -> Optional[str]:
+        """The scripted reply for the conversation, or None to ask the LLM."""
+        matched = self._match_turn(messages)
+        return matched[1] if matched else None
+
+    def _match_turn(self, messages: List[dict]) -> Optional[Tuple[ScriptTurn, str]]:
+        conversation = [m for m in messages if m.get("role") != "system"]
+        state = ConversationState(self._stages, self._fields).update(conversation)
+
+        last_user = conversation[-1] if conversation and conversation[-1].get("role") == "user" else None
+        previous_bot = next(
+            (m for m in reversed(conversation) if m.get("role") == "assistant"), None
+        )
+
+        for turn in self._turns:
+            if turn.at_start:
+                if conversation:
+                    continue
+            else:
+                if not last_user or not previous_bot:
+                    continue
+                bot_text = plain_text(str(previous_bot.get("content", "")))
+                if not any(phrase in bot_text for phrase in turn.after):
+                    continue
+                if any(field not in state.values for field in turn.requires):
+                    continue
+                if turn.answers:
+                    answer = _normalize_answer(str(last_user.get("content", "")))
+                    if answer not in {_normalize_answer(a) for a in turn.answers}:
+                        continue
+
+            values = defaultdict(str, state.values)
+            if self._values:
+                values.update(self._values())
+            return turn, turn.template.format_map(values)
+
+        return None
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            matched = self._match_turn(frame.context.get_messages())
+            if matched:
+                turn, reply = matched
+                logger.debug(f"{self}: Scripted turn [{turn.name}]")
+                self._script_turns += 1
+                await self._push_reply(reply)
+                return
+            self._llm_turns += 1
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        await super().cleanup()
+        logger.info(
+            f"{self}: {self._script_turns} scripted turns, {self._llm_turns} LLM turns"
+        )
+
+    async def _push_reply(self, text: str):
+        # Framed like an LLM response so the TTS speaks it and the assistant
+        # aggregator records it in the context. One frame per sentence, cut
+        # like the pre-rendered phrases, so the TTS finds them in its cache
+        # and pipelines the rest.
+        await self.push_frame(LLMFullResponseStartFrame())
+        for sentence in split_sentences(text):
+            await self.push_frame(LLMTextFrame(sentence))
+        await self.push_frame(LLMFullResponseEndFrame())
@@ -0,0 +1,50 @@
+"""Extract the fixed lines the bot speaks from its script prompt."""
+
+import re
+from typing import List
+
+from pipecat.utils.string import match_endofsentence
+
+# Break tags contain double quotes themselves, so they are masked before the
+# quoted script lines are matched.
+_BREAK_TAG_RE = re.compile(r'<break time="([^"]*)"/>')
+_MASKED_BREAK_RE = re.compile("\x00([^\x01]*)\x01")
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text the same way the TTS service's sentence aggregator does.
+
+    The aggregator receives the LLM output a few characters at a time and
+    cuts as soon as the accumulated text ends a sentence, so replaying the
+    text character by character gives the exact chunks sent to the TTS.
+    """
+    sentences = []
+    current = ""
+    for char in text:
+        current += char
+        end = match_endofsentence(current)
+        if end:
+            sentences.append(current[:end])
+            current = current[end:]
+    if current.strip():
+        sentences.append(current)
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+
+def extract_script_phrases(prompt: str) -> List[str]:
+    """Return the distinct sentences quoted in the script prompt.
+
+    Lines containing placeholders such as ``[ಹೆಸರು]`` depend on the
+    conversation and are skipped.
+    """
+    masked = _BREAK_TAG_RE.sub(lambda m: f"\x00{m.group(1)}\x01", prompt)
+
+    phrases: List[str] = []
+    for quoted in _QUOTED_RE.findall(masked):
+        line = _MASKED_BREAK_RE.sub(lambda m: f'<break time="{m.group(1)}"/>', quoted)
+        for sentence in split_sentences(line):
+            if "[" in sentence or sentence in phrases:
+                continue
+            phrases.append(sentence)
+    return phrases
@@ -0,0 +1,134 @@
+"""Byte ring buffer in shared memory, for audio sent between processes.
+
+Sending audio through a ``multiprocessing`` pipe pickles it, copies it into
+the pipe and copies it out again on the other side, with the GIL held the
+whole time. A ring carries the samples instead: the producer copies them
+into shared memory once and the consumer copies them out once. The pipe
+only carries a small message saying how many bytes to take.
+
+The ring has one producer and one consumer. Each side only ever advances its
+own position, so no lock is shared between the processes; the producer
+waits for the consumer when the ring is full.
+"""
+
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Union
+
+import numpy as np
+
+# The write position, then the read position one cache line further, then
+# the data.
+HEADER_BYTES = 128
+_WRITE = 0
+_READ = 8
+
+Buffer = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+class RingFullError(Exception):
+    """The consumer did not make room in the ring in time."""
+
+
+class ShmRing:
+    """One producer, one consumer byte ring over ``SharedMemory``.
+
+    Records have no framing: the producer tells the consumer how long each
+    record is through another channel, after ``write`` returns, and the
+    consumer reads records in the order they were written.
+
+    Use ``create`` in the process that owns the ring and ``attach`` in the
+    others.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self.capacity = capacity
+        # Aligned 8-byte stores, so the other side never sees half a position.
+        self._positions = np.ndarray((HEADER_BYTES // 8,), dtype=np.uint64, buffer=shm.buf)
+        self._data = shm.buf[HEADER_BYTES : HEADER_BYTES + capacity]
+
+    @classmethod
+    def create(cls, capacity: int) -> "ShmRing":
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + capacity)
+        shm.buf[:HEADER_BYTES] = bytes(HEADER_BYTES)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> "ShmRing":
+        return cls(shared_memory.SharedMemory(name=name), capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def used(self) -> int:
+        return int(self._positions[_WRITE]) - int(self._positions[_READ])
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.used
+
+    def wait_for_room(self, size: int, timeout_s: Optional[float] = 5.0) -> bool:
+        """Wait until ``size`` bytes fit; False if they still don't after ``timeout_s``.
+
+        Raises:
+            ValueError: If ``size`` is larger than the ring.
+        """
+        if size > self.capacity:
+            raise ValueError(f"{size} bytes don't fit in a ring of {self.capacity}")
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while self.free < size:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.0005)
+        return True
+
+    def write(self, data: Buffer, timeout_s: Optional[float] = 5.0):
+        """Copy ``data`` into the ring, waiting for room if it is full.
+
+        Raises:
+            ValueError: If ``data`` is larger than the ring.
+            RingFullError: If there is still no room after ``timeout_s``.
+        """
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data)
+        view = memoryview(data).cast("B")
+        size = len(view)
+        if not self.wait_for_room(size, timeout_s):
+            raise RingFullError(f"No room for {size} bytes after {timeout_s}s")
+
+        position = int(self._positions[_WRITE])
+        offset = position % self.capacity
+        first = min(size, self.capacity - offset)
+        self._data[offset : offset + first] = view[:first]
+        if first < size:
+            self._data[: size - first] = view[first:]
+        # Publish only once the bytes are in place.
+        self._positions[_WRITE] = position + size
+
+    def read(self, size: int) -> bytearray:
+        """Copy the next ``size`` bytes out of the ring and free them."""
+        position = int(self._positions[_READ])
+        available = int(self._positions[_WRITE]) - position
+        if available < size:
+            raise RuntimeError(f"Ring holds {available} bytes, {size} expected")
+
+        out = bytearray(size)
+        offset = position % self.capacity
+        first = min(size, self.capacity - offset)
+        out[:first] = self._data[offset : offset + first]
+        if first < size:
+            out[first:] = self._data[: size - first]
+        self._positions[_READ] = position + size
+        return out
+
+    def close(self):
+        # The views must go before the mapping can be closed.
+        self._data.release()
+        del self._positions
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
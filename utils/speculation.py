@@ -0,0 +1,300 @@
+"""Speculative LLM generation on the tentative end of the user's speech.
+
+The LLM used to start only after the VAD declared the end of speech, the
+final transcript arrived and the user context aggregator's timeout expired,
+so the endpointing silence and the LLM's time to first token added up. The
+STT now transcribes the utterance as soon as the caller pauses, and the
+completion is started on that tentative transcript. If the final transcript
+matches, the speculative reply is used and most of the LLM latency is gone;
+if the caller keeps talking or said something else, it is cancelled and the
+turn goes to the LLM as usual. The first sentence of the reply can also be
+sent to TTS ahead of time.
+"""
+
+import asyncio
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from pipecat.frames.frames import (
+    CancelFrame,
+    DataFrame,
+    EndFrame,
+    Frame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+    StartInterruptionFrame,
+    UserStartedSpeakingFrame,
+)
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.services.openai.base_llm import BaseOpenAILLMService
+from pipecat.utils.string import match_endofsentence
+
+from utils.latency_tracing import LatencyHistogram
+from utils.stage_context import approx_tokens, plain_text
+
+
+@dataclass
+class TentativeTranscriptionFrame(DataFrame):
+    """Transcript of the user's speech so far, taken while they pause."""
+
+    text: str
+
+
+@dataclass
+class SpeechResumedFrame(DataFrame):
+    """The user kept talking after a tentative transcription."""
+
+
+def _normalize(text: str) -> str:
+    # Only punctuation is dropped: Kannada vowel signs don't count as \w.
+    text = "".join(" " if unicodedata.category(c).startswith("P") else c for c in plain_text(text))
+    return " ".join(text.lower().split())
+
+
+class SpeculationMetrics:
+    """Process-wide speculation counters, fed by every call."""
+
+    def __init__(self):
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.wasted_prompt_tokens = 0
+        self.wasted_completion_tokens = 0
+        self.head_start = LatencyHistogram()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "hit_rate": round(self.hits / self.started, 3) if self.started else 0.0,
+            "wasted_prompt_tokens": self.wasted_prompt_tokens,
+            "wasted_completion_tokens": self.wasted_completion_tokens,
+            "head_start_ms": self.head_start.summary(),
+        }
+
+
+speculation_metrics = SpeculationMetrics()
+
+
+class _Speculation:
+    def __init__(self, text: str, base_length: int, prompt_tokens: int):
+        self.text = text
+        self.base_length = base_length
+        self.started_at = time.perf_counter()
+        self.chunks: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        self.failed = False
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = 0
+        self.first_sentence: Optional[str] = None
+
+
+class SpeculativeLLMProcessor(FrameProcessor):
+    """Starts the LLM completion on tentative transcripts.
+
+    Place it right before the LLM. Tentative transcriptions start a
+    completion with the same messages the LLM would get. When the real
+    context frame arrives and the caller's final message is the tentative
+    transcript, the frame is consumed and the speculative reply is pushed as
+    the LLM response; otherwise the speculation is discarded and the frame
+    goes to the LLM. Once the turn's context frame or scripted reply has
+    passed, tentative transcripts are ignored until the caller speaks again:
+    one finishing after the final transcript would only repeat the turn.
+
+    Args:
+        llm: The LLM service; its client and settings are used for the
+            speculative completions.
+        context: The conversation context kept by the context aggregators.
+        prepare_messages: Turns the conversation into the messages sent to
+            the LLM, e.g. the stage-scoped compaction.
+        skip: Returns True for conversations that don't go to the LLM, e.g.
+            fixed script turns.
+        prefetch_tts: Called with the first sentence of a speculative reply
+            to synthesize it ahead of time.
+        metrics: Counters the speculations are recorded in.
+    """
+
+    def __init__(
+        self,
+        *,
+        llm: BaseOpenAILLMService,
+        context: OpenAILLMContext,
+        prepare_messages: Optional[Callable[[List[dict]], List[dict]]] = None,
+        skip: Optional[Callable[[List[dict]], bool]] = None,
+        prefetch_tts: Optional[Callable[[str], Awaitable[None]]] = None,
+        metrics: Optional[SpeculationMetrics] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._llm = llm
+        self._context = context
+        self._prepare_messages = prepare_messages
+        self._skip = skip
+        self._prefetch_tts = prefetch_tts
+        self._metrics = metrics or speculation_metrics
+
+        self._speculation: Optional[_Speculation] = None
+        self._count = 0
+        self._turn_answered = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, TentativeTranscriptionFrame):
+            if not self._turn_answered:
+                await self._start(frame.text)
+        elif isinstance(frame, SpeechResumedFrame):
+            await self._discard(cancelled=True)
+        elif isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            self._turn_answered = True
+            speculation = self._take_hit()
+            if speculation:
+                await self._push_speculation(speculation)
+            else:
+                await self._discard(cancelled=False)
+                await self.push_frame(frame, direction)
+        else:
+            # New speech, an interruption or the end of the call.
+            if isinstance(
+                frame, (UserStartedSpeakingFrame, StartInterruptionFrame, EndFrame, CancelFrame)
+            ):
+                await self._discard(cancelled=True)
+            if isinstance(frame, UserStartedSpeakingFrame):
+                self._turn_answered = False
+            elif isinstance(frame, LLMFullResponseStartFrame):
+                # A scripted reply: its context frame never reaches here.
+                self._turn_answered = True
+            await self.push_frame(frame, direction)
+
+    async def _start(self, text: str):
+        # A newer pause supersedes the previous speculation.
+        await self._discard(cancelled=True)
+
+        history = self._context.get_messages()
+        messages = history + [{"role": "user", "content": text}]
+        if self._skip and self._skip(messages):
+            return
+        if self._prepare_messages:
+            messages = self._prepare_messages(messages)
+
+        prompt_tokens = sum(approx_tokens(str(m.get("content", ""))) for m in messages)
+        speculation = _Speculation(text, len(history), prompt_tokens)
+        self._count += 1
+        speculation.task = self.create_task(
+            self._run_speculation(speculation, messages), f"speculation_{self._count}"
+        )
+        self._speculation = speculation
+        self._metrics.started += 1
+        logger.debug(f"{self}: Speculating on [{text}]")
+
+    async def _run_speculation(self, speculation: _Speculation, messages: List[dict]):
+        sentence = ""
+        try:
+            stream = await self._llm.get_chat_completions(OpenAILLMContext(messages), messages)
+            try:
+                async for chunk in stream:
+                    if chunk.usage:
+                        speculation.prompt_tokens = chunk.usage.prompt_tokens
+                        speculation.completion_tokens = chunk.usage.completion_tokens
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.tool_calls:
+                        # Function calls are left to the LLM service.
+                        speculation.failed = True
+                        break
+                    if not delta.content:
+                        continue
+                    speculation.completion_tokens += 1
+                    await speculation.chunks.put(delta.content)
+
+                    if self._prefetch_tts and speculation.first_sentence is None:
+                        sentence += delta.content
+                        end = match_endofsentence(sentence)
+                        if end:
+                            speculation.first_sentence = sentence[:end].strip()
+                            await self._prefetch_tts(speculation.first_sentence)
+            finally:
+                await stream.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"{self}: Speculative completion failed: {e}")
+            speculation.failed = True
+        finally:
+            await speculation.chunks.put(None)
+
+    def _take_hit(self) -> Optional[_Speculation]:
+        speculation = self._speculation
+        if not speculation or speculation.failed:
+            return None
+
+        messages = self._context.get_messages()
+        if len(messages) != speculation.base_length + 1:
+            return None
+        last = messages[-1]
+        if last.get("role") != "user":
+            return None
+        if _normalize(str(last.get("content", ""))) != _normalize(speculation.text):
+            return None
+
+        self._speculation = None
+        return speculation
+
+    async def _push_speculation(self, speculation: _Speculation):
+        head_start_ms = 1000 * (time.perf_counter() - speculation.started_at)
+        self._metrics.hits += 1
+        self._metrics.head_start.observe(head_start_ms)
+        logger.debug(f"{self}: Using the speculative reply, started {head_start_ms:.0f}ms early")
+
+        try:
+            await self.push_frame(LLMFullResponseStartFrame())
+            while True:
+                text = await speculation.chunks.get()
+                if text is None:
+                    break
+                await self.push_frame(LLMTextFrame(text))
+            await self.push_frame(LLMFullResponseEndFrame())
+        finally:
+            # Still streaming if the reply was interrupted.
+            await self.cancel_task(speculation.task)
+
+        if speculation.failed:
+            logger.warning(f"{self}: Speculative reply ended early")
+            self._metrics.failed += 1
+
+    async def _discard(self, *, cancelled: bool):
+        speculation = self._speculation
+        if not speculation:
+            return
+        self._speculation = None
+
+        if speculation.task:
+            await self.cancel_task(speculation.task)
+
+        if speculation.failed:
+            self._metrics.failed += 1
+        elif cancelled:
+            self._metrics.cancelled += 1
+        else:
+            self._metrics.misses += 1
+        self._metrics.wasted_prompt_tokens += speculation.prompt_tokens
+        self._metrics.wasted_completion_tokens += speculation.completion_tokens
+        logger.debug(
+            f"{self}: Discarded speculation on [{speculation.text}] "
+            f"({speculation.completion_tokens} completion tokens)"
+        )
@@ -0,0 +1,224 @@
+"""Stage-scoped system prompt and transcript compaction.
+
+The full call script and the whole transcript used to be sent to the LLM on
+every turn, so input tokens (and with them time to first token) grew with
+every turn. The context sent to the LLM now holds the script's core rules,
+the sections for the current and the next stage of the conversation, a short
+structured summary of the complaint details collected so far, and only the
+most recent turns verbatim. The full transcript is kept in the conversation
+context, so nothing is lost for later turns.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from pipecat.frames.frames import Frame
+from pipecat.processors.aggregators.openai_llm_context import (
+    OpenAILLMContext,
+    OpenAILLMContextFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+_SECTION_RE = re.compile(r"^## (\d+)\.", re.MULTILINE)
+_BREAK_TAG_RE = re.compile(r"<break[^>]*/>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class Stage:
+    """A stage of the conversation.
+
+    Attributes:
+        name: Stage name.
+        sections: Numbers of the script sections needed in this stage.
+        markers: Phrases the bot says when the conversation enters it.
+    """
+
+    name: str
+    sections: Sequence[str]
+    markers: Sequence[str] = ()
+
+
+@dataclass
+class ComplaintField:
+    """A detail collected from the caller.
+
+    Attributes:
+        name: Field name used in the summary.
+        markers: Phrases of the bot's question for this field. The caller's
+            next message is taken as the answer.
+    """
+
+    name: str
+    markers: Sequence[str]
+
+
+def plain_text(text: str) -> str:
+    """Text without break tags and with collapsed whitespace."""
+    return _WHITESPACE_RE.sub(" ", _BREAK_TAG_RE.sub(" ", text)).strip()
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count of ``text``.
+
+    Only used to report savings. Kannada takes three UTF-8 bytes per
+    character and the tokenizer merges them into roughly one token per four
+    bytes, about the same rate as English text.
+    """
+    return len(text.encode("utf-8")) // 4
+
+
+def split_sections(prompt: str) -> Tuple[str, Dict[str, str]]:
+    """Split the script into its preamble and its numbered ``## N.`` sections."""
+    matches = list(_SECTION_RE.finditer(prompt))
+    if not matches:
+        return prompt, {}
+
+    preamble = prompt[: matches[0].start()]
+    sections = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(prompt)
+        sections[match.group(1)] = prompt[match.start() : end].strip()
+    return preamble.strip(), sections
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content")
+    return content if isinstance(content, str) else ""
+
+
+class ConversationState:
+    """The stage and complaint details derived from a transcript.
+
+    Args:
+        stages: The conversation stages, in order.
+        fields: The complaint details to collect.
+    """
+
+    def __init__(self, stages: Sequence[Stage], fields: Sequence[ComplaintField]):
+        self._stages = stages
+        self._fields = fields
+        self.stage_index = 0
+        self.values: Dict[str, str] = {}
+
+    @property
+    def stage(self) -> Stage:
+        return self._stages[self.stage_index]
+
+    def update(self, messages: Sequence[dict]) -> "ConversationState":
+        """Recompute the state from the whole transcript."""
+        self.stage_index = 0
+        self.values = {}
+        asked: Optional[ComplaintField] = None
+
+        for message in messages:
+            text = plain_text(_message_text(message))
+            if message.get("role") == "assistant":
+                # Stages only move forward, even if the bot repeats itself.
+                for index, stage in enumerate(self._stages):
+                    if index > self.stage_index and any(m in text for m in stage.markers):
+                        self.stage_index = index
+                asked = next((f for f in self._fields if any(m in text for m in f.markers)), None)
+            elif message.get("role") == "user" and asked and text:
+                previous = self.values.get(asked.name)
+                self.values[asked.name] = f"{previous} {text}" if previous else text
+        return self
+
+    def summary(self) -> str:
+        lines = [f"Current stage: {self.stage.name}.", "Complaint details collected so far:"]
+        for field in self._fields:
+            lines.append(f"- {field.name}: {self.values.get(field.name, '(not collected yet)')}")
+        return "\n".join(lines)
+
+
+class StageContextProcessor(FrameProcessor):
+    """Replaces the LLM context with a stage-scoped, compacted copy.
+
+    Place it between the user context aggregator and the LLM. Context frames
+    are replaced by a new context; the aggregators keep the original, full
+    transcript.
+
+    Args:
+        prompt: The full call script.
+        stages: The conversation stages, in order.
+        fields: The complaint details summarized from older turns.
+        core_sections: Script sections sent in every stage, in addition to
+            the preamble.
+        recent_messages: Number of most recent messages sent verbatim.
+    """
+
+    def __init__(
+        self,
+        *,
+        prompt: str,
+        stages: Sequence[Stage],
+        fields: Sequence[ComplaintField],
+        core_sections: Sequence[str] = (),
+        recent_messages: int = 6,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self._preamble, self._sections = split_sections(prompt)
+        self._stages = stages
+        self._fields = fields
+        self._core_sections = core_sections
+        self._recent_messages = recent_messages
+
+        self._turns = 0
+        self._tokens_saved = 0
+
+    def build_messages(self, messages: List[dict]) -> Tuple[List[dict], ConversationState]:
+        """The messages to send to the LLM instead of ``messages``."""
+        state = ConversationState(self._stages, self._fields).update(messages)
+
+        # The next stage's section is included too, since the bot's reply may
+        # be the first line of that stage.
+        stage_sections = list(self._core_sections)
+        for stage in self._stages[state.stage_index : state.stage_index + 2]:
+            stage_sections += [s for s in stage.sections if s not in stage_sections]
+        system_prompt = "\n\n".join(
+            [self._preamble] + [self._sections[s] for s in stage_sections if s in self._sections]
+        )
+
+        conversation = [m for m in messages if m.get("role") != "system"]
+        recent = conversation[-self._recent_messages :] if self._recent_messages else []
+
+        compacted = [{"role": "system", "content": system_prompt}]
+        if len(conversation) > len(recent):
+            compacted.append(
+                {
+                    "role": "system",
+                    "content": f"Earlier turns of this call are summarized.\n{state.summary()}",
+                }
+            )
+        return compacted + recent, state
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, OpenAILLMContextFrame) and direction == FrameDirection.DOWNSTREAM:
+            frame = self._compact(frame)
+
+        await self.push_frame(frame, direction)
+
+    def _compact(self, frame: OpenAILLMContextFrame) -> OpenAILLMContextFrame:
+        full_messages = frame.context.get_messages()
+        messages, state = self.build_messages(full_messages)
+
+        full_tokens = sum(approx_tokens(_message_text(m)) for m in full_messages)
+        sent_tokens = sum(approx_tokens(_message_text(m)) for m in messages)
+        self._turns += 1
+        self._tokens_saved += full_tokens - sent_tokens
+        logger.debug(
+            f"{self}: stage {state.stage.name}, ~{sent_tokens} prompt tokens instead of "
+            f"~{full_tokens} (saved ~{full_tokens - sent_tokens}, "
+            f"~{self._tokens_saved} over {self._turns} turns)"
+        )
+
+        context = OpenAILLMContext(
+            messages, tools=frame.context.tools, tool_choice=frame.context.tool_choice
+        )
+        return OpenAILLMContextFrame(context=context)
@@ -0,0 +1,174 @@
+"""Incremental Whisper transcription while the user is still talking.
+
+Whisper used to see each utterance only once the VAD had declared it
+finished, so the whole utterance was decoded after the caller stopped, and
+long complaints and addresses took the longest. The audio is now decoded
+periodically while the caller speaks. Words that two consecutive decodes
+agree on (the local-agreement policy) are committed and pushed as partial
+transcripts; when the utterance ends only the audio after the last
+committed word still has to be transcribed.
+"""
+
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+from pipecat.audio.interruptions.base_interruption_strategy import BaseInterruptionStrategy
+from pipecat.frames.frames import (
+    BotInterruptionFrame,
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    Frame,
+    InterimTranscriptionFrame,
+    UserStartedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+# Committed words Whisper may repeat at the start of the next window.
+MAX_REPEATED_WORDS = 5
+
+
+@dataclass
+class Word:
+    """A transcribed word, with times in seconds from the utterance start."""
+
+    start: float
+    end: float
+    text: str
+
+
+def transcribe_words(
+    model: Any,
+    audio: np.ndarray,
+    language: Optional[str],
+    no_speech_prob: float,
+    *,
+    offset_s: float = 0.0,
+    initial_prompt: Optional[str] = None,
+    beam_size: int = 5,
+) -> List[Word]:
+    """Transcribe ``audio`` with word timestamps, shifted by ``offset_s``.
+
+    Runs ``WhisperModel.transcribe`` and consumes its lazy segments, so call
+    it from a worker thread.
+    """
+    segments, _ = model.transcribe(
+        audio,
+        language=language,
+        beam_size=beam_size,
+        word_timestamps=True,
+        initial_prompt=initial_prompt,
+        condition_on_previous_text=False,
+    )
+    words = []
+    for segment in segments:
+        if segment.no_speech_prob >= no_speech_prob:
+            continue
+        for word in segment.words or []:
+            text = word.word.strip()
+            if text:
+                words.append(Word(word.start + offset_s, word.end + offset_s, text))
+    return words
+
+
+def _word_key(word: Word) -> str:
+    # Only punctuation is dropped: Kannada vowel signs don't count as \w.
+    return "".join(c for c in word.text if not unicodedata.category(c).startswith("P")).lower()
+
+
+class LocalAgreement:
+    """Commits the words that two consecutive hypotheses agree on.
+
+    Each decode of the growing utterance is a hypothesis. A word is only
+    committed once the next decode, with more audio, produces the same word
+    at the same position, so committed words rarely change.
+    """
+
+    def __init__(self):
+        self.committed: List[Word] = []
+        self._previous: List[Word] = []
+
+    @property
+    def committed_end_s(self) -> float:
+        return self.committed[-1].end if self.committed else 0.0
+
+    @property
+    def text(self) -> str:
+        return " ".join(word.text for word in self.committed)
+
+    def insert(self, words: Sequence[Word]) -> List[Word]:
+        """Add a new hypothesis.
+
+        Returns:
+            The newly committed words.
+        """
+        # Only words after the committed audio are new. Whisper may still
+        # repeat the last committed words at the start of its window.
+        words = [w for w in words if w.start > self.committed_end_s - 0.1]
+        for n in range(min(MAX_REPEATED_WORDS, len(self.committed), len(words)), 0, -1):
+            if [_word_key(w) for w in self.committed[-n:]] == [_word_key(w) for w in words[:n]]:
+                words = words[n:]
+                break
+
+        agreed = []
+        for previous, word in zip(self._previous, words):
+            if _word_key(previous) != _word_key(word):
+                break
+            agreed.append(word)
+
+        self.committed += agreed
+        self._previous = words[len(agreed) :]
+        return agreed
+
+    def reset(self):
+        self.committed = []
+        self._previous = []
+
+
+class PartialTranscriptInterruption(FrameProcessor):
+    """Lets interruption strategies act on partial transcripts.
+
+    The user context aggregator only consults its interruption strategies
+    with the final transcript, after the caller stopped talking. Placed
+    between the STT and the aggregator, this processor runs its own
+    strategies on every partial transcript while the bot speaks, and
+    interrupts the bot as soon as one of them agrees.
+
+    Args:
+        strategies: Interruption strategies. They must be separate instances
+            from the transport's, since they are reset for every partial.
+    """
+
+    def __init__(self, *, strategies: Sequence[BaseInterruptionStrategy], **kwargs):
+        super().__init__(**kwargs)
+        self._strategies = strategies
+        self._bot_speaking = False
+        self._interrupted = False
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, BotStartedSpeakingFrame):
+            self._bot_speaking = True
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            self._bot_speaking = False
+        elif isinstance(frame, UserStartedSpeakingFrame):
+            self._interrupted = False
+        elif isinstance(frame, InterimTranscriptionFrame):
+            if self._bot_speaking and not self._interrupted:
+                if await self._should_interrupt(frame.text):
+                    self._interrupted = True
+                    await self.push_frame(BotInterruptionFrame(), FrameDirection.UPSTREAM)
+
+        await self.push_frame(frame, direction)
+
+    async def _should_interrupt(self, text: str) -> bool:
+        # Partial transcripts are cumulative, so each is judged on its own.
+        interrupt = False
+        for strategy in self._strategies:
+            await strategy.reset()
+            await strategy.append_text(text)
+            interrupt = interrupt or await strategy.should_interrupt()
+        return interrupt
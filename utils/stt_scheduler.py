@@ -0,0 +1,338 @@
+"""Cross-call micro-batching of Whisper transcriptions.
+
+Each call's STT service used to transcribe its finished utterance on its own,
+so with many calls on a replica the GPU saw a stream of small, serialized
+jobs. The scheduler collects utterances from every pipeline for a few
+milliseconds and runs them through CTranslate2 as a single batch.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+SAMPLE_RATE = 16000
+# Whisper's encoder always sees 30 second windows.
+MAX_BATCHED_SAMPLES = 30 * SAMPLE_RATE
+
+
+@dataclass
+class _PendingUtterance:
+    model: Any
+    audio: np.ndarray
+    no_speech_prob: float
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def _make_tokenizer(model: Any, language: Optional[str]):
+    from faster_whisper.tokenizer import Tokenizer
+
+    multilingual = model.model.is_multilingual
+    return Tokenizer(
+        model.hf_tokenizer,
+        multilingual,
+        task="transcribe",
+        language=(language or "en") if multilingual else None,
+    )
+
+
+def transcribe_batch(
+    model: Any,
+    audios: List[np.ndarray],
+    language: Optional[str],
+    *,
+    beam_size: int = 5,
+) -> List[Tuple[str, float]]:
+    """Transcribe several short utterances with one CTranslate2 call.
+
+    Every utterance must be at most 30 seconds of 16 kHz float32 audio.
+    When ``language`` is None the language is detected per utterance, in
+    the same batched encoder pass.
+
+    Returns:
+        A list of (text, no_speech_prob) pairs in the order of ``audios``.
+    """
+    from faster_whisper.audio import pad_or_trim
+
+    features = np.stack([pad_or_trim(model.feature_extractor(audio)) for audio in audios])
+    encoder_output = model.encode(features)
+
+    tokenizer = _make_tokenizer(model, language)
+    prompt = list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+    prompts = [list(prompt) for _ in audios]
+
+    if language is None and model.model.is_multilingual:
+        language_index = prompt.index(tokenizer.language)
+        detected = model.model.detect_language(encoder_output)
+        for i, languages in enumerate(detected):
+            prompts[i][language_index] = tokenizer.tokenizer.token_to_id(languages[0][0])
+
+    results = model.model.generate(
+        encoder_output,
+        prompts,
+        beam_size=beam_size,
+        max_length=model.max_length,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+        return_no_speech_prob=True,
+    )
+
+    return [
+        (tokenizer.decode(result.sequences_ids[0]).strip(), result.no_speech_prob)
+        for result in results
+    ]
+
+
+def transcribe_single(
+    model: Any,
+    audio: np.ndarray,
+    language: Optional[str],
+    no_speech_prob: float,
+    **kwargs,
+) -> str:
+    """Transcribe one utterance of any length with ``WhisperModel.transcribe``.
+
+    Segments are generated lazily, so they are consumed here, in the worker
+    thread, rather than on the event loop.
+    """
+    segments, _ = model.transcribe(audio, language=language, **kwargs)
+    text = ""
+    for segment in segments:
+        if segment.no_speech_prob < no_speech_prob:
+            text += f"{segment.text} "
+    return text
+
+
+class WhisperBatchScheduler:
+    """Gathers pending utterances from all calls and transcribes them in batches.
+
+    A batch is dispatched as soon as one of these holds:
+
+    - it reaches ``max_batch_size`` utterances;
+    - no new utterance arrived for ``window_ms``;
+    - the oldest utterance has waited ``max_wait_ms``.
+
+    Only utterances for the same model and language are batched together.
+    One batch runs at a time, so while the GPU is busy the next batch keeps
+    filling up.
+
+    Args:
+        window_ms: How long to wait for another utterance before dispatching.
+        max_wait_ms: Upper bound on how long any utterance waits in the queue.
+        max_batch_size: Largest number of utterances per CTranslate2 call.
+        beam_size: Beam size used for decoding.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_ms: float = 15.0,
+        max_wait_ms: float = 60.0,
+        max_batch_size: int = 8,
+        beam_size: int = 5,
+    ):
+        self._window_s = window_ms / 1000
+        self._max_wait_s = max_wait_ms / 1000
+        self._max_batch_size = max(1, max_batch_size)
+        self._beam_size = beam_size
+
+        self._queues: Dict[Tuple[int, Optional[str]], Deque[_PendingUtterance]] = {}
+        self._last_arrival: Dict[Tuple[int, Optional[str]], float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._max_queue_depth = 0
+        self._batches = 0
+        self._utterances = 0
+        self._batch_sizes: Counter = Counter()
+        self._total_queue_wait_s = 0.0
+        self._total_inference_s = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def transcribe(
+        self,
+        model: Any,
+        audio: np.ndarray,
+        language: Optional[str],
+        no_speech_prob: float = 0.4,
+    ) -> str:
+        """Queue an utterance and wait for its transcript.
+
+        Args:
+            model: The ``WhisperModel`` to transcribe with.
+            audio: 16 kHz mono float32 samples.
+            language: Whisper language code, or None to auto-detect.
+            no_speech_prob: Transcripts more likely than this to be silence
+                are dropped.
+
+        Returns:
+            The transcript, or an empty string.
+        """
+        self._ensure_started()
+
+        # Keyed by id: the pending utterances hold the model itself, so the
+        # id is not reused while its queue exists.
+        key = (id(model), language)
+        queue = self._queues.setdefault(key, deque())
+
+        item = _PendingUtterance(
+            model=model,
+            audio=audio,
+            no_speech_prob=no_speech_prob,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        queue.append(item)
+        self._last_arrival[key] = item.enqueued_at
+        self._max_queue_depth = max(self._max_queue_depth, self.queue_depth)
+        self._wakeup.set()
+
+        return await item.future
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in self._queues.values():
+            for item in queue:
+                if not item.future.done():
+                    item.future.cancel()
+        self._queues.clear()
+        self._last_arrival.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self._max_queue_depth,
+            "batches": self._batches,
+            "utterances": self._utterances,
+            "avg_batch_size": round(self._utterances / self._batches, 2) if self._batches else 0.0,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+            "avg_queue_wait_ms": round(1000 * self._total_queue_wait_s / self._utterances, 1)
+            if self._utterances
+            else 0.0,
+            "avg_batch_inference_ms": round(1000 * self._total_inference_s / self._batches, 1)
+            if self._batches
+            else 0.0,
+        }
+
+    def _ensure_started(self):
+        if not self._task or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch_loop())
+
+    def _oldest_key(self) -> Optional[Tuple[int, Optional[str]]]:
+        pending = [(queue[0].enqueued_at, key) for key, queue in self._queues.items() if queue]
+        return min(pending)[1] if pending else None
+
+    async def _wait(self, timeout: float):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch_loop(self):
+        while True:
+            key = self._oldest_key()
+            if key is None:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            queue = self._queues[key]
+            now = time.monotonic()
+            deadline = min(
+                queue[0].enqueued_at + self._max_wait_s,
+                self._last_arrival[key] + self._window_s,
+            )
+            if len(queue) < self._max_batch_size and now < deadline:
+                await self._wait(deadline - now)
+                continue
+
+            batch = self._take_batch(key)
+            if batch:
+                await self._run_batch(batch[0].model, key[1], batch)
+            # The loop must not keep the batch's model alive while it waits.
+            del batch
+
+    def _take_batch(self, key: Tuple[int, Optional[str]]) -> List[_PendingUtterance]:
+        queue = self._queues[key]
+        batch: List[_PendingUtterance] = []
+        while queue and len(batch) < self._max_batch_size:
+            item = queue.popleft()
+            # The caller was interrupted while waiting in the queue.
+            if not item.future.done():
+                batch.append(item)
+        # Don't keep the model, or a key per model ever seen, once the queue
+        # is drained; an evicted model must be freed.
+        if not queue:
+            del self._queues[key]
+            del self._last_arrival[key]
+        return batch
+
+    async def _run_batch(self, model: Any, language: Optional[str], batch: List[_PendingUtterance]):
+        start = time.monotonic()
+        for item in batch:
+            self._total_queue_wait_s += start - item.enqueued_at
+
+        try:
+            results = await asyncio.to_thread(self._transcribe_batch, model, language, batch)
+        except Exception as e:
+            logger.error(f"Batched Whisper transcription failed: {e}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        self._total_inference_s += time.monotonic() - start
+        self._batches += 1
+        self._utterances += len(batch)
+        self._batch_sizes[len(batch)] += 1
+
+        for item, text in zip(batch, results):
+            if not item.future.done():
+                item.future.set_result(text)
+
+    def _transcribe_batch(
+        self, model: Any, language: Optional[str], batch: List[_PendingUtterance]
+    ) -> List[str]:
+        results = [""] * len(batch)
+
+        short = [i for i, item in enumerate(batch) if len(item.audio) <= MAX_BATCHED_SAMPLES]
+        if short:
+            outputs = transcribe_batch(
+                model, [batch[i].audio for i in short], language, beam_size=self._beam_size
+            )
+            for i, (text, no_speech_prob) in zip(short, outputs):
+                if no_speech_prob < batch[i].no_speech_prob:
+                    results[i] = text
+
+        # Utterances longer than one Whisper window go through the regular
+        # sequential path.
+        for i, item in enumerate(batch):
+            if len(item.audio) > MAX_BATCHED_SAMPLES:
+                results[i] = transcribe_single(
+                    model, item.audio, language, item.no_speech_prob, beam_size=self._beam_size
+                )
+
+        return results
+
+
+stt_scheduler = WhisperBatchScheduler(
+    window_ms=float(os.getenv("STT_BATCH_WINDOW_MS", "15")),
+    max_wait_ms=float(os.getenv("STT_BATCH_MAX_WAIT_MS", "60")),
+    max_batch_size=int(os.getenv("STT_BATCH_MAX_SIZE", "8")),
+)
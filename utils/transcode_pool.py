@@ -0,0 +1,137 @@
+"""Bounded worker pool for audio transcoding.
+
+MP3 decoding and resampling used to run synchronously on the event loop that
+also drives every other call's transport, VAD and LLM streaming. Jobs are
+now executed in a dedicated executor, with a cap on how many may be queued or
+running at once so a burst of long replies cannot pile up unbounded work.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+
+def _timed_call(fn: Callable, args: Tuple) -> Tuple[float, float, Any]:
+    # Wall clock, so the timestamps are comparable across processes.
+    start = time.time()
+    result = fn(*args)
+    return start, time.time(), result
+
+
+class TranscodePool:
+    """Runs transcoding jobs off the event loop with backpressure.
+
+    At most ``max_pending`` jobs are queued or running; further callers wait
+    for a slot. When the awaiting coroutine is cancelled (for example because
+    the user interrupted the bot) a job that has not started yet is dropped,
+    and the result of one that is already running is discarded.
+
+    Args:
+        max_workers: Number of worker threads or processes.
+        max_pending: Maximum number of jobs queued or running at once.
+        use_processes: Use a process pool instead of threads. Job functions
+            and arguments must then be picklable.
+    """
+
+    def __init__(self, *, max_workers: int = 2, max_pending: int = 8, use_processes: bool = False):
+        self._max_workers = max_workers
+        self._max_pending = max(max_pending, max_workers)
+        self._use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self._max_pending)
+        self._in_flight = 0
+
+        self._jobs = 0
+        self._cancelled = 0
+        self._failed = 0
+        self._total_queue_wait_s = 0.0
+        self._max_queue_wait_s = 0.0
+        self._total_decode_s = 0.0
+        self._max_decode_s = 0.0
+
+    def _get_executor(self) -> Executor:
+        if not self._executor:
+            if self._use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="transcode"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn(*args)`` in the pool and return its result."""
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+
+        await self._slots.acquire()
+        self._in_flight += 1
+        try:
+            future = self._get_executor().submit(_timed_call, fn, args)
+        except Exception:
+            self._release_slot()
+            raise
+        # Free the slot when the job really finishes, not when the caller
+        # gives up on it, so cancelled-but-running jobs still count.
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release_slot))
+
+        try:
+            # Cancelling the wrapped future also cancels a job still in the queue.
+            start, end, result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self._cancelled += 1
+            raise
+        except Exception as e:
+            self._failed += 1
+            logger.error(f"Transcoding job {getattr(fn, '__name__', fn)} failed: {e}")
+            raise
+
+        self._record(start - submitted, end - start)
+        return result
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self._max_workers,
+            "max_pending": self._max_pending,
+            "in_flight": self._in_flight,
+            "jobs": self._jobs,
+            "cancelled": self._cancelled,
+            "failed": self._failed,
+            "avg_queue_wait_ms": round(1000 * self._total_queue_wait_s / self._jobs, 1)
+            if self._jobs
+            else 0.0,
+            "max_queue_wait_ms": round(1000 * self._max_queue_wait_s, 1),
+            "avg_decode_ms": round(1000 * self._total_decode_s / self._jobs, 1)
+            if self._jobs
+            else 0.0,
+            "max_decode_ms": round(1000 * self._max_decode_s, 1),
+        }
+
+    def _release_slot(self):
+        self._in_flight -= 1
+        self._slots.release()
+
+    def _record(self, queue_wait_s: float, decode_s: float):
+        queue_wait_s = max(0.0, queue_wait_s)
+        self._jobs += 1
+        self._total_queue_wait_s += queue_wait_s
+        self._max_queue_wait_s = max(self._max_queue_wait_s, queue_wait_s)
+        self._total_decode_s += decode_s
+        self._max_decode_s = max(self._max_decode_s, decode_s)
+        logger.trace(f"Transcode queue wait {1000 * queue_wait_s:.1f}ms, decode {1000 * decode_s:.1f}ms")
+
+
+transcode_pool = TranscodePool(
+    max_workers=int(os.getenv("TRANSCODE_WORKERS", "4")),
+    max_pending=int(os.getenv("TRANSCODE_MAX_PENDING", "16")),
+    use_processes=os.getenv("TRANSCODE_USE_PROCESSES", "0") == "1",
+)
@@ -0,0 +1,142 @@
+"""Decoded-PCM cache for repeated TTS phrases.
+
+The bot follows a fixed script, so most of what it says is one of a few
+dozen sentences. Caching the decoded PCM lets those sentences play
+immediately, without a round trip to the TTS API or an MP3 decode.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+CacheKey = Tuple[str, str, str, int]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so that trivially different renderings share a cache entry."""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class TTSPhraseCache:
+    """Two-tier (memory LRU + optional disk) cache of synthesized PCM audio.
+
+    Entries are keyed by (normalized text, language, voice, sample rate). The
+    memory tier evicts least recently used entries once ``max_bytes`` is
+    exceeded; the disk tier, when ``disk_dir`` is set, keeps every entry and
+    survives restarts so pre-rendering is only paid once per deployment.
+
+    Args:
+        max_bytes: Memory budget for cached PCM.
+        disk_dir: Directory for the on-disk tier. Disabled when None.
+    """
+
+    def __init__(self, *, max_bytes: int = 64 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self._max_bytes = max_bytes
+        self._disk_dir = disk_dir
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._bytes = 0
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        if self._disk_dir:
+            os.makedirs(self._disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, language: str, voice: str, sample_rate: int) -> CacheKey:
+        return (normalize_text(text), language, voice, sample_rate)
+
+    async def get(self, text: str, language: str, voice: str, sample_rate: int) -> Optional[bytes]:
+        key = self.make_key(text, language, voice, sample_rate)
+
+        pcm = self._entries.get(key)
+        if pcm is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return pcm
+
+        if self._disk_dir:
+            pcm = await asyncio.to_thread(self._read_disk, key)
+            if pcm is not None:
+                self._store_memory(key, pcm)
+                self._disk_hits += 1
+                return pcm
+
+        self._misses += 1
+        return None
+
+    async def put(self, text: str, language: str, voice: str, sample_rate: int, pcm: bytes):
+        if not pcm:
+            return
+        key = self.make_key(text, language, voice, sample_rate)
+        self._store_memory(key, pcm)
+        if self._disk_dir:
+            await asyncio.to_thread(self._write_disk, key, pcm)
+
+    async def contains(self, text: str, language: str, voice: str, sample_rate: int) -> bool:
+        key = self.make_key(text, language, voice, sample_rate)
+        if key in self._entries:
+            return True
+        if self._disk_dir:
+            return await asyncio.to_thread(os.path.exists, self._disk_path(key))
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._disk_hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_rate": round((self._hits + self._disk_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+    def _store_memory(self, key: CacheKey, pcm: bytes):
+        # A single phrase larger than the whole budget is not worth keeping.
+        if len(pcm) > self._max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = pcm
+        self._bytes += len(pcm)
+        while self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _disk_path(self, key: CacheKey) -> str:
+        digest = hashlib.sha256("\x1f".join(map(str, key)).encode("utf-8")).hexdigest()
+        return os.path.join(self._disk_dir, f"{digest}.pcm")
+
+    def _read_disk(self, key: CacheKey) -> Optional[bytes]:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read TTS cache entry: {e}")
+            return None
+
+    def _write_disk(self, key: CacheKey, pcm: bytes):
+        # Write to a temporary file first so a crash never leaves a truncated entry.
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self._disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            logger.warning(f"Failed to write TTS cache entry: {e}")
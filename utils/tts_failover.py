@@ -0,0 +1,472 @@
+"""Hedged TTS requests, a circuit breaker and fallback voices.
+
+Bhashini's ``/synthesize`` has a long latency tail and requests had no
+timeout: a slow request held up the whole reply, and a failed one left the
+caller in silence. Requests are now hedged: when the first byte hasn't
+arrived by the recent p95 first-byte latency, a duplicate request is sent
+and whichever answers first is used. A circuit breaker stops sending
+requests to an endpoint that keeps failing, and when Bhashini fails or the
+breaker is open the sentence is spoken by a fallback voice instead.
+"""
+
+import asyncio
+import io
+import math
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, List, Optional, Protocol, Set
+
+from loguru import logger
+from pydub import AudioSegment
+
+from utils.http_pool import HTTPPool, http_pool
+from utils.latency_tracing import LatencyHistogram
+from utils.resampler import resample_pcm
+from utils.transcode_pool import TranscodePool, transcode_pool
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class TTSUnavailableError(Exception):
+    """Raised when no attempt produced audio in time."""
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    requests are skipped for ``reset_timeout_s``. Then a single trial
+    request is let through; if it succeeds the breaker closes again.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker.
+        reset_timeout_s: How long the breaker stays open.
+    """
+
+    def __init__(self, *, failure_threshold: int = 3, reset_timeout_s: float = 30.0):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout_s = reset_timeout_s
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at < self._reset_timeout_s:
+            return OPEN
+        return HALF_OPEN
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN:
+            return False
+        # A trial whose outcome never came (e.g. it was interrupted) is
+        # replaced after another reset timeout.
+        now = time.monotonic()
+        if self._trial_started_at is None or now - self._trial_started_at >= self._reset_timeout_s:
+            self._trial_started_at = now
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        trial = self._trial_started_at is not None
+        if trial or self._failures >= self._failure_threshold:
+            if self._opened_at is None:
+                self.opened += 1
+                logger.warning(f"TTS circuit breaker open after {self._failures} failures")
+            self._opened_at = time.monotonic()
+            self._trial_started_at = None
+
+
+class HedgeDeadline:
+    """The first-byte delay after which a duplicate request is sent.
+
+    Follows the given percentile of recent first-byte latencies, within
+    ``[min_s, max_s]``. Until enough latencies were seen ``initial_s`` is
+    used.
+
+    Args:
+        percentile: Percentile of the recent latencies to hedge at.
+        window: Number of recent latencies kept.
+        min_samples: Latencies needed before the percentile is used.
+        initial_s: Deadline before that.
+        min_s: Lower bound, so a fast streak doesn't double the traffic.
+        max_s: Upper bound.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 95.0,
+        window: int = 200,
+        min_samples: int = 20,
+        initial_s: float = 1.0,
+        min_s: float = 0.3,
+        max_s: float = 2.0,
+    ):
+        self._percentile = percentile
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+        self._initial_s = initial_s
+        self._min_s = min_s
+        self._max_s = max_s
+
+    def observe(self, latency_s: float):
+        self._samples.append(latency_s)
+
+    def deadline_s(self) -> float:
+        if len(self._samples) < self._min_samples:
+            return self._initial_s
+        samples = sorted(self._samples)
+        index = min(len(samples) - 1, max(0, math.ceil(self._percentile / 100 * len(samples)) - 1))
+        return min(self._max_s, max(self._min_s, samples[index]))
+
+
+class FallbackVoice(Protocol):
+    """A secondary TTS that synthesizes a whole sentence to PCM."""
+
+    name: str
+
+    async def synthesize(self, text: str, sample_rate: int) -> bytes: ...
+
+
+def audio_to_pcm(data: bytes, sample_rate: int, format: str = "wav") -> bytes:
+    """Decode an audio file to 16-bit mono PCM at the given sample rate."""
+    audio = AudioSegment.from_file(io.BytesIO(data), format=format)
+    audio = audio.set_channels(1).set_sample_width(2)
+    return resample_pcm(audio.raw_data, audio.frame_rate, sample_rate)
+
+
+class EspeakVoice:
+    """A local voice: espeak-ng, which has a Kannada voice.
+
+    It sounds robotic but needs no network, so the caller hears the reply
+    even when every remote TTS is down.
+
+    Args:
+        voice: espeak-ng voice name.
+        speed: Words per minute.
+        transcoder: Pool the WAV is converted in.
+    """
+
+    name = "espeak"
+
+    def __init__(
+        self, *, voice: str = "kn", speed: int = 150, transcoder: Optional[TranscodePool] = None
+    ):
+        self._voice = voice
+        self._speed = speed
+        self._transcoder = transcoder or transcode_pool
+
+    async def synthesize(self, text: str, sample_rate: int) -> bytes:
+        process = await asyncio.create_subprocess_exec(
+            "espeak-ng",
+            "-v",
+            self._voice,
+            "-s",
+            str(self._speed),
+            "--stdout",
+            text,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            wav, error = await process.communicate()
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        if process.returncode != 0:
+            message = error.decode(errors="replace").strip()
+            raise RuntimeError(f"espeak-ng exited with {process.returncode}: {message}")
+        return await self._transcoder.run(audio_to_pcm, wav, sample_rate)
+
+
+class GroqSpeechVoice:
+    """Groq's OpenAI-compatible ``/audio/speech`` (PlayAI voices).
+
+    PlayAI has no Kannada voice, so this is only a fallback for English.
+
+    Args:
+        api_key: Groq API key.
+        base_url: Groq's OpenAI-compatible base URL.
+        model: Speech model.
+        voice: Voice name.
+        http: Pool the request's session is borrowed from.
+        transcoder: Pool the WAV is converted in.
+    """
+
+    name = "groq"
+
+    def __init__(
+        self,
+        *,
+        api_key: Optional[str],
+        base_url: str = "https://api.groq.com/openai/v1",
+        model: str = "playai-tts",
+        voice: str = "Celeste-PlayAI",
+        http: Optional[HTTPPool] = None,
+        transcoder: Optional[TranscodePool] = None,
+    ):
+        self._api_key = api_key
+        self._base_url = base_url
+        self._model = model
+        self._voice = voice
+        self._http = http or http_pool
+        self._transcoder = transcoder or transcode_pool
+
+    async def synthesize(self, text: str, sample_rate: int) -> bytes:
+        payload = {
+            "model": self._model,
+            "voice": self._voice,
+            "input": text,
+            "response_format": "wav",
+        }
+        headers = {"Authorization": f"Bearer {self._api_key}"}
+        async with self._http.session(self._base_url).post(
+            f"{self._base_url}/audio/speech", json=payload, headers=headers
+        ) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Groq speech error: {await response.text()}")
+            wav = await response.read()
+        return await self._transcoder.run(audio_to_pcm, wav, sample_rate)
+
+
+class TTSProviderMetrics:
+    """Counters of which provider served each utterance, and how fast."""
+
+    def __init__(self):
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.primary_failures = 0
+        self.breaker_skips = 0
+        self.fallbacks = 0
+        self.fallback_failures = 0
+
+    def record_utterance(self, provider: str, latency_ms: float):
+        self._latency.setdefault(provider, LatencyHistogram()).observe(latency_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "utterances_ms": {name: h.summary() for name, h in self._latency.items()},
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "primary_failures": self.primary_failures,
+            "breaker_skips": self.breaker_skips,
+            "fallbacks": self.fallbacks,
+            "fallback_failures": self.fallback_failures,
+        }
+
+
+async def _next_chunk(stream: AsyncGenerator[bytes, None]) -> Optional[bytes]:
+    async for chunk in stream:
+        if chunk:
+            return chunk
+    return None
+
+
+class _Attempt:
+    def __init__(self, index: int, stream: AsyncGenerator[bytes, None]):
+        self.index = index
+        self.stream = stream
+        self.started_at = time.monotonic()
+        self.task = asyncio.ensure_future(_next_chunk(stream))
+
+
+class TTSFailover:
+    """Hedging, circuit breaking and fallback for one primary TTS endpoint.
+
+    Args:
+        name: Name of the primary provider, used in reports.
+        fallback: Voice used when the primary fails or its breaker is open.
+        deadline: When to send the hedged duplicate request.
+        breaker: Circuit breaker of the primary endpoint.
+        first_byte_timeout_s: Time without a first byte after which all
+            attempts are given up.
+        hedging: Set to False to only use the timeout, breaker and fallback.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str = "bhasni",
+        fallback: Optional[FallbackVoice] = None,
+        deadline: Optional[HedgeDeadline] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        first_byte_timeout_s: float = 4.0,
+        hedging: bool = True,
+    ):
+        self.name = name
+        self._fallback = fallback
+        self._deadline = deadline or HedgeDeadline()
+        self._breaker = breaker or CircuitBreaker()
+        self._first_byte_timeout_s = first_byte_timeout_s
+        self._hedging = hedging
+        self._metrics = TTSProviderMetrics()
+        self._measuring: Set[asyncio.Task] = set()
+
+    @property
+    def has_fallback(self) -> bool:
+        return self._fallback is not None
+
+    @property
+    def fallback_name(self) -> Optional[str]:
+        return self._fallback.name if self._fallback else None
+
+    def primary_available(self) -> bool:
+        """Whether the primary may be called. Without a fallback it always is."""
+        if self._fallback is None or self._breaker.allow():
+            return True
+        self._metrics.breaker_skips += 1
+        return False
+
+    def record_utterance(self, provider: str, latency_ms: float):
+        self._metrics.record_utterance(provider, latency_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._metrics.stats(),
+            "breaker": self._breaker.state,
+            "breaker_opened": self._breaker.opened,
+            "hedge_deadline_ms": round(1000 * self._deadline.deadline_s(), 1),
+        }
+
+    async def fallback(self, text: str, sample_rate: int) -> bytes:
+        """Synthesize ``text`` with the fallback voice."""
+        self._metrics.fallbacks += 1
+        try:
+            return await self._fallback.synthesize(text, sample_rate)
+        except Exception:
+            self._metrics.fallback_failures += 1
+            raise
+
+    async def stream(
+        self, open_stream: Callable[[], AsyncGenerator[bytes, None]], info: Dict[str, Any]
+    ) -> AsyncGenerator[bytes, None]:
+        """Yield the response body of the first attempt that starts answering.
+
+        ``open_stream`` starts a request and returns its body chunks. A
+        duplicate is started when the first byte is later than the hedge
+        deadline, or right away if the first attempt fails. ``info`` gets
+        ``hedged`` and ``winner`` (0 for the first attempt, 1 for the hedge).
+
+        Raises:
+            TTSUnavailableError: If no attempt produced a first byte.
+        """
+        start = time.monotonic()
+        hedge_at = start + self._deadline.deadline_s()
+        attempts: List[_Attempt] = [_Attempt(0, open_stream())]
+        info["hedged"] = False
+        winner: Optional[_Attempt] = None
+        error: Optional[BaseException] = None
+
+        try:
+            while winner is None:
+                now = time.monotonic()
+                pending = [a.task for a in attempts if not a.task.done()]
+                # Hedge a slow first attempt, or retry a failed one.
+                if self._hedging and len(attempts) == 1 and (now >= hedge_at or not pending):
+                    self._start_hedge(attempts, open_stream, info)
+                    continue
+                if not pending:
+                    break
+
+                remaining_s = start + self._first_byte_timeout_s - now
+                if remaining_s <= 0:
+                    error = asyncio.TimeoutError(f"no audio after {self._first_byte_timeout_s}s")
+                    break
+                if self._hedging and len(attempts) == 1:
+                    remaining_s = min(remaining_s, hedge_at - now)
+                await asyncio.wait(pending, timeout=remaining_s, return_when=asyncio.FIRST_COMPLETED)
+
+                for attempt in attempts:
+                    if not attempt.task.done() or attempt.task.cancelled():
+                        continue
+                    if attempt.task.exception():
+                        error = attempt.task.exception()
+                    elif attempt.task.result() is None:
+                        error = TTSUnavailableError("empty response")
+                    elif winner is None:
+                        winner = attempt
+        finally:
+            # The losing request is cancelled and its connection released,
+            # once its first byte was timed if there is a winner.
+            for attempt in attempts:
+                if attempt is winner:
+                    continue
+                if winner is not None:
+                    self._measure_loser(attempt)
+                    continue
+                if not attempt.task.done():
+                    attempt.task.cancel()
+                    await asyncio.gather(attempt.task, return_exceptions=True)
+                await attempt.stream.aclose()
+
+        if winner is None:
+            self._breaker.record_failure()
+            self._metrics.primary_failures += 1
+            raise TTSUnavailableError(f"{self.name} failed: {error}") from error
+
+        self._breaker.record_success()
+        self._deadline.observe(time.monotonic() - winner.started_at)
+        info["winner"] = winner.index
+        if winner.index == 1:
+            self._metrics.hedge_wins += 1
+
+        try:
+            yield winner.task.result()
+            async for chunk in winner.stream:
+                yield chunk
+        finally:
+            await winner.stream.aclose()
+
+    def _start_hedge(
+        self,
+        attempts: List[_Attempt],
+        open_stream: Callable[[], AsyncGenerator[bytes, None]],
+        info: Dict[str, Any],
+    ):
+        elapsed_ms = 1000 * (time.monotonic() - attempts[0].started_at)
+        logger.debug(f"Hedging the {self.name} request after {elapsed_ms:.0f}ms")
+        attempts.append(_Attempt(1, open_stream()))
+        info["hedged"] = True
+        self._metrics.hedges += 1
+
+    def _measure_loser(self, attempt: _Attempt):
+        # Only the winner's latency would bias the deadline down: the slow
+        # requests a hedge beat are the ones the percentile is about.
+        async def measure():
+            try:
+                remaining_s = attempt.started_at + self._first_byte_timeout_s - time.monotonic()
+                first_chunk = await asyncio.wait_for(attempt.task, max(0.0, remaining_s))
+            except asyncio.TimeoutError:
+                # Never answered: it took at least the whole timeout.
+                latency_s = self._first_byte_timeout_s
+            except Exception:
+                return
+            else:
+                if first_chunk is None:
+                    return
+                latency_s = time.monotonic() - attempt.started_at
+            finally:
+                await attempt.stream.aclose()
+            self._deadline.observe(latency_s)
+
+        task = asyncio.ensure_future(measure())
+        self._measuring.add(task)
+        task.add_done_callback(self._measuring.discard)
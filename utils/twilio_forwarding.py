@@ -0,0 +1,185 @@
+"""Asynchronous Twilio call forwarding.
+
+The Twilio SDK client is synchronous, so updating the call from the
+``on_dialin_ready`` handler blocked the event loop shared by every call on
+the replica for a full HTTPS round trip. The call is now updated through the
+Twilio REST API on the pooled HTTP client, with bounded retries and an
+overall deadline.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+from xml.sax.saxutils import escape
+
+import aiohttp
+from dotenv import load_dotenv
+from loguru import logger
+
+from utils.http_pool import http_pool
+
+load_dotenv()
+
+TWILIO_API_URL = "https://api.twilio.com/2010-04-01"
+
+_ENDED_STATUSES = {"completed", "canceled", "failed", "busy", "no-answer"}
+
+
+class TwilioForwardingError(Exception):
+    """Raised when a call could not be forwarded."""
+
+
+class TwilioForwarder:
+    """Forwards Twilio calls to a SIP URI without blocking the event loop.
+
+    Connection errors, 429 and 5xx responses are retried with exponential
+    backoff, as long as ``max_attempts`` and the ``deadline_s`` allow it.
+    A request that failed after it was sent, e.g. on a read timeout, may
+    have redirected the call already, and a second redirect would restart
+    the TwiML and dial again. It is only retried when the call is still up
+    and has no child call from the ``<Dial>``.
+
+    Args:
+        account_sid: Twilio account SID.
+        auth_token: Twilio auth token.
+        max_attempts: Maximum number of requests per call.
+        deadline_s: Overall time limit for forwarding a call.
+        backoff_s: Delay before the first retry, doubled for each retry.
+    """
+
+    def __init__(
+        self,
+        *,
+        account_sid: Optional[str],
+        auth_token: Optional[str],
+        max_attempts: int = 3,
+        deadline_s: float = 10.0,
+        backoff_s: float = 0.25,
+    ):
+        self._account_sid = account_sid
+        self._auth_token = auth_token
+        self._max_attempts = max_attempts
+        self._deadline_s = deadline_s
+        self._backoff_s = backoff_s
+
+        self._forwarded = 0
+        self._failed = 0
+        self._retries = 0
+        self._total_s = 0.0
+        self._max_s = 0.0
+
+    async def forward(
+        self, call_sid: str, sip_uri: str, session: Optional[aiohttp.ClientSession] = None
+    ) -> float:
+        """Redirect ``call_sid`` to ``sip_uri``.
+
+        Returns:
+            The time it took to forward the call, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                self._forward_with_retries(call_sid, sip_uri, session), self._deadline_s
+            )
+        except asyncio.TimeoutError:
+            self._failed += 1
+            raise TwilioForwardingError(
+                f"Forwarding call {call_sid} did not finish within {self._deadline_s}s"
+            )
+        except Exception:
+            self._failed += 1
+            raise
+
+        elapsed = time.perf_counter() - start
+        self._forwarded += 1
+        self._total_s += elapsed
+        self._max_s = max(self._max_s, elapsed)
+        return elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "forwarded": self._forwarded,
+            "failed": self._failed,
+            "retries": self._retries,
+            "avg_ready_to_forward_ms": round(1000 * self._total_s / self._forwarded, 1)
+            if self._forwarded
+            else 0.0,
+            "max_ready_to_forward_ms": round(1000 * self._max_s, 1),
+        }
+
+    async def _forward_with_retries(
+        self, call_sid: str, sip_uri: str, session: Optional[aiohttp.ClientSession]
+    ):
+        session = session or http_pool.session(TWILIO_API_URL)
+        url = f"{TWILIO_API_URL}/Accounts/{self._account_sid}/Calls/{call_sid}.json"
+        data = {"Twiml": f"<Response><Dial><Sip>{escape(sip_uri)}</Sip></Dial></Response>"}
+        auth = aiohttp.BasicAuth(self._account_sid or "", self._auth_token or "")
+
+        for attempt in range(1, self._max_attempts + 1):
+            maybe_applied = False
+            try:
+                async with session.post(url, data=data, auth=auth) as response:
+                    if response.status < 300:
+                        return
+                    error_text = await response.text()
+                    error = TwilioForwardingError(
+                        f"Twilio API error (status: {response.status}): {error_text}"
+                    )
+                    if response.status != 429 and response.status < 500:
+                        raise error
+            except aiohttp.ClientConnectorError as e:
+                # Never reached Twilio.
+                error = TwilioForwardingError(f"Twilio API request failed: {e}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = TwilioForwardingError(f"Twilio API request failed: {e}")
+                maybe_applied = True
+
+            if attempt == self._max_attempts:
+                raise error
+
+            self._retries += 1
+            delay = self._backoff_s * 2 ** (attempt - 1)
+            logger.warning(f"Forwarding call {call_sid} failed, retrying in {delay:.2f}s: {error}")
+            await asyncio.sleep(delay)
+            if maybe_applied and await self._already_forwarded(session, call_sid, auth):
+                logger.info(f"Call {call_sid} was forwarded by the failed request")
+                return
+
+    async def _already_forwarded(
+        self, session: aiohttp.ClientSession, call_sid: str, auth: aiohttp.BasicAuth
+    ) -> bool:
+        """Whether an earlier redirect of ``call_sid`` took effect.
+
+        Raises:
+            TwilioForwardingError: If the call has ended or its state can't be
+                read, since sending the redirect again could dial twice.
+        """
+        calls_url = f"{TWILIO_API_URL}/Accounts/{self._account_sid}/Calls"
+        try:
+            async with session.get(f"{calls_url}/{call_sid}.json", auth=auth) as response:
+                response.raise_for_status()
+                status = (await response.json()).get("status")
+            if status in _ENDED_STATUSES:
+                raise TwilioForwardingError(
+                    f"Call {call_sid} ended ({status}) before it was forwarded"
+                )
+            # The <Dial> of an applied redirect starts a child call.
+            async with session.get(
+                f"{calls_url}.json", params={"ParentCallSid": call_sid}, auth=auth
+            ) as response:
+                response.raise_for_status()
+                children = (await response.json()).get("calls", [])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TwilioForwardingError(
+                f"Could not check whether call {call_sid} was forwarded: {e}"
+            ) from e
+        return bool(children)
+
+
+twilio_forwarder = TwilioForwarder(
+    account_sid=os.getenv("TWILIO_ACCOUNT_SID"),
+    auth_token=os.getenv("TWILIO_AUTH_TOKEN"),
+    max_attempts=int(os.getenv("TWILIO_FORWARD_MAX_ATTEMPTS", "3")),
+    deadline_s=float(os.getenv("TWILIO_FORWARD_DEADLINE_S", "10")),
+)
@@ -0,0 +1,299 @@
+"""One Silero VAD model for all calls, with frames batched across calls.
+
+Every call used to construct its own ``SileroVADAnalyzer``, so each call
+loaded its own ONNX session and ran one tiny inference per 32 ms of audio
+in its own thread. With 20 calls on a replica that is 20 copies of the
+model and hundreds of single-frame inferences a second competing for the
+GIL. The engine keeps one session; frames from all calls are collected for
+a few milliseconds and run as one batch. The model is recurrent, so every
+call keeps its own state and audio context, which are stacked into the
+batch and split again afterwards.
+"""
+
+import os
+import threading
+import time
+import weakref
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+
+from utils.latency_tracing import LatencyHistogram
+
+# Like pipecat's analyzer, a call's model state is reset this often; the
+# model doesn't need a longer memory.
+STATE_RESET_S = 5.0
+# Samples of the previous frame the model sees before each frame.
+CONTEXT_SAMPLES = {16000: 64, 8000: 32}
+FRAME_SAMPLES = {16000: 512, 8000: 256}
+
+
+def silero_model_path() -> str:
+    """Path of the Silero VAD model shipped with pipecat."""
+    from importlib import resources
+
+    return str(resources.files("pipecat.audio.vad.data").joinpath("silero_vad.onnx"))
+
+
+class _VADRequest:
+    def __init__(self, analyzer: "SharedSileroVADAnalyzer", audio: np.ndarray):
+        self.analyzer = analyzer
+        self.audio = audio
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.confidence = 0.0
+        self.cpu_s = 0.0
+        self.error: Optional[BaseException] = None
+
+
+class SileroVADEngine:
+    """Runs the Silero VAD of every call through one ONNX session.
+
+    Analyzers call ``infer`` from their transport's VAD thread, which blocks
+    until the frame's batch has run. A batch is dispatched when every active
+    call has a frame waiting, when it has ``max_batch_size`` frames, or when
+    the oldest frame has waited ``window_ms``.
+
+    Args:
+        window_ms: Longest time a frame waits for others to join its batch.
+        max_batch_size: Largest number of frames per inference.
+        intra_op_threads: Threads ONNX Runtime uses for one inference.
+    """
+
+    def __init__(
+        self, *, window_ms: float = 4.0, max_batch_size: int = 32, intra_op_threads: int = 1
+    ):
+        self._window_s = window_ms / 1000
+        self._max_batch_size = max(1, max_batch_size)
+        self._intra_op_threads = intra_op_threads
+
+        self._session = None
+        self._pending: List[_VADRequest] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._analyzers: "weakref.WeakSet[SharedSileroVADAnalyzer]" = weakref.WeakSet()
+
+        self._batches = 0
+        self._frames = 0
+        self._cpu_s = 0.0
+        self._latency = LatencyHistogram()
+
+    def load(self):
+        """Load the ONNX session; done on first use otherwise."""
+        with self._condition:
+            if self._session is not None:
+                return
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.inter_op_num_threads = 1
+            options.intra_op_num_threads = self._intra_op_threads
+            self._session = onnxruntime.InferenceSession(
+                silero_model_path(), providers=["CPUExecutionProvider"], sess_options=options
+            )
+            logger.debug("Loaded the shared Silero VAD model")
+
+    def register(self, analyzer: "SharedSileroVADAnalyzer"):
+        with self._condition:
+            self._analyzers.add(analyzer)
+
+    def unregister(self, analyzer: "SharedSileroVADAnalyzer"):
+        with self._condition:
+            self._analyzers.discard(analyzer)
+            # One fewer frame to wait for.
+            self._condition.notify()
+
+    def infer(self, analyzer: "SharedSileroVADAnalyzer", audio: np.ndarray) -> float:
+        """Voice confidence of one frame of ``analyzer``'s call.
+
+        Blocks until the batch the frame was put in has run. The analyzer's
+        state and context are updated.
+        """
+        if self._session is None:
+            self.load()
+        request = _VADRequest(analyzer, audio)
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(
+                    target=self._run, name="silero-vad-engine", daemon=True
+                )
+                self._thread.start()
+            self._pending.append(request)
+            self._condition.notify()
+        request.done.wait()
+        if request.error:
+            raise request.error
+
+        latency_ms = 1000 * (time.perf_counter() - request.enqueued_at)
+        self._latency.observe(latency_ms)
+        analyzer.latency.observe(latency_ms)
+        analyzer.cpu_s += request.cpu_s
+        return request.confidence
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _next_batch(self) -> Optional[List[_VADRequest]]:
+        with self._condition:
+            while not self._pending and not self._stopping:
+                self._condition.wait()
+            if self._stopping:
+                for request in self._pending:
+                    request.error = RuntimeError("The VAD engine was stopped")
+                    request.done.set()
+                self._pending = []
+                return None
+            deadline = self._pending[0].enqueued_at + self._window_s
+            while len(self._pending) < min(self._max_batch_size, len(self._analyzers)):
+                remaining_s = deadline - time.perf_counter()
+                if remaining_s <= 0:
+                    break
+                self._condition.wait(remaining_s)
+            batch = self._pending[: self._max_batch_size]
+            del self._pending[: self._max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            by_rate: Dict[int, List[_VADRequest]] = defaultdict(list)
+            for request in batch:
+                by_rate[request.analyzer.sample_rate].append(request)
+            for sample_rate, requests in by_rate.items():
+                try:
+                    self._infer_batch(requests, sample_rate)
+                except Exception as e:
+                    for request in requests:
+                        request.error = e
+                for request in requests:
+                    request.done.set()
+
+    def _infer_batch(self, requests: List[_VADRequest], sample_rate: int):
+        cpu_start = time.thread_time()
+        inputs = np.stack(
+            [np.concatenate((r.analyzer.context, r.audio)) for r in requests]
+        ).astype(np.float32, copy=False)
+        state = np.stack([r.analyzer.state for r in requests], axis=1)
+
+        out, state = self._session.run(
+            None, {"input": inputs, "state": state, "sr": np.array(sample_rate, dtype="int64")}
+        )
+
+        context_samples = CONTEXT_SAMPLES[sample_rate]
+        for i, request in enumerate(requests):
+            request.analyzer.state = state[:, i, :].copy()
+            request.analyzer.context = inputs[i, -context_samples:].copy()
+            request.confidence = float(out[i][0])
+
+        cpu_s = time.thread_time() - cpu_start
+        for request in requests:
+            request.cpu_s = cpu_s / len(requests)
+        self._cpu_s += cpu_s
+        self._batches += 1
+        self._frames += len(requests)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            analyzers = list(self._analyzers)
+        return {
+            "active_calls": len(analyzers),
+            "batches": self._batches,
+            "frames": self._frames,
+            "avg_batch_size": round(self._frames / self._batches, 2) if self._batches else 0.0,
+            "cpu_s": round(self._cpu_s, 3),
+            "cpu_us_per_frame": round(1e6 * self._cpu_s / self._frames, 1) if self._frames else 0.0,
+            "latency_ms": self._latency.summary(),
+            "calls": {
+                analyzer.call_id: analyzer.stats()
+                for analyzer in analyzers
+                if analyzer.call_id
+            },
+        }
+
+
+class SharedSileroVADAnalyzer(VADAnalyzer):
+    """Silero VAD for one call, inferred through the shared engine.
+
+    Drop-in replacement for ``SileroVADAnalyzer``: the speech detection
+    state machine is pipecat's, only the model inference is shared.
+
+    Args:
+        engine: The process-wide VAD engine.
+        call_id: Used to report this call's VAD latency and CPU time.
+        sample_rate: Audio sample rate, 8000 or 16000; set by the
+            transport if not given.
+        params: VAD parameters.
+    """
+
+    def __init__(
+        self,
+        *,
+        engine: Optional[SileroVADEngine] = None,
+        call_id: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        params: Optional[VADParams] = None,
+    ):
+        super().__init__(sample_rate=sample_rate, params=params)
+        self.call_id = call_id
+        self._engine = engine or vad_engine
+        self.state = np.zeros((2, 128), dtype=np.float32)
+        self.context = np.zeros(0, dtype=np.float32)
+        self._last_reset_time = 0.0
+
+        self.latency = LatencyHistogram(max_samples=1000)
+        self.cpu_s = 0.0
+        self._engine.register(self)
+
+    def set_sample_rate(self, sample_rate: int):
+        if sample_rate not in FRAME_SAMPLES:
+            raise ValueError(
+                f"Silero VAD sample rate needs to be 16000 or 8000 (sample rate: {sample_rate})"
+            )
+        super().set_sample_rate(sample_rate)
+        self._reset_state()
+
+    def num_frames_required(self) -> int:
+        return FRAME_SAMPLES.get(self.sample_rate, 512)
+
+    def voice_confidence(self, buffer) -> float:
+        try:
+            audio = np.frombuffer(buffer, np.int16).astype(np.float32) / 32768.0
+            now = time.monotonic()
+            if now - self._last_reset_time >= STATE_RESET_S:
+                self._reset_state()
+                self._last_reset_time = now
+            return self._engine.infer(self, audio)
+        except Exception as e:
+            logger.error(f"Error analyzing audio with the shared Silero VAD: {e}")
+            return 0
+
+    def close(self):
+        """Stop counting this call as active in the engine."""
+        self._engine.unregister(self)
+
+    def _reset_state(self):
+        self.state = np.zeros((2, 128), dtype=np.float32)
+        self.context = np.zeros(CONTEXT_SAMPLES.get(self.sample_rate, 64), dtype=np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"latency_ms": self.latency.summary(), "cpu_ms": round(1000 * self.cpu_s, 1)}
+
+
+vad_engine = SileroVADEngine(
+    window_ms=float(os.getenv("VAD_BATCH_WINDOW_MS", "4")),
+    max_batch_size=int(os.getenv("VAD_MAX_BATCH_SIZE", "32")),
+    intra_op_threads=int(os.getenv("VAD_INTRA_OP_THREADS", "1")),
+)
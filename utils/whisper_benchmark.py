@@ -0,0 +1,223 @@
+"""Compare Whisper inference on CPU and GPU: real-time factor and call capacity.
+
+Each configuration is a device and compute type, e.g. ``cuda:float16`` or
+``cpu:int8``. For every configuration the model is loaded the way the bot
+loads it, then:
+
+* the real-time factor (processing time / audio duration) of a single
+  utterance is measured, and
+* simulated calls are ramped up, doubling each step. Every call says the
+  utterance in real time, sends it through the same batch scheduler the bot
+  uses, then listens while the bot answers, and says it again. The largest
+  number of calls whose p95 transcription latency stays within the budget
+  is the replica's capacity for that configuration.
+
+Only final transcriptions are simulated; partial decodes while streaming
+add load on top. Use a recorded Kannada utterance (16 kHz mono WAV) for
+meaningful numbers; without one a synthetic voiced signal is used.
+
+Usage::
+
+    python -m utils.whisper_benchmark --config cuda:float16 \\
+        --config cpu:int8 --config cpu:int8_float32 \\
+        --cpu-threads 4 --audio complaint.wav
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import wave
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.cpu_inference import available_cores, parse_cpu_list, pin_to_cores
+from utils.latency_tracing import LatencyHistogram
+from utils.model_cache import ensure_local_model, synthetic_speech
+from utils.stt_scheduler import WhisperBatchScheduler, transcribe_single
+from utils.whisper_registry import WhisperModelRegistry
+
+SAMPLE_RATE = 16000
+
+
+def load_audio(path: Optional[str], seconds: float) -> np.ndarray:
+    """The benchmark utterance as 16 kHz float32 samples."""
+    if not path:
+        return synthetic_speech(seconds, SAMPLE_RATE)
+    with wave.open(path, "rb") as wav:
+        if wav.getframerate() != SAMPLE_RATE or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f"{path} must be 16 kHz mono 16-bit PCM")
+        audio = wav.readframes(wav.getnframes())
+    return np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def measure_rtf(model: Any, audio: np.ndarray, language: str, rounds: int) -> Dict[str, float]:
+    """Real-time factor of transcribing ``audio`` on its own."""
+    duration_s = len(audio) / SAMPLE_RATE
+    elapsed = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        transcribe_single(model, audio, language, no_speech_prob=1.0)
+        elapsed.append(time.perf_counter() - start)
+    median_s = float(np.median(elapsed))
+    return {
+        "audio_s": round(duration_s, 2),
+        "latency_ms": round(1000 * median_s, 1),
+        "rtf": round(median_s / duration_s, 4),
+    }
+
+
+async def _simulated_call(
+    transcribe, audio: np.ndarray, turns: int, listen_s: float, latency: LatencyHistogram
+):
+    duration_s = len(audio) / SAMPLE_RATE
+    # Calls don't start in lockstep.
+    await asyncio.sleep(random.uniform(0, duration_s + listen_s))
+    for _ in range(turns):
+        # The caller speaks, then the utterance is transcribed.
+        await asyncio.sleep(duration_s)
+        start = time.perf_counter()
+        await transcribe(audio)
+        latency.observe(1000 * (time.perf_counter() - start))
+        # The bot answers.
+        await asyncio.sleep(listen_s)
+
+
+async def measure_concurrency(
+    model: Any,
+    audio: np.ndarray,
+    language: str,
+    *,
+    calls: int,
+    turns: int,
+    listen_s: float,
+    batching: bool,
+) -> Dict[str, Any]:
+    """Run ``calls`` simulated calls at once and summarise their latency."""
+    scheduler = WhisperBatchScheduler() if batching else None
+
+    async def transcribe(samples: np.ndarray):
+        if scheduler:
+            return await scheduler.transcribe(model, samples, language, no_speech_prob=1.0)
+        return await asyncio.to_thread(transcribe_single, model, samples, language, 1.0)
+
+    latency = LatencyHistogram()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        await asyncio.gather(
+            *(_simulated_call(transcribe, audio, turns, listen_s, latency) for _ in range(calls))
+        )
+    finally:
+        if scheduler:
+            await scheduler.stop()
+    wall_s = time.perf_counter() - wall_start
+    cpu_s = time.process_time() - cpu_start
+
+    result = {"calls": calls, "latency_ms": latency.summary()}
+    # Share of the usable cores the process kept busy.
+    result["cpu_utilisation"] = round(cpu_s / wall_s / available_cores(), 3)
+    if scheduler:
+        result["avg_batch_size"] = scheduler.stats()["avg_batch_size"]
+    return result
+
+
+async def benchmark_config(
+    registry: WhisperModelRegistry, model_path: str, device: str, compute_type: str, args
+) -> Dict[str, Any]:
+    model = await asyncio.to_thread(registry.acquire, model_path, device, compute_type)
+    audio = load_audio(args.audio, args.seconds)
+
+    result: Dict[str, Any] = {"device": device, "compute_type": compute_type}
+    result["single"] = await asyncio.to_thread(measure_rtf, model, audio, args.language, args.rounds)
+    print(f"{device}:{compute_type} RTF {result['single']['rtf']} ({result['single']['latency_ms']}ms)")
+
+    levels: List[Dict[str, Any]] = []
+    max_calls = 0
+    calls = 1
+    while calls <= args.max_calls:
+        level = await measure_concurrency(
+            model,
+            audio,
+            args.language,
+            calls=calls,
+            turns=args.turns,
+            listen_s=args.listen_s,
+            batching=not args.no_batching,
+        )
+        levels.append(level)
+        p95 = level["latency_ms"].get("p95", 0.0)
+        print(f"{device}:{compute_type} {calls} calls: p95 {p95}ms, CPU {level['cpu_utilisation']:.0%}")
+        if p95 > args.latency_budget_ms:
+            break
+        max_calls = calls
+        calls *= 2
+
+    result["levels"] = levels
+    result["max_concurrent_calls"] = max_calls
+    registry.release(model_path, device, compute_type)
+    registry.evict_idle()
+    return result
+
+
+async def main(args):
+    if args.cpu_cores:
+        pin_to_cores(parse_cpu_list(args.cpu_cores))
+
+    model_path = ensure_local_model(args.repo_id, token=os.environ.get("HF_TOKEN"))
+    registry = WhisperModelRegistry(
+        idle_timeout_s=0, cpu_threads=args.cpu_threads, num_workers=args.num_workers
+    )
+
+    results = []
+    for config in args.config:
+        device, _, compute_type = config.partition(":")
+        results.append(
+            await benchmark_config(registry, model_path, device, compute_type or "default", args)
+        )
+
+    print()
+    print(f"{'config':<24}{'RTF':>8}{'max calls':>12}")
+    for result in results:
+        config = f"{result['device']}:{result['compute_type']}"
+        print(f"{config:<24}{result['single']['rtf']:>8}{result['max_concurrent_calls']:>12}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--config",
+        action="append",
+        help="device:compute_type to benchmark, repeatable (default: cuda:default and cpu:int8)",
+    )
+    parser.add_argument(
+        "--repo-id",
+        default=os.getenv("WHISPER_REPO_ID", "elprofessor67/faster-whisper-kannada-tiny"),
+    )
+    parser.add_argument("--language", default="kn")
+    parser.add_argument("--audio", help="16 kHz mono WAV with one caller utterance")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Length of the synthetic utterance")
+    parser.add_argument("--rounds", type=int, default=10, help="Transcriptions for the RTF")
+    parser.add_argument("--cpu-threads", type=int, default=int(os.getenv("WHISPER_CPU_THREADS", "0")))
+    parser.add_argument("--num-workers", type=int, default=int(os.getenv("WHISPER_NUM_WORKERS", "1")))
+    parser.add_argument("--cpu-cores", default=os.getenv("CPU_AFFINITY"), help="Cores to pin to, e.g. 0-3")
+    parser.add_argument("--max-calls", type=int, default=128)
+    parser.add_argument("--turns", type=int, default=5, help="Utterances per simulated call")
+    parser.add_argument("--listen-s", type=float, default=4.0, help="Time the bot talks per turn")
+    parser.add_argument("--latency-budget-ms", type=float, default=500.0)
+    parser.add_argument("--no-batching", action="store_true", help="Transcribe utterances one by one")
+    parser.add_argument("--output", help="Write the full results as JSON")
+    args = parser.parse_args(argv)
+    args.config = args.config or ["cuda:default", "cpu:int8"]
+    return args
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
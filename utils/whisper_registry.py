@@ -0,0 +1,198 @@
+"""Process-wide registry of loaded faster-whisper models.
+
+Every call used to build its own ``WhisperModel``, which meant one copy of the
+weights on the GPU per concurrent call. The registry loads each
+(model path, device, compute type) combination once and hands the same
+instance to every STT service that asks for it.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+ModelKey = Tuple[str, str, str]
+
+
+@dataclass
+class _RegistryEntry:
+    model: Any
+    load_time_s: float
+    refcount: int = 0
+    pinned: bool = False
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class WhisperModelRegistry:
+    """Reference-counted cache of faster-whisper models.
+
+    Models are loaded on the first ``acquire`` and warmed up with a short
+    synthetic clip so the first real utterance does not pay for CUDA kernel
+    initialisation. When the last borrower releases a model it stays loaded
+    for ``idle_timeout_s`` seconds before ``evict_idle`` unloads it.
+
+    Args:
+        idle_timeout_s: How long an unreferenced model is kept in memory.
+        warmup: Whether to run a warm-up transcription after loading.
+        cpu_threads: Intra-op threads per CPU model (CTranslate2
+            ``intra_threads``). 0 keeps the CTranslate2 default.
+        num_workers: Inter-op workers per model, i.e. how many
+            transcriptions can run in parallel from different threads.
+    """
+
+    def __init__(
+        self,
+        *,
+        idle_timeout_s: float = 600.0,
+        warmup: bool = True,
+        cpu_threads: int = 0,
+        num_workers: int = 1,
+    ):
+        self._idle_timeout_s = idle_timeout_s
+        self._warmup = warmup
+        self._cpu_threads = cpu_threads
+        self._num_workers = max(1, num_workers)
+        self._entries: Dict[ModelKey, _RegistryEntry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(model_path: str, device: str = "auto", compute_type: str = "default") -> ModelKey:
+        return (model_path, device, compute_type)
+
+    def acquire(
+        self,
+        model_path: str,
+        device: str = "auto",
+        compute_type: str = "default",
+        *,
+        pin: bool = False,
+    ) -> Any:
+        """Borrow a model, loading it if this is the first request for the key.
+
+        Args:
+            model_path: Local path or Hugging Face id of the CTranslate2 model.
+            device: Device to run inference on ("cpu", "cuda" or "auto").
+            compute_type: CTranslate2 compute type.
+            pin: Keep the model loaded even when nobody references it.
+
+        Returns:
+            The shared ``faster_whisper.WhisperModel`` instance.
+        """
+        key = self.make_key(model_path, device, compute_type)
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Loading can take seconds, so only callers asking for the same key wait
+        # on each other.
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry:
+                    entry.refcount += 1
+                    entry.pinned = entry.pinned or pin
+                    entry.last_used = time.monotonic()
+                    return entry.model
+
+            model, load_time_s = self._load(key)
+
+            with self._lock:
+                entry = _RegistryEntry(model=model, load_time_s=load_time_s, refcount=1, pinned=pin)
+                self._entries[key] = entry
+                return entry.model
+
+    def release(self, model_path: str, device: str = "auto", compute_type: str = "default"):
+        """Return a model borrowed with ``acquire``."""
+        key = self.make_key(model_path, device, compute_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                logger.warning(f"Releasing unknown Whisper model {key}")
+                return
+            entry.refcount = max(0, entry.refcount - 1)
+            entry.last_used = time.monotonic()
+
+    def evict_idle(self) -> int:
+        """Unload unpinned models nobody has used for ``idle_timeout_s``.
+
+        Returns:
+            The number of models evicted.
+        """
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.pinned or entry.refcount > 0:
+                    continue
+                if now - entry.last_used >= self._idle_timeout_s:
+                    evicted.append(self._entries.pop(key))
+                    logger.info(f"Evicting idle Whisper model {key}")
+        # Drop the references outside the lock; CTranslate2 frees the weights
+        # when the last Python reference goes away.
+        count = len(evicted)
+        evicted.clear()
+        return count
+
+    async def run_eviction_loop(self, interval_s: float = 60.0):
+        """Periodically evict idle models. Meant to run as a background task."""
+        while True:
+            await asyncio.sleep(interval_s)
+            self.evict_idle()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "/".join(key): {
+                    "refcount": entry.refcount,
+                    "pinned": entry.pinned,
+                    "load_time_s": round(entry.load_time_s, 3),
+                    "idle_s": round(now - entry.last_used, 1) if entry.refcount == 0 else 0.0,
+                }
+                for key, entry in self._entries.items()
+            }
+
+    def _load(self, key: ModelKey) -> Tuple[Any, float]:
+        from faster_whisper import WhisperModel
+
+        model_path, device, compute_type = key
+        logger.info(
+            f"Loading Whisper model {model_path} on {device} ({compute_type}, "
+            f"{self._cpu_threads or 'default'} CPU threads, {self._num_workers} workers)"
+        )
+        start = time.perf_counter()
+        model = WhisperModel(
+            model_path,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=self._cpu_threads,
+            num_workers=self._num_workers,
+        )
+        if self._warmup:
+            self._warm_up(model)
+        load_time_s = time.perf_counter() - start
+        logger.info(f"Loaded Whisper model {model_path} in {load_time_s:.2f}s")
+        return model, load_time_s
+
+    def _warm_up(self, model: Any, language: Optional[str] = None):
+        # One second of low-level noise runs the encoder and a few decoder
+        # steps, which is enough to initialise the CUDA kernels and allocator.
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal(16000) * 0.01).astype(np.float32)
+        segments, _ = model.transcribe(audio, language=language, beam_size=1)
+        # Segments are produced lazily; consume them so decoding actually runs.
+        for _ in segments:
+            pass
+
+
+model_registry = WhisperModelRegistry(
+    idle_timeout_s=float(os.getenv("WHISPER_IDLE_EVICT_S", "600")),
+    cpu_threads=int(os.getenv("WHISPER_CPU_THREADS", "0")),
+    num_workers=int(os.getenv("WHISPER_NUM_WORKERS", "1")),
+)